@@ -1,6 +1,7 @@
 import streamlit as st
-from utils.database import init_database
-from utils.auth import is_logged_in, show_login_page, show_user_info, is_admin, is_founder, is_james
+from utils.database import init_database, set_current_teacher
+from utils.backups import start_backup_scheduler
+from utils.auth import is_logged_in, show_login_page, show_user_info, is_admin, is_founder, is_james, get_current_user
 
 st.set_page_config(
     page_title="Class Tracker",
@@ -37,11 +38,18 @@ st.markdown(hide_streamlit_style, unsafe_allow_html=True)
 # Initialize database on app start
 init_database()
 
+# Snapshot the database in the background on a schedule
+start_backup_scheduler()
+
 # Check authentication
 if not is_logged_in():
+    set_current_teacher(None)
     show_login_page()
     st.stop()
 
+# With per-teacher shards on, this session's queries go to the teacher's own database
+set_current_teacher(get_current_user()['id'])
+
 st.title("📚 Class Tracker")
 st.sidebar.title("Navigation")
 
@@ -57,8 +65,10 @@ nav_options = [
     "Student Comments",
     "Dictation Scores",
     "Essay Marking",
+    "Essay Analytics",
     "Spelling Tests",
     "Grammar Errors",
+    "Search",
     "My Todo List"
 ]
 
@@ -147,6 +157,13 @@ elif page == "Essay Marking":
         st.error(f"Error loading Essay Marking page: {str(e)}")
         st.write("Please check the console for detailed error information.")
     
+elif page == "Essay Analytics":
+    try:
+        exec(open('pages/essay_analytics.py').read())
+    except Exception as e:
+        st.error(f"Error loading Essay Analytics page: {str(e)}")
+        st.write("Please check the console for detailed error information.")
+    
 elif page == "Spelling Tests":
     try:
         exec(open('pages/spelling_tests.py').read())
@@ -161,6 +178,13 @@ elif page == "Grammar Errors":
         st.error(f"Error loading Grammar Errors page: {str(e)}")
         st.write("Please check the console for detailed error information.")
     
+elif page == "Search":
+    try:
+        exec(open('pages/search.py').read())
+    except Exception as e:
+        st.error(f"Error loading Search page: {str(e)}")
+        st.write("Please check the console for detailed error information.")
+    
 elif page == "My Todo List":
     try:
         exec(open('pages/todo.py').read())
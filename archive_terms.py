@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Script to move closed school terms out of the main database into per-term archive files
+
+Homework, spelling test and grammar error rows from a finished term go to
+database/archives/term_<year>_<term>.db, which is read-only from then on.
+Day-to-day pages only read the main database; term reports and history
+ranges that reach into archived terms attach the archives they need.
+
+Examples:
+    python archive_terms.py
+    python archive_terms.py --list
+    python archive_terms.py --term "2025-26 T1"
+    python archive_terms.py --db database/school_large.db --today 2026-06-30
+"""
+
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+
+from utils.database import DB_PATH, SHARD_DIR, init_database, on_database_server
+from utils.term_archive import archivable_terms, archive_term, list_archives, term_label
+
+
+def parse_term(label):
+    """(start_year, term) from a label like 2025-26 T1"""
+    match = re.fullmatch(r"(\d{4})-\d{2}\s*T([123])", label.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Expected a term like 2025-26 T1, got {label!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed Class Tracker terms")
+    parser.add_argument("--db", default=DB_PATH, help="Database to archive from")
+    parser.add_argument("--list", action="store_true", help="List archived terms instead of archiving")
+    parser.add_argument("--term", type=parse_term, help="Archive only this term (e.g. '2025-26 T1')")
+    parser.add_argument("--today", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="Treat terms ending before this date as closed (YYYY-MM-DD)")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip the VACUUM that shrinks the file afterwards")
+    args = parser.parse_args()
+
+    print("🗄️ Class Tracker - Term Archives")
+    print("=" * 40)
+
+    if on_database_server(args.db):
+        print("❌ Term archives are SQLite files - not available on a PostgreSQL database")
+        return
+    if SHARD_DIR:
+        print("❌ Term archives aren't available with per-teacher shards - the records are in the teachers' files")
+        return
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found")
+        return
+
+    # Bring older databases up to the current schema first
+    init_database(args.db)
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.list:
+            archives = list_archives(conn)
+            if not archives:
+                print("No archived terms yet")
+            for _, label, start_date, end_date, file, row_count, archived_at in archives:
+                print(f"{label}  {start_date} to {end_date}  {row_count:>8,} rows  {file}  (archived {archived_at})")
+            return
+        terms = [args.term] if args.term else archivable_terms(conn, args.today)
+    finally:
+        conn.close()
+
+    if not terms:
+        print("No closed terms left to archive")
+        return
+
+    size_before = os.path.getsize(args.db)
+    for start_year, term in terms:
+        try:
+            moved = archive_term(start_year, term, args.db, today=args.today)
+        except ValueError as e:
+            print(f"❌ {e}")
+            continue
+        print(f"✅ {term_label(start_year, term)}: " + ", ".join(f"{rows:,} {table}" for table, rows in moved.items()))
+
+    if not args.no_vacuum:
+        conn = sqlite3.connect(args.db)
+        conn.execute("VACUUM")
+        conn.close()
+    print(f"   Database: {size_before / 1024 / 1024:.1f} MB -> {os.path.getsize(args.db) / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Script to take, list, prune and restore Class Tracker database snapshots
+
+Snapshots are taken online with SQLite's backup API, so the app can stay up.
+Each one only stores the database chunks that changed since earlier snapshots.
+The app also takes them on a schedule (see utils/backups.py).
+
+Examples:
+    python backup_database.py
+    python backup_database.py --list
+    python backup_database.py --restore 20260315-160000-000000
+    python backup_database.py --restore 20260315-160000-000000 --to /tmp/school_copy.db
+    python backup_database.py --prune --keep-recent 10 --keep-daily 14
+"""
+
+import argparse
+import os
+import time
+
+from utils.backups import (
+    BACKUP_DIR, KEEP_DAILY, KEEP_RECENT, assemble_snapshot, list_snapshots, prune_snapshots,
+    restore_snapshot, take_snapshot
+)
+from utils.database import DB_PATH, on_database_server
+
+
+def _mb(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up and restore the Class Tracker database")
+    parser.add_argument("--db", default=DB_PATH, help="Database to back up or restore into")
+    parser.add_argument("--backup-dir", default=BACKUP_DIR, help="Where snapshots and their chunks are kept")
+    parser.add_argument("--list", action="store_true", help="List snapshots instead of taking one")
+    parser.add_argument("--restore", metavar="SNAPSHOT_ID", help="Restore a snapshot")
+    parser.add_argument("--to", help="With --restore, write the snapshot to this file instead of over --db")
+    parser.add_argument("--prune", action="store_true", help="Apply retention instead of taking a snapshot")
+    parser.add_argument("--keep-recent", type=int, default=KEEP_RECENT, help="Newest snapshots --prune keeps")
+    parser.add_argument("--keep-daily", type=int, default=KEEP_DAILY, help="Days --prune keeps one snapshot for")
+    args = parser.parse_args()
+
+    print("💾 Class Tracker - Database Backups")
+    print("=" * 40)
+
+    if on_database_server(args.db):
+        print("❌ Snapshots are for SQLite databases - back up PostgreSQL with pg_dump or WAL archiving")
+        return
+
+    if args.list:
+        snapshots = list_snapshots(args.backup_dir)
+        if not snapshots:
+            print("No snapshots yet")
+        for snapshot in snapshots:
+            print(f"{snapshot['id']}  {snapshot['created_at']}  {_mb(snapshot['size']):>9}  "
+                  f"+{_mb(snapshot['new_bytes']):>9}  {snapshot['reason']}")
+        return
+
+    if args.prune:
+        removed, chunks_removed = prune_snapshots(args.keep_recent, args.keep_daily, args.backup_dir)
+        print(f"✅ Removed {removed} snapshots and {chunks_removed} unused chunks")
+        return
+
+    if args.restore:
+        started = time.perf_counter()
+        if args.to:
+            if os.path.exists(args.to):
+                print(f"❌ {args.to} already exists")
+                return
+            manifest = assemble_snapshot(args.restore, args.to, args.backup_dir)
+            target = args.to
+        else:
+            manifest = restore_snapshot(args.restore, args.db, args.backup_dir)
+            target = args.db
+        print(f"✅ Restored snapshot from {manifest['created_at']} to {target} "
+              f"in {time.perf_counter() - started:.2f}s")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found")
+        return
+    manifest = take_snapshot("manual", args.db, args.backup_dir)
+    print(f"✅ Snapshot {manifest['id']} of {_mb(manifest['size'])} in {manifest['seconds']:.2f}s")
+    print(f"   {manifest['new_chunks']} of {len(manifest['chunks'])} chunks were new ({_mb(manifest['new_bytes'])} stored)")
+
+
+if __name__ == "__main__":
+    main()
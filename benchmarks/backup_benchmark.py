@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Backup benchmark - snapshot and restore times, and what a snapshot does to write latency
+
+A writer thread keeps adding comments to a scratch copy of a generated database,
+committing each one, while nothing else runs, then while a first (full) snapshot
+and a later (incremental) snapshot are taken. Reports the commit latency seen in
+each phase, how long each snapshot took and how much it stored, and restore time.
+
+Usage:
+    python generate_school_data.py --scale 1
+    python benchmarks/backup_benchmark.py --db database/school_large.db
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.backups import assemble_snapshot, restore_snapshot, take_snapshot  # noqa: E402
+
+
+def _write_while(db_path, action, interval):
+    """Run action() while a writer commits one comment every `interval` seconds; returns (result, latencies)"""
+    latencies = []
+    stop = threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=30)
+        student_id = conn.execute("SELECT MIN(id) FROM students").fetchone()[0]
+        while not stop.is_set():
+            started = time.perf_counter()
+            conn.execute(
+                "INSERT INTO comments (student_id, category, comment) VALUES (?, 'General Behaviour', 'Backup benchmark')",
+                (student_id,)
+            )
+            conn.commit()
+            latencies.append(time.perf_counter() - started)
+            stop.wait(interval)
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = action()
+    finally:
+        stop.set()
+        thread.join()
+    return result, latencies
+
+
+def _latency_row(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"{name:<24} {len(latencies):>7} {statistics.median(latencies) * 1000:>8.1f}ms "
+          f"{p95 * 1000:>8.1f}ms {latencies[-1] * 1000:>8.1f}ms")
+
+
+def run(db_path, backup_dir, interval, idle_seconds):
+    size = os.path.getsize(db_path)
+    print(f"Database {size / 1024 / 1024:.1f} MB, one commit every {interval * 1000:.0f}ms\n")
+
+    _, idle = _write_while(db_path, lambda: time.sleep(idle_seconds), interval)
+    full, during_full = _write_while(db_path, lambda: take_snapshot("benchmark", db_path, backup_dir), interval)
+    incremental, during_incremental = _write_while(
+        db_path, lambda: take_snapshot("benchmark", db_path, backup_dir), interval
+    )
+
+    print(f"{'Writes':<24} {'commits':>7} {'median':>10} {'p95':>10} {'max':>10}")
+    _latency_row("no backup", idle)
+    _latency_row("during full snapshot", during_full)
+    _latency_row("during incremental", during_incremental)
+
+    print(f"\n{'Snapshot':<24} {'time':>8} {'copy':>8} {'restarts':>9} {'new chunks':>11} {'stored':>10}")
+    for name, manifest in (("full", full), ("incremental", incremental)):
+        print(f"{name:<24} {manifest['seconds']:>7.2f}s {manifest['copy_seconds']:>7.2f}s {manifest['restarts']:>9} "
+              f"{manifest['new_chunks']:>5}/{len(manifest['chunks']):<5} {manifest['new_bytes'] / 1024 / 1024:>7.1f} MB")
+
+    started = time.perf_counter()
+    assemble_snapshot(incremental["id"], os.path.join(backup_dir, "assembled.db"), backup_dir)
+    assemble_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    restore_snapshot(full["id"], db_path, backup_dir)
+    restore_seconds = time.perf_counter() - started
+    print(f"\nRebuild snapshot to a new file: {assemble_seconds:.2f}s")
+    print(f"Restore over the live database (includes the safety snapshot): {restore_seconds:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark online snapshots and restores")
+    parser.add_argument("--db", default="database/school_large.db",
+                        help="Generated database to benchmark against (it is copied, never modified)")
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between the writer's commits")
+    parser.add_argument("--idle-seconds", type=float, default=2.0, help="How long to measure writes with no backup")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    print("⏱️ Class Tracker - Backup Benchmark")
+    print("=" * 40)
+
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        scratch_db = os.path.join(scratch_dir, "school.db")
+        shutil.copyfile(args.db, scratch_db)
+        run(scratch_db, os.path.join(scratch_dir, "backups"), args.interval, args.idle_seconds)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Class join benchmark - compares the old class_name string joins with class_id
+
+Runs the roster, per-class history and school-wide class summary queries
+both ways against a scratch copy of a generated database. The string
+variant gets its own (teacher_id, class_name, name) index, as it had before
+the migration, so the comparison is index against index.
+
+Usage:
+    python generate_school_data.py --scale 4
+    python benchmarks/class_join_benchmark.py --db database/school_large.db
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# name: (class_name query, class_id query) - per-class queries take the class as parameters
+QUERIES = {
+    "roster filter": (
+        "SELECT id, name FROM students WHERE teacher_id = ? AND class_name = ? ORDER BY name",
+        "SELECT id, name FROM students WHERE class_id = ? ORDER BY name",
+    ),
+    "class spelling history": (
+        """SELECT s.name, st.score, st.week_date FROM spelling_tests st
+           JOIN students s ON st.student_id = s.id
+           WHERE s.teacher_id = ? AND s.class_name = ?
+           ORDER BY st.week_date DESC, s.name""",
+        """SELECT s.name, st.score, st.week_date FROM spelling_tests st
+           JOIN students s ON st.student_id = s.id
+           WHERE s.class_id = ?
+           ORDER BY st.week_date DESC, s.name""",
+    ),
+    "school class summary": (
+        """SELECT c.name, COUNT(DISTINCT s.id), AVG(h.status = 'on_time') FROM classes c
+           JOIN students s ON s.teacher_id = c.teacher_id AND s.class_name = c.name
+           JOIN homework h ON h.student_id = s.id
+           GROUP BY c.id""",
+        """SELECT c.name, COUNT(DISTINCT s.id), AVG(h.status = 'on_time') FROM classes c
+           JOIN students s ON s.class_id = c.id
+           JOIN homework h ON h.student_id = s.id
+           GROUP BY c.id""",
+    ),
+}
+
+
+def _time(conn, query, param_sets, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for params in param_sets:
+            conn.execute(query, params).fetchall()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def run(db_path, runs):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX IF NOT EXISTS bench_students_teacher_class ON students (teacher_id, class_name, name)")
+    conn.execute("ANALYZE")
+    classes = conn.execute("SELECT id, teacher_id, name FROM classes ORDER BY id").fetchall()
+    students = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    print(f"{len(classes)} classes, {students:,} students, median of {runs} runs\n")
+
+    print(f"{'Query':<24} {'class_name':>12} {'class_id':>12} {'speedup':>8}")
+    for name, (by_name, by_id) in QUERIES.items():
+        if "?" in by_id:
+            name_params = [(teacher_id, class_name) for _, teacher_id, class_name in classes]
+            id_params = [(class_id,) for class_id, _, _ in classes]
+        else:
+            name_params = id_params = [()]
+        name_time = _time(conn, by_name, name_params, runs)
+        id_time = _time(conn, by_id, id_params, runs)
+        print(f"{name:<24} {name_time * 1000:>10.1f}ms {id_time * 1000:>10.1f}ms {name_time / id_time:>7.2f}x")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare class_name and class_id joins")
+    parser.add_argument("--db", default="database/school_large.db",
+                        help="Generated database to benchmark against (it is copied, never modified)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per query")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    print("⏱️ Class Tracker - class_name vs class_id Joins")
+    print("=" * 40)
+
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        scratch_db = os.path.join(scratch_dir, "school.db")
+        shutil.copyfile(args.db, scratch_db)
+        run(scratch_db, args.runs)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
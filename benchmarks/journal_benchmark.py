@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Change journal benchmark - write overhead, journal growth and restore time
+
+Times inserts, updates and deletes of comments and essay marks on a scratch
+copy of a generated database with the journal triggers in place and with them
+dropped, reports the bytes the journal (its old-row tables and indexes) takes per entry, and
+times undoing one student's changes with restore_to.
+
+Usage:
+    python generate_school_data.py --scale 1
+    python benchmarks/journal_benchmark.py --db database/school_large.db
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# name: (statement, parameters per row id)
+OPERATIONS = {
+    "comment insert": (
+        "INSERT INTO comments (student_id, category, comment, evidence) VALUES (?, 'English', 'Benchmark comment', 'Benchmark')",
+        lambda row: (row,),
+    ),
+    "comment update": ("UPDATE comments SET comment = comment || ' (edited)' WHERE id = ?", lambda row: (row,)),
+    "essay mark update": ("UPDATE essay_marks SET score = score + 1, content_ideas = content_ideas WHERE id = ?",
+                          lambda row: (row,)),
+    "essay mark delete": ("DELETE FROM essay_marks WHERE id = ?", lambda row: (row,)),
+    "comment delete": ("DELETE FROM comments WHERE id = ?", lambda row: (row,)),
+}
+
+
+def _journal_bytes(conn):
+    return conn.execute("""
+        SELECT COALESCE(SUM(pgsize), 0) FROM dbstat
+        WHERE name IN ('change_journal', 'idx_change_journal_changed_at', 'idx_change_journal_student')
+           OR name LIKE 'journal\\_%' ESCAPE '\\'
+    """).fetchone()[0]
+
+
+def _time_operations(db_path, rows, journaled):
+    """Seconds per row for each operation, each run in its own transaction"""
+    from utils.database import create_journal_triggers, drop_journal_triggers, get_connection
+
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    (create_journal_triggers if journaled else drop_journal_triggers)(cursor)
+    conn.commit()
+    comment_ids = [row[0] for row in cursor.execute("SELECT id FROM comments ORDER BY id LIMIT ?", (rows,))]
+    essay_ids = [row[0] for row in cursor.execute("SELECT id FROM essay_marks ORDER BY id LIMIT ?", (rows,))]
+    student_ids = [row[0] for row in cursor.execute("SELECT id FROM students ORDER BY id LIMIT ?", (rows,))]
+
+    timings = {}
+    bytes_before = _journal_bytes(conn)
+    entries_before = cursor.execute("SELECT COUNT(*) FROM change_journal").fetchone()[0]
+    for name, (statement, params) in OPERATIONS.items():
+        ids = student_ids if "insert" in name else essay_ids if "essay" in name else comment_ids
+        started = time.perf_counter()
+        cursor.executemany(statement, (params(row) for row in ids))
+        conn.commit()
+        timings[name] = (time.perf_counter() - started) / len(ids)
+    entries = cursor.execute("SELECT COUNT(*) FROM change_journal").fetchone()[0] - entries_before
+    growth = _journal_bytes(conn) - bytes_before
+    conn.close()
+    return timings, entries, growth
+
+
+def run(db_path, rows):
+    os.environ["CLASS_TRACKER_DB"] = db_path
+    from utils.change_journal import restore_to
+    from utils.database import get_connection, init_database
+
+    init_database(db_path)
+    size = os.path.getsize(db_path)
+    print(f"Database {size / 1024 / 1024:.1f} MB, {rows:,} rows per operation\n")
+
+    # Both runs work on identical copies so neither sees the other's edits
+    plain_db = db_path + ".plain"
+    shutil.copyfile(db_path, plain_db)
+    plain, _, _ = _time_operations(plain_db, rows, journaled=False)
+
+    conn = get_connection(db_path)
+    as_of = conn.execute("SELECT strftime('%Y-%m-%d %H:%M:%f', 'now')").fetchone()[0]
+    conn.close()
+    time.sleep(0.01)
+    journaled, entries, growth = _time_operations(db_path, rows, journaled=True)
+
+    print(f"{'Operation':<20} {'no journal':>12} {'journal':>12} {'overhead':>9}")
+    for name in OPERATIONS:
+        print(f"{name:<20} {plain[name] * 1e6:>10.1f}us {journaled[name] * 1e6:>10.1f}us "
+              f"{journaled[name] / plain[name]:>8.2f}x")
+    print(f"\nJournal grew {growth / 1024:,.0f} KB for {entries:,} entries ({growth / max(entries, 1):.0f} bytes each)")
+
+    conn = get_connection(db_path)
+    student_id = conn.execute(
+        "SELECT student_id FROM change_journal WHERE changed_at > ? AND student_id IS NOT NULL "
+        "GROUP BY student_id ORDER BY COUNT(*) DESC LIMIT 1", (as_of,)
+    ).fetchone()[0]
+    conn.close()
+    started = time.perf_counter()
+    undone = restore_to(as_of, student_id=student_id)
+    student_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    undone_table = restore_to(as_of, table_name="essay_marks")
+    table_seconds = time.perf_counter() - started
+    print(f"Restore one student: {undone} changes undone in {student_seconds * 1000:.0f}ms")
+    print(f"Restore essay_marks: {undone_table:,} changes undone in {table_seconds * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the change journal")
+    parser.add_argument("--db", default="database/school_large.db",
+                        help="Generated database to benchmark against (it is copied, never modified)")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows each operation touches")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    print("⏱️ Class Tracker - Change Journal Benchmark")
+    print("=" * 40)
+
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        scratch_db = os.path.join(scratch_dir, "school.db")
+        shutil.copyfile(args.db, scratch_db)
+        run(scratch_db, args.rows)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
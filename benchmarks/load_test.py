@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Load test - simulates many teachers using Class Tracker at the same time
+
+Each simulated session is a separate process that logs in as one generated
+teacher through the real login form and drives the pages with Streamlit's
+AppTest harness, as page_benchmark.py does. It repeatedly runs a realistic
+mix of page actions (homework saves, spelling entry, new comments and
+analytics views), so every statement goes through the page code and
+utils.database - shard routing, the change journal, text compression and
+all. The report covers throughput, latency percentiles, lock-wait time and
+error rates.
+
+Lock-wait time is measured from a transaction's first write to its COMMIT.
+Writes themselves take well under a millisecond, so this is almost all time
+spent waiting for the write lock.
+
+Usage:
+    python generate_school_data.py --scale 1
+    python benchmarks/load_test.py --db database/school_large.db --sessions 36 --duration 60
+    python benchmarks/load_test.py --server-url http://localhost:8501 --think-time 0.5
+
+With --shard-dir each session works on its teacher's shard (see shard_database.py)
+instead of the one shared file:
+    python shard_database.py --db /tmp/school.db --shard-dir /tmp/teachers
+    python benchmarks/load_test.py --db /tmp/school.db --shard-dir /tmp/teachers
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+import page_benchmark
+
+# Relative weights of each action in a typical report-week session
+OPERATION_MIX = {
+    "homework_save": 30,
+    "spelling_entry": 20,
+    "comment_create": 20,
+    "analytics_view": 30,
+}
+
+# (page in the sidebar, action on it) behind each operation - an action of None just views the page
+OPERATION_PAGES = {
+    "homework_save": ("Homework Tracker", page_benchmark._save_homework),
+    "spelling_entry": ("Spelling Tests", page_benchmark._save_spelling),
+    "comment_create": ("Student Comments", page_benchmark._add_comment),
+    "analytics_view": ("Essay Analytics", None),
+}
+
+TEACHER_PASSWORD = page_benchmark.TEACHER_LOGIN[1]
+
+
+class LockMonitor:
+    """Connection hook that adds up the time from each transaction's first write to its COMMIT"""
+
+    def __init__(self):
+        self.lock_wait = 0.0
+
+    def __call__(self, conn):
+        first_write = []
+
+        def trace(statement):
+            keyword = statement.lstrip().upper()
+            if keyword.startswith(page_benchmark.WRITE_PREFIXES):
+                if not first_write:
+                    first_write.append(time.perf_counter())
+            elif keyword.startswith(("COMMIT", "ROLLBACK")) and first_write:
+                self.lock_wait += time.perf_counter() - first_write.pop()
+
+        conn.set_trace_callback(trace)
+
+
+class PageError(Exception):
+    """A page raised or reported an error"""
+
+
+class Session:
+    """One simulated teacher, clicking through the pages in its own Streamlit session"""
+
+    def __init__(self, username, rng, timeout):
+        from streamlit.testing.v1 import AppTest
+        from utils.database import set_connection_hook
+
+        self.rng = rng
+        self.samples = []
+        self.monitor = LockMonitor()
+        set_connection_hook(self.monitor)
+
+        self.at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=timeout)
+        self.at.run()
+        page_benchmark._by_label(self.at.text_input, "Username").input(username)
+        page_benchmark._by_label(self.at.text_input, "Password").input(TEACHER_PASSWORD)
+        page_benchmark._by_label(self.at.button, "Login").click().run()
+        if "user" not in self.at.session_state:
+            raise RuntimeError(f"Could not log in as {username}")
+
+    def _run(self):
+        self.at.run()
+        problems = [exception.message for exception in self.at.exception]
+        problems += [str(error.value) for error in self.at.error if str(error.value).startswith("Error")]
+        if problems:
+            raise PageError(problems[0])
+
+    def _select_class(self):
+        for selectbox in self.at.selectbox:
+            if selectbox.label == "Select Class" and selectbox.options:
+                selectbox.select_index(self.rng.randrange(len(selectbox.options)))
+
+    def run_operation(self, name):
+        page, action = OPERATION_PAGES[name]
+        self.monitor.lock_wait = 0.0
+        started = time.perf_counter()
+        error = None
+        try:
+            page_benchmark._by_label(self.at.sidebar.selectbox, "Choose a page:").set_value(page)
+            self._run()
+            self._select_class()
+            self._run()
+            if action:
+                action(self.at)
+                self._run()
+        except PageError as e:
+            error = "locked" if "locked" in str(e) else "page"
+        except Exception:
+            error = "other"
+        self.samples.append((name, time.perf_counter() - started, self.monitor.lock_wait, error))
+
+
+def _ping_server(server_url, samples):
+    started = time.perf_counter()
+    error = None
+    try:
+        with urllib.request.urlopen(f"{server_url}/_stcore/health", timeout=10) as response:
+            response.read()
+    except Exception:
+        error = "http"
+    samples.append(("server_health", time.perf_counter() - started, 0.0, error))
+
+
+def run_session(args):
+    """Worker entry point - returns the samples of one simulated teacher"""
+    username, seed, duration, think_time, server_url, timeout = args
+    # app.py opens pages by relative path, exactly as `streamlit run app.py` does
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    # Deprecation notices are logged on every rerun and would drown the report
+    logging.disable(logging.WARNING)
+    rng = random.Random(seed)
+    session = Session(username, rng, timeout)
+
+    operations = list(OPERATION_MIX)
+    weights = list(OPERATION_MIX.values())
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        session.run_operation(rng.choices(operations, weights=weights)[0])
+        if server_url:
+            _ping_server(server_url, session.samples)
+        if think_time:
+            time.sleep(rng.expovariate(1 / think_time))
+    return session.samples
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(samples, duration):
+    print(f"{'Operation':<16} {'ops':>7} {'ops/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} "
+          f"{'lock p95':>9} {'lock tot':>9} {'errors':>7}")
+    for name in list(OPERATION_MIX) + ["server_health", "ALL"]:
+        rows = [s for s in samples if s[0] == name] if name != "ALL" else [s for s in samples if s[0] != "server_health"]
+        if not rows:
+            continue
+        latencies = sorted(s[1] for s in rows)
+        lock_waits = sorted(s[2] for s in rows)
+        errors = sum(1 for s in rows if s[3])
+        print(
+            f"{name:<16} {len(rows):>7} {len(rows) / duration:>8.1f} "
+            f"{_percentile(latencies, 0.50) * 1000:>7.1f}ms {_percentile(latencies, 0.95) * 1000:>7.1f}ms "
+            f"{_percentile(latencies, 0.99) * 1000:>7.1f}ms {_percentile(lock_waits, 0.95) * 1000:>7.1f}ms "
+            f"{sum(lock_waits):>8.1f}s {errors / len(rows):>6.1%}"
+        )
+
+    error_kinds = {}
+    for sample in samples:
+        if sample[3]:
+            error_kinds[sample[3]] = error_kinds.get(sample[3], 0) + 1
+    if error_kinds:
+        print("\nErrors: " + ", ".join(f"{kind}={count}" for kind, count in sorted(error_kinds.items())))
+
+    total_lock = sum(s[2] for s in samples)
+    total_time = sum(s[1] for s in samples if s[0] != "server_health")
+    if total_time:
+        print(f"Time spent waiting for the write lock: {total_lock / total_time:.1%} of operation time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent teachers against Class Tracker")
+    parser.add_argument("--db", default="database/school_large.db", help="SQLite file to load (it is written to!)")
+    parser.add_argument("--sessions", type=int, default=36, help="Concurrent teacher sessions")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds each session runs for")
+    parser.add_argument("--think-time", type=float, default=0.2,
+                        help="Mean pause between actions in seconds (0 for a stress test)")
+    parser.add_argument("--server-url", help="Also poll a running Streamlit server, e.g. http://localhost:8501")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--shard-dir", help="Per-teacher shards split from --db - each session writes to its own")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds a page may take before it counts as an error")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db)
+    if args.shard_dir:
+        teacher_ids = sorted(
+            int(name[len("teacher_"):-len(".db")]) for name in os.listdir(args.shard_dir)
+            if name.startswith("teacher_") and name.endswith(".db")
+        )
+    else:
+        teacher_ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT teacher_id FROM classes ORDER BY teacher_id"
+        )]
+    usernames = dict(conn.execute(
+        "SELECT id, username FROM users WHERE role = 'teacher' AND username LIKE 'teacher\\_%' ESCAPE '\\'"
+    ))
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    conn.close()
+    # Generated teachers share one password, so sessions can only log in as them
+    teachers = [usernames[teacher_id] for teacher_id in teacher_ids if teacher_id in usernames]
+    if not teachers:
+        print("❌ No generated teachers with classes found - the load test needs a generate_school_data.py database")
+        sys.exit(1)
+
+    # Sessions run the app itself, which finds its data through these (paths are resolved before it changes directory)
+    os.environ["CLASS_TRACKER_DB"] = os.path.abspath(args.db)
+    if args.shard_dir:
+        os.environ["CLASS_TRACKER_SHARD_DIR"] = os.path.abspath(args.shard_dir)
+    # Scheduled snapshots would copy the database in the middle of the run
+    os.environ["CLASS_TRACKER_BACKUP_INTERVAL"] = "0"
+
+    print("🔥 Class Tracker - Load Test")
+    print("=" * 40)
+    target = f"{len(teacher_ids)} shards in {args.shard_dir}" if args.shard_dir else args.db
+    print(f"{args.sessions} sessions x {args.duration:.0f}s against {target} (journal_mode={journal_mode})")
+
+    jobs = [
+        (teachers[i % len(teachers)], args.seed + i, args.duration, args.think_time, args.server_url, args.timeout)
+        for i in range(args.sessions)
+    ]
+    with multiprocessing.Pool(args.sessions) as pool:
+        results = pool.map(run_session, jobs)
+
+    samples = [sample for session in results for sample in session]
+    if not samples:
+        print("❌ No operations completed")
+        sys.exit(1)
+
+    print()
+    # Logging in is left out of the timings, so rates are over the time sessions spend working
+    report(samples, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Page benchmark - drives every page headlessly with Streamlit's AppTest harness
+
+Logs in through the real login form, opens each page, selects a class and
+triggers the page's save action against a generated database. Records the
+median/p95 rerun time and the number of SQL queries per rerun, then compares
+the results with a stored baseline so regressions fail the run.
+
+Usage:
+    python generate_school_data.py --scale 1 --end-date 2026-06-30
+    python benchmarks/page_benchmark.py --db database/school_large.db
+    python benchmarks/page_benchmark.py --db database/school_large.db --update-baseline
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "page_baseline.json")
+
+# Generated teachers all use this password (see utils/synthetic_data.py)
+TEACHER_LOGIN = ("teacher_0001", "password")
+ADMIN_LOGIN = ("james", "rx9K2p")
+
+# Statements that are transaction bookkeeping rather than real queries
+NON_QUERY_PREFIXES = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def _by_label(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No widget labelled {label!r}")
+
+
+def _select_first_class(at):
+    for selectbox in at.selectbox:
+        if selectbox.label == "Select Class" and selectbox.options:
+            selectbox.select_index(0)
+    return at
+
+
+def _save_homework(at):
+    _by_label(at.button, "Save Homework Status").click()
+
+
+def _add_comment(at):
+    _by_label(at.text_area, "Comment").input("Benchmark comment about leadership")
+    _by_label(at.button, "Add Comment").click()
+
+
+def _save_spelling(at):
+    at.number_input[1].set_value(15)
+    _by_label(at.button, "Save Scores").click()
+
+
+def _record_grammar_error(at):
+    _by_label(at.text_area, "Example/Context").input("She don't like apples")
+    _by_label(at.button, "Record Error").click()
+
+
+def _score_dictation(at):
+    _by_label(at.checkbox, "Use AI-Powered Scoring (ChatGPT)").uncheck()
+    _by_label(at.text_area, "Student's Written Attempt").input("The quick brown fox jump over the lazy dog.")
+    _by_label(at.button, "Calculate Score").click()
+
+
+def _search(at):
+    _by_label(at.text_input, "Search").input("leadership")
+
+
+def _add_todo(at):
+    _by_label(at.text_input, "Task Description").input("Benchmark task")
+    _by_label(at.button, "Add Task").click()
+
+
+# (page name in the sidebar, login, action name, action) - every page is also timed without an action
+SCENARIOS = [
+    ("Home", TEACHER_LOGIN, None, None),
+    ("Manage Classes", TEACHER_LOGIN, None, None),
+    ("Homework Tracker", TEACHER_LOGIN, "save", _save_homework),
+    ("Student Comments", TEACHER_LOGIN, "save", _add_comment),
+    ("Dictation Scores", TEACHER_LOGIN, "score", _score_dictation),
+    ("Essay Marking", TEACHER_LOGIN, None, None),
+    ("Essay Analytics", TEACHER_LOGIN, None, None),
+    ("Essay Analytics", ADMIN_LOGIN, None, None),
+    ("Spelling Tests", TEACHER_LOGIN, "save", _save_spelling),
+    ("Grammar Errors", TEACHER_LOGIN, "save", _record_grammar_error),
+    ("Search", TEACHER_LOGIN, "search", _search),
+    ("My Todo List", TEACHER_LOGIN, "save", _add_todo),
+    ("Admin Panel", ADMIN_LOGIN, None, None),
+    ("🗄️ Database Viewer", ADMIN_LOGIN, None, None),
+]
+
+
+class QueryMonitor:
+    """Connection hook that counts SQL statements and aborts queries that run past the deadline"""
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.count = 0
+        self.deadline = None
+        self.last_statement = None
+
+    def start(self):
+        self.count = 0
+        self.last_statement = None
+        self.deadline = time.perf_counter() + self.timeout
+
+    def __call__(self, conn):
+        conn.set_trace_callback(self._trace)
+        conn.set_progress_handler(self._check_deadline, 100000)
+
+    def _trace(self, statement):
+        statement = statement.lstrip()
+        # Trigger bodies are reported with a "--" prefix (after repeating the firing statement)
+        # and FTS5 reads its shadow tables as 'main'.x - none of these are extra page queries
+        if statement.startswith("--") or "'main'." in statement:
+            return
+        if statement == self.last_statement and statement.upper().startswith(WRITE_PREFIXES):
+            return
+        self.last_statement = statement
+        if not statement.upper().startswith(NON_QUERY_PREFIXES):
+            self.count += 1
+
+    def _check_deadline(self):
+        # A non-zero return interrupts the query, which the page reports as an error
+        return 1 if self.deadline and time.perf_counter() > self.deadline else 0
+
+
+def _check_page(at, page):
+    if at.exception:
+        raise RuntimeError(f"{page}: {at.exception[0].message}")
+    for error in at.error:
+        if str(error.value).startswith("Error loading"):
+            raise RuntimeError(f"{page}: {error.value}")
+
+
+def _timed_run(at, monitor):
+    monitor.start()
+    started = time.perf_counter()
+    at.run()
+    return time.perf_counter() - started, monitor.count
+
+
+def _open_page(page, login, monitor):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=monitor.timeout * 2)
+    monitor.start()
+    at.run()
+    username, password = login
+    _by_label(at.text_input, "Username").input(username)
+    _by_label(at.text_input, "Password").input(password)
+    _by_label(at.button, "Login").click().run()
+    if "user" not in at.session_state:
+        raise RuntimeError(f"Could not log in as {username}")
+    at.run()
+    _by_label(at.sidebar.selectbox, "Choose a page:").set_value(page)
+    monitor.start()
+    at.run()
+    monitor.start()
+    _select_first_class(at).run()
+    _check_page(at, page)
+    return at
+
+
+def _summarise(times, queries):
+    ordered = sorted(times)
+    p95_index = min(len(ordered) - 1, max(0, round(0.95 * len(ordered)) - 1))
+    return {
+        "median_ms": round(statistics.median(ordered) * 1000, 1),
+        "p95_ms": round(ordered[p95_index] * 1000, 1),
+        "queries": int(statistics.median(queries)),
+    }
+
+
+def run_benchmarks(runs, timeout, pages=None):
+    from utils.database import set_connection_hook
+
+    # Deprecation notices are logged on every rerun and would drown the report
+    logging.disable(logging.WARNING)
+
+    monitor = QueryMonitor(timeout)
+    set_connection_hook(monitor)
+    results = {}
+
+    for page, login, action_name, action in SCENARIOS:
+        if pages and page not in pages:
+            continue
+        # Pages benchmarked under more than one login are reported per login
+        name = page if sum(1 for scenario in SCENARIOS if scenario[0] == page) == 1 else f"{page} ({login[0]})"
+        print(f"  ... {name}", flush=True)
+        try:
+            at = _open_page(page, login, monitor)
+
+            times, queries = [], []
+            for _ in range(runs):
+                elapsed, count = _timed_run(at, monitor)
+                times.append(elapsed)
+                queries.append(count)
+            _check_page(at, page)
+            results[f"{name} / render"] = _summarise(times, queries)
+
+            if action:
+                times, queries = [], []
+                for _ in range(runs):
+                    action(at)
+                    elapsed, count = _timed_run(at, monitor)
+                    _check_page(at, page)
+                    times.append(elapsed)
+                    queries.append(count)
+                results[f"{name} / {action_name}"] = _summarise(times, queries)
+        except Exception as e:
+            results[f"{name} / render"] = {"error": str(e)}
+
+    set_connection_hook(None)
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Return a list of regression messages"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if "error" in result:
+            regressions.append(f"{name}: {result['error']}")
+            continue
+        if not expected:
+            continue
+        limit = expected["median_ms"] * (1 + tolerance)
+        if result["median_ms"] > limit:
+            regressions.append(
+                f"{name}: median {result['median_ms']}ms > baseline {expected['median_ms']}ms (+{tolerance:.0%})"
+            )
+        if result["queries"] > expected["queries"]:
+            regressions.append(f"{name}: {result['queries']} queries > baseline {expected['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Class Tracker page headlessly")
+    parser.add_argument("--db", default="database/school_large.db",
+                        help="Generated database to benchmark against (it is copied, never modified)")
+    parser.add_argument("--runs", type=int, default=10, help="Reruns per page and per action")
+    parser.add_argument("--timeout", type=float, default=60,
+                        help="Seconds a rerun may spend in SQL before its queries are aborted")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--output", help="Also write results to this JSON file")
+    parser.add_argument("--page", action="append", dest="pages", help="Only benchmark this page (repeatable)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    print("⏱️ Class Tracker - Page Benchmark")
+    print("=" * 40)
+
+    # Saves write to the database, so benchmark a scratch copy to keep runs repeatable
+    scratch_dir = tempfile.mkdtemp()
+    scratch_db = os.path.join(scratch_dir, "school.db")
+    shutil.copyfile(args.db, scratch_db)
+    # Archived terms live beside the database (see archive_terms.py)
+    archive_dir = os.path.join(os.path.dirname(args.db) or ".", "archives")
+    if os.path.isdir(archive_dir):
+        shutil.copytree(archive_dir, os.path.join(scratch_dir, "archives"))
+    os.environ["CLASS_TRACKER_DB"] = scratch_db
+    # Scheduled snapshots would copy the database in the middle of timed runs
+    os.environ["CLASS_TRACKER_BACKUP_INTERVAL"] = "0"
+
+    # app.py opens pages by relative path, exactly as `streamlit run app.py` does
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+
+    try:
+        results = run_benchmarks(args.runs, args.timeout, args.pages)
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    print(f"{'Scenario':<36} {'median':>10} {'p95':>10} {'queries':>8}")
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<36} ❌ {result['error']}")
+        else:
+            print(f"{name:<36} {result['median_ms']:>8.1f}ms {result['p95_ms']:>8.1f}ms {result['queries']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.update_baseline:
+        passing = {name: result for name, result in results.items() if "error" not in result}
+        with open(args.baseline, "w") as f:
+            json.dump(passing, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("\n⚠️ No baseline found - run with --update-baseline to create one")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Performance regressions:")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+
+    print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
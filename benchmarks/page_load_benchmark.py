@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Page load benchmark - how long the admin dashboards take to gather their figures
+
+Loads the reads behind the Admin Panel's System Overview and the Database Viewer's
+teacher and table counts, once one after another and once through execute_reads,
+which runs them at the same time. Reads are CPU-bound once the database is in the
+page cache, so the gathered run gains most with spare cores or a cold cache.
+
+Usage:
+    python generate_school_data.py --scale 1
+    python benchmarks/page_load_benchmark.py --db database/school_large.db --repeat 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+RECORD_TABLES = ('homework', 'comments', 'essay_marks', 'dictation_scores', 'spelling_tests', 'grammar_errors')
+
+
+def page_reads(tables):
+    """Every read the two dashboards make, as execute_reads takes them"""
+    from utils.database import execute_all_shards
+
+    overview = ["SELECT COUNT(*) FROM users WHERE role = 'teacher' AND is_active = 1"] + [
+        lambda table=table: execute_all_shards(f"SELECT COUNT(*) FROM {table}")
+        for table in ('classes', 'students', 'essay_marks', 'dictation_scores', 'comments')
+    ]
+    teacher_counts = [
+        "SELECT teacher_id, COUNT(*) FROM classes GROUP BY teacher_id",
+        "SELECT teacher_id, COUNT(*) FROM students GROUP BY teacher_id",
+    ] + [
+        f"SELECT s.teacher_id, COUNT(*) FROM {table} r JOIN students s ON r.student_id = s.id GROUP BY s.teacher_id"
+        for table in RECORD_TABLES
+    ]
+    table_counts = [f"SELECT COUNT(*) FROM {table}" for table in tables]
+    return overview + teacher_counts + table_counts
+
+
+def timed(load, reads, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load(reads)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading dashboard figures serially and gathered")
+    parser.add_argument("--db", default="database/school_large.db", help="Generated database to read from")
+    parser.add_argument("--repeat", type=int, default=10, help="Loads per mode")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    os.environ["CLASS_TRACKER_DB"] = args.db
+    from utils.database import execute_read, execute_reads
+
+    print("⏱️ Class Tracker - Page Load Benchmark")
+    print("=" * 40)
+
+    tables = [row[0] for row in execute_read("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+    reads = page_reads(tables)
+    print(f"{len(reads)} reads per load, {os.cpu_count()} CPUs\n")
+
+    def serial(reads):
+        return [read() if callable(read) else execute_read(read) for read in reads]
+
+    print(f"{'Mode':<10} {'median':>9} {'min':>9} {'max':>9}")
+    for name, load in (("serial", serial), ("gathered", execute_reads)):
+        times = timed(load, reads, args.repeat)
+        print(f"{name:<10} {statistics.median(times) * 1000:>7.1f}ms {min(times) * 1000:>7.1f}ms {max(times) * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
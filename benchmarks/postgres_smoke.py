@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL smoke test - every page against a real server, through the SQL translator
+
+Creates the schema in a scratch PostgreSQL database and fills it with the demo data,
+then logs in and drives each page and its save action with Streamlit's AppTest
+harness, using the same scenarios as page_benchmark.py. Any page that raises or
+reports an error fails the run. The database is written to and left as it is, so
+point it at one made for the purpose.
+
+Usage:
+    createdb class_tracker_smoke
+    python benchmarks/postgres_smoke.py --url postgresql://localhost/class_tracker_smoke
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+import page_benchmark
+
+# The demo teacher is the one the demo data belongs to
+DEMO_LOGIN = ("demo", "demo")
+
+# Full-text search is built on SQLite's FTS5, so the page says so and stops on a server
+SQLITE_ONLY_PAGES = ("Search",)
+
+
+def score_dictation_attempts():
+    """The demo data has dictation scores but no word errors, so score two attempts as the page does"""
+    from utils.database import execute_query
+    from utils.dictation_errors import diff_dictation_words, save_dictation_score
+
+    tasks = execute_query("SELECT id, transcript FROM dictation_tasks ORDER BY id LIMIT 1")
+    students = execute_query(
+        "SELECT s.id FROM students s JOIN users u ON s.teacher_id = u.id WHERE u.username = 'demo' ORDER BY s.id LIMIT 2"
+    )
+    for task_id, transcript in tasks:
+        for (student_id,) in students:
+            attempt = " ".join(word for i, word in enumerate(transcript.split()) if i % 5)
+            save_dictation_score(student_id, task_id, attempt, 80.0, "Listen for the small words", "注意听小词",
+                                 diff_dictation_words(transcript, attempt))
+
+
+def page_problems(at):
+    """Exceptions and error messages on a page, as text"""
+    problems = [f"exception: {exception.message}" for exception in at.exception]
+    problems += [str(error.value) for error in at.error if "error" in str(error.value).lower()]
+    return problems
+
+
+def run_pages(timeout):
+    # Deprecation notices are logged on every rerun and would drown the report
+    logging.disable(logging.WARNING)
+    monitor = page_benchmark.QueryMonitor(timeout)
+    results = {}
+    for page, login, action_name, action in page_benchmark.SCENARIOS:
+        if page in SQLITE_ONLY_PAGES:
+            continue
+        login = DEMO_LOGIN if login == page_benchmark.TEACHER_LOGIN else login
+        name = f"{page} ({login[0]})"
+        print(f"  ... {name}", flush=True)
+        try:
+            at = page_benchmark._open_page(page, login, monitor)
+            problems = page_problems(at)
+            if action and not problems:
+                action(at)
+                at.run()
+                problems = [f"{action_name}: {problem}" for problem in page_problems(at)]
+        except Exception as e:
+            problems = [f"{type(e).__name__}: {e}"]
+        results[name] = problems
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open every Class Tracker page against a PostgreSQL server")
+    parser.add_argument("--url", default=os.environ.get("CLASS_TRACKER_DATABASE_URL"),
+                        help="Scratch PostgreSQL database to run against (postgresql://...)")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds a page may take to load")
+    args = parser.parse_args()
+
+    if not args.url:
+        print("❌ Give a scratch database with --url or CLASS_TRACKER_DATABASE_URL")
+        sys.exit(1)
+
+    # The backend is chosen when utils.database is first imported
+    os.environ["CLASS_TRACKER_DATABASE_URL"] = args.url
+    os.environ["CLASS_TRACKER_BACKUP_INTERVAL"] = "0"
+    os.chdir(REPO_ROOT)
+    sys.path.insert(0, REPO_ROOT)
+    from utils.database import BACKEND, DB_PATH, init_database, insert_demo_data
+
+    print("🐘 Class Tracker - PostgreSQL Smoke Test")
+    print("=" * 40)
+    print(BACKEND.describe(DB_PATH))
+
+    init_database()
+    success, message = insert_demo_data()
+    if not success:
+        print(f"❌ {message}")
+        sys.exit(1)
+    score_dictation_attempts()
+    print(f"{message}\n")
+
+    results = run_pages(args.timeout)
+
+    failures = {name: problems for name, problems in results.items() if problems}
+    print()
+    for name, problems in results.items():
+        print(f"{'❌' if problems else '✅'} {name}")
+        for problem in problems:
+            print(f"     {problem}")
+    if failures:
+        print(f"\n❌ {len(failures)} of {len(results)} pages failed")
+        sys.exit(1)
+    print(f"\n✅ All {len(results)} pages loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Read path benchmark - does a heavy analytics load slow down other teachers' saves?
+
+Dashboard processes run the spelling and grammar analytics, and the school-wide scans
+the Database Viewer does, in a loop while one teacher saves homework at a steady rate.
+The report is that teacher's save latency, run three ways on scratch copies of a
+generated database:
+
+    idle       no dashboards - the baseline
+    shared     dashboards read through get_connection on a rollback-journal database,
+               as the analytics pages did before the read path
+    snapshot   dashboards read through get_read_connection on a WAL database
+
+Usage:
+    python generate_school_data.py --scale 1
+    python benchmarks/read_path_benchmark.py --db database/school_large.db --dashboards 4 --duration 20
+"""
+
+import argparse
+import datetime
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# One dashboard view: the two class analytics sections, then whole-table scans
+CLASS_QUERIES = (
+    """
+    SELECT s.name, st.score, st.max_score, st.percentage, st.week_date
+    FROM spelling_tests st
+    JOIN students s ON st.student_id = s.id
+    WHERE s.class_id = ?
+    ORDER BY st.week_date DESC, s.name
+    """,
+    """
+    SELECT s.name, ge.error_type, ge.example, ge.created_at
+    FROM grammar_errors ge
+    JOIN students s ON ge.student_id = s.id
+    WHERE s.class_id = ?
+    ORDER BY ge.created_at DESC
+    """,
+)
+SCHOOL_QUERIES = (
+    "SELECT week_date, AVG(percentage), COUNT(*) FROM spelling_tests GROUP BY week_date",
+    "SELECT error_type, substr(created_at, 1, 7), COUNT(*) FROM grammar_errors GROUP BY 1, 2",
+    "SELECT status, COUNT(*) FROM homework GROUP BY status",
+)
+
+RUNS = {
+    "idle": (None, False),
+    "shared": ("DELETE", False),
+    "snapshot": ("WAL", True),
+}
+
+
+def _dashboard(job):
+    """Load dashboards until stop_at; returns how many views were loaded"""
+    db_path, read_only, class_ids, stop_at, seed, niceness = job
+    from utils.database import get_connection, get_read_connection
+
+    os.nice(niceness)
+    rng = random.Random(seed)
+    views = 0
+    while time.time() < stop_at:
+        conn = get_read_connection(db_path) if read_only else get_connection(db_path)
+        try:
+            class_id = rng.choice(class_ids)
+            for query in CLASS_QUERIES:
+                conn.execute(query, (class_id,)).fetchall()
+            for query in SCHOOL_QUERIES:
+                conn.execute(query).fetchall()
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.close()
+        views += 1
+    return views
+
+
+def _save_latencies(db_path, student_ids, stop_at, interval):
+    """Save one homework record every `interval` seconds until stop_at, as execute_query does"""
+    from utils.database import get_connection
+
+    latencies, errors = [], 0
+    day = str(datetime.date.today())
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        try:
+            conn = get_connection(db_path)
+            try:
+                conn.execute("INSERT INTO homework (student_id, date, status) VALUES (?, ?, 'on_time')",
+                             (random.choice(student_ids), day))
+                conn.commit()
+            finally:
+                conn.close()
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+    return latencies, errors
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def run(source_db, scratch_dir, name, dashboards, duration, interval, niceness):
+    from utils.database import init_database
+
+    journal_mode, read_only = RUNS[name]
+    db_path = os.path.join(scratch_dir, f"{name}.db")
+    shutil.copyfile(source_db, db_path)
+    init_database(db_path)
+    conn = sqlite3.connect(db_path)
+    if journal_mode:
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+    # The saving teacher is the first; the dashboards belong to everyone else
+    teacher_ids = [row[0] for row in conn.execute("SELECT DISTINCT teacher_id FROM classes ORDER BY teacher_id")]
+    student_ids = [row[0] for row in conn.execute("SELECT id FROM students WHERE teacher_id = ?", (teacher_ids[0],))]
+    class_ids = [row[0] for row in conn.execute(
+        "SELECT id FROM classes WHERE teacher_id != ?", (teacher_ids[0],)
+    )] or [row[0] for row in conn.execute("SELECT id FROM classes")]
+    conn.close()
+
+    stop_at = time.time() + duration
+    pool = None
+    if name != "idle":
+        pool = multiprocessing.Pool(dashboards)
+        views = pool.map_async(_dashboard, [(db_path, read_only, class_ids, stop_at, seed, niceness) for seed in range(dashboards)])
+    latencies, errors = _save_latencies(db_path, student_ids, stop_at, interval)
+    loaded = 0
+    if pool:
+        loaded = sum(views.get())
+        pool.close()
+        pool.join()
+    return latencies, errors, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark save latency under analytics load")
+    parser.add_argument("--db", default="database/school_large.db",
+                        help="Generated database to benchmark against (it is copied, never modified)")
+    parser.add_argument("--dashboards", type=int, default=4, help="Dashboard processes loading analytics")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per run")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between homework saves")
+    parser.add_argument("--nice", type=int, default=10,
+                        help="Lower the dashboards' CPU priority by this much, so on a machine with few cores "
+                             "the runs compare waiting on the database rather than sharing the CPU (0 to disable)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found - create it with generate_school_data.py first")
+        sys.exit(1)
+
+    print("📖 Class Tracker - Read Path Benchmark")
+    print("=" * 40)
+    print(f"{args.dashboards} dashboards x {args.duration:.0f}s, a homework save every {args.interval * 1000:.0f}ms\n")
+
+    scratch_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'Run':<10} {'saves':>6} {'p50':>9} {'p95':>9} {'max':>9} {'failed':>7} {'views/s':>8}")
+        for name in RUNS:
+            latencies, errors, views = run(args.db, scratch_dir, name, args.dashboards, args.duration, args.interval, args.nice)
+            print(f"{name:<10} {len(latencies):>6} {_percentile(latencies, 0.5) * 1000:>7.1f}ms "
+                  f"{_percentile(latencies, 0.95) * 1000:>7.1f}ms {max(latencies, default=0) * 1000:>7.1f}ms "
+                  f"{errors:>7} {views / args.duration:>8.1f}")
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - measures how long the login page takes to import
+
+Runs app.py in a fresh interpreter with `python -X importtime`, parses the
+import report and fails if any heavy page-only dependency is imported
+before a teacher has logged in.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--repeat 5] [--top 15]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that only specific pages need - none of these belong on the login path
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "openai", "pydub"]
+
+# Runs app.py exactly as `streamlit run` would before a user logs in
+LOGIN_PATH_SCRIPT = """
+import runpy, sys
+sys.path.insert(0, {repo_root!r})
+runpy.run_path({app_path!r}, run_name="__main__")
+"""
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            fields = line[len("import time:"):].split("|")
+            self_us = int(fields[0].strip())
+            cumulative_us = int(fields[1].strip())
+            raw_name = fields[2]
+        except (IndexError, ValueError):
+            continue
+        depth = (len(raw_name) - len(raw_name.lstrip(" "))) // 2
+        rows.append((raw_name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def run_importtime(code, cwd):
+    """Run a snippet in a fresh interpreter and return its parsed import report"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def measure_login_path(repeat):
+    """Import report for the login path, plus total import time for each run"""
+    code = LOGIN_PATH_SCRIPT.format(
+        repo_root=REPO_ROOT,
+        app_path=os.path.join(REPO_ROOT, "app.py"),
+    )
+    totals = []
+    rows = []
+    # Run in a scratch directory so the benchmark never touches the real school.db
+    with tempfile.TemporaryDirectory() as scratch:
+        for _ in range(repeat):
+            rows = run_importtime(code, scratch)
+            totals.append(sum(cumulative for _, _, cumulative, depth in rows if depth == 0))
+    return rows, totals
+
+
+def measure_heavy_modules():
+    """Cost of each heavy dependency on top of an already-imported streamlit"""
+    costs = {}
+    for module in HEAVY_MODULES:
+        rows = run_importtime(f"import streamlit\nimport {module}", REPO_ROOT)
+        matches = [cumulative for name, _, cumulative, _ in rows if name == module]
+        costs[module] = matches[0] if matches else None
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Class Tracker cold-start import time")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of cold starts to time")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args()
+
+    print("🚀 Class Tracker - Startup Benchmark")
+    print("=" * 40)
+
+    rows, totals = measure_login_path(args.repeat)
+    if not rows:
+        print("❌ No import report produced - is streamlit installed?")
+        sys.exit(1)
+
+    print(f"Login path import time over {args.repeat} runs:")
+    print(f"  median: {statistics.median(totals) / 1000:.1f} ms")
+    print(f"  min:    {min(totals) / 1000:.1f} ms")
+    print(f"  max:    {max(totals) / 1000:.1f} ms")
+
+    print(f"\nSlowest top-level imports (last run):")
+    top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: r[2], reverse=True)
+    for name, _, cumulative, _ in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    print("\nHeavy page dependencies (cost on top of streamlit):")
+    for module, cost in measure_heavy_modules().items():
+        label = f"{cost / 1000:.1f} ms" if cost is not None else "not installed / already loaded"
+        print(f"  {module:<16} {label}")
+
+    imported = {name for name, _, _, _ in rows}
+    leaked = [module for module in HEAVY_MODULES if module in imported]
+    if leaked:
+        print(f"\n❌ Heavy modules imported before login: {', '.join(leaked)}")
+        sys.exit(1)
+
+    print("\n✅ Login path is free of heavy page dependencies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Script to turn zlib compression of the long-text columns on (or off) for a database
+
+Essay text, essay/dictation feedback and dictation attempts are stored as compressed
+BLOBs and only inflated when a page displays them. Search keeps working through the
+{table}_plain views.
+
+Examples:
+    python compress_text_columns.py
+    python compress_text_columns.py --db database/school_large.db
+    python compress_text_columns.py --decompress
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+from utils.database import DB_PATH, init_database, on_database_server, set_text_compression, text_compression_enabled
+from utils.text_compression import COMPRESSED_TEXT_COLUMNS, register_text_functions
+
+
+def column_bytes(conn):
+    """Stored bytes per compressed column, as {table.column: bytes}"""
+    sizes = {}
+    for table, columns in COMPRESSED_TEXT_COLUMNS.items():
+        totals = conn.execute(
+            f"SELECT {', '.join(f'COALESCE(SUM(LENGTH(CAST({col} AS BLOB))), 0)' for col in columns)} FROM {table}"
+        ).fetchone()
+        sizes.update({f"{table}.{col}": total for col, total in zip(columns, totals)})
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress Class Tracker long-text columns")
+    parser.add_argument("--db", default=DB_PATH, help="Database to convert")
+    parser.add_argument("--decompress", action="store_true", help="Store the columns as plain text again")
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip the VACUUM that shrinks the file afterwards")
+    args = parser.parse_args()
+
+    print("🗜️ Class Tracker - Text Compression")
+    print("=" * 40)
+
+    if on_database_server(args.db):
+        print("❌ Text compression is for SQLite databases - PostgreSQL compresses long text itself (TOAST)")
+        return
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found")
+        return
+
+    # Bring older databases up to the current schema first
+    init_database(args.db)
+
+    conn = sqlite3.connect(args.db)
+    register_text_functions(conn)
+    enabled = not args.decompress
+    if text_compression_enabled(conn.cursor()) == enabled:
+        print(f"Text compression is already {'on' if enabled else 'off'} for {args.db}")
+        conn.close()
+        return
+
+    file_before = os.path.getsize(args.db)
+    columns_before = column_bytes(conn)
+
+    started = time.perf_counter()
+    set_text_compression(conn, enabled)
+    conn.commit()
+    converted = time.perf_counter() - started
+    if not args.no_vacuum:
+        conn.execute("VACUUM")
+
+    columns_after = column_bytes(conn)
+    conn.close()
+    file_after = os.path.getsize(args.db)
+
+    for name, before in columns_before.items():
+        after = columns_after[name]
+        print(f"  {name:<32} {before / 1024 / 1024:8.1f} MB -> {after / 1024 / 1024:8.1f} MB")
+    print(f"\n✅ Text compression {'on' if enabled else 'off'} in {converted:.1f}s")
+    print(f"   Database: {file_before / 1024 / 1024:.1f} MB -> {file_after / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,8 @@ Run this once to set up your preferred admin login
 """
 
 import hashlib
-import sqlite3
-import os
+
+from utils.database import BACKEND, get_connection, init_database
 
 def hash_password(password):
     """Hash password using SHA256"""
@@ -35,26 +35,13 @@ def create_admin_user():
     # Hash the password
     password_hash = hash_password(password)
     
-    # Create database directory if it doesn't exist
-    os.makedirs("database", exist_ok=True)
+    # Create the database (SQLite file or PostgreSQL schema) if it doesn't exist
+    init_database()
     
     # Connect to database
-    conn = sqlite3.connect("database/school.db")
+    conn = get_connection()
     cursor = conn.cursor()
     
-    # Create users table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            full_name TEXT NOT NULL,
-            role TEXT CHECK(role IN ('teacher', 'admin')) DEFAULT 'teacher',
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
     try:
         # Try to update existing admin user
         cursor.execute('''
@@ -79,7 +66,7 @@ def create_admin_user():
         print(f"   Password: {password}")
         print(f"   Full Name: {full_name}")
         
-    except sqlite3.IntegrityError:
+    except BACKEND.IntegrityError:
         print(f"❌ Username '{username}' already exists!")
     except Exception as e:
         print(f"❌ Error: {str(e)}")
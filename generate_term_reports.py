@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Script to generate end-of-term reports for a whole school (or one teacher) as a zip
+
+Examples:
+    python generate_term_reports.py --start 2026-02-01 --end 2026-06-30
+    python generate_term_reports.py --db database/school_large.db --teacher teacher_0001 --workers 4 --pdf
+
+With per-teacher shards on (CLASS_TRACKER_SHARD_DIR), --db is the central database and
+every teacher's shard is reported on.
+"""
+
+import argparse
+import datetime
+import io
+import os
+import time
+import zipfile
+
+from utils.database import DB_PATH, SHARD_DIR, get_connection, init_database, on_database_server, shard_paths
+from utils.reports import generate_term_reports, pdf_available
+
+
+def main():
+    today = datetime.date.today()
+    parser = argparse.ArgumentParser(description="Generate Class Tracker term reports")
+    parser.add_argument("--db", default=DB_PATH, help="Database to report on")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=today - datetime.timedelta(days=120),
+                        help="First day of term (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=today, help="Last day of term (YYYY-MM-DD)")
+    parser.add_argument("--teacher", help="Only this teacher's students (username)")
+    parser.add_argument("--out", help="Zip file to write (default term_reports_<start>_<end>.zip)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Reports per worker task")
+    parser.add_argument("--pdf", action="store_true", help="Also render PDFs (needs weasyprint)")
+    args = parser.parse_args()
+
+    print("📄 Class Tracker - Term Reports")
+    print("=" * 40)
+
+    if not on_database_server(args.db) and not os.path.exists(args.db):
+        print(f"❌ {args.db} not found")
+        return
+    if args.pdf and not pdf_available():
+        print("❌ --pdf needs the weasyprint package")
+        return
+    # Brings a database made by an older version up to date (reports look for archived terms)
+    init_database(args.db)
+
+    # With per-teacher shards on, the students are in their teachers' files rather than the central one
+    db_paths = shard_paths() if SHARD_DIR else [args.db]
+    students_by_db = {}
+    for db_path in db_paths:
+        if db_path != args.db:
+            init_database(db_path, shard=True)
+        conn = get_connection(db_path)
+        try:
+            if args.teacher:
+                rows = conn.execute("""
+                    SELECT s.id FROM students s JOIN users u ON s.teacher_id = u.id
+                    WHERE u.username = ? ORDER BY s.id
+                """, (args.teacher,)).fetchall()
+            else:
+                rows = conn.execute("SELECT id FROM students ORDER BY id").fetchall()
+        finally:
+            conn.close()
+        if rows:
+            students_by_db[db_path] = [row[0] for row in rows]
+    student_count = sum(len(student_ids) for student_ids in students_by_db.values())
+    if not student_count:
+        print("❌ No students found")
+        return
+
+    formats = ("html", "pdf") if args.pdf else ("html",)
+    print(f"{student_count} students, term {args.start} to {args.end}, formats {', '.join(formats)}")
+    if SHARD_DIR:
+        print(f"   from {len(students_by_db)} teacher shards in {SHARD_DIR}")
+
+    def report_progress(done, total):
+        print(f"\r  Rendered {done}/{total} reports", end="", flush=True)
+
+    out = args.out or f"term_reports_{args.start}_{args.end}.zip"
+    started = time.perf_counter()
+    timings = []
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        # One batch per database; report file names carry the student id, so they never clash
+        for db_path, student_ids in students_by_db.items():
+            zip_data, db_timings = generate_term_reports(
+                student_ids, args.start, args.end, formats=formats, db_path=db_path,
+                workers=args.workers, chunk_size=args.chunk_size,
+                progress=lambda done, total, before=len(timings): report_progress(before + done, student_count),
+            )
+            with zipfile.ZipFile(io.BytesIO(zip_data)) as batch:
+                for name in batch.namelist():
+                    archive.writestr(name, batch.read(name))
+            timings += db_timings
+    elapsed = time.perf_counter() - started
+
+    seconds = sorted(duration for _, duration in timings)
+    print(f"\n\n✅ {len(timings)} reports in {elapsed:.1f}s ({len(timings) / elapsed:.0f} reports/s)")
+    print(f"   Per report: median {seconds[len(seconds) // 2] * 1000:.1f}ms, slowest {seconds[-1] * 1000:.1f}ms")
+    print(f"   Zip: {out} ({os.path.getsize(out) / 1024 / 1024:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
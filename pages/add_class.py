@@ -4,11 +4,11 @@ import os
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import execute_query, get_teacher_classes, get_class_students
     from utils.auth import get_current_user
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import execute_query, get_teacher_classes, get_class_students
     from utils.auth import get_current_user
 
 st.header("Manage Classes")
@@ -34,9 +34,8 @@ with st.form("new_class"):
 st.subheader("Add Students to Class")
 
 # Get existing classes for this teacher
-classes = execute_query("SELECT name FROM classes WHERE teacher_id = ? ORDER BY name", (teacher_id,))
-if classes:
-    class_options = [cls[0] for cls in classes]
+class_options = get_teacher_classes(teacher_id)
+if class_options:
     
     with st.form("add_students"):
         selected_class = st.selectbox("Select Class", class_options)
@@ -53,8 +52,8 @@ if classes:
             for name in names:
                 try:
                     execute_query(
-                        "INSERT INTO students (name, class_name, teacher_id) VALUES (?, ?, ?)",
-                        (name, selected_class, teacher_id)
+                        "INSERT INTO students (name, class_name, class_id, teacher_id) VALUES (?, ?, ?, ?)",
+                        (name, selected_class, class_options[selected_class], teacher_id)
                     )
                     added_count += 1
                 except Exception as e:
@@ -68,19 +67,15 @@ else:
 # Display existing classes and students
 st.subheader("Current Classes and Students")
 
-classes = execute_query("SELECT name FROM classes WHERE teacher_id = ? ORDER BY name", (teacher_id,))
-if classes:
-    for class_row in classes:
-        class_name = class_row[0]
-        students = execute_query(
-            "SELECT name FROM students WHERE class_name = ? AND teacher_id = ? ORDER BY name", 
-            (class_name, teacher_id)
-        )
+class_options = get_teacher_classes(teacher_id)
+if class_options:
+    for class_name, class_id in class_options.items():
+        students = get_class_students(class_id)
         
         with st.expander(f"📚 {class_name} ({len(students)} students)"):
             if students:
                 for i, student in enumerate(students, 1):
-                    st.write(f"{i}. {student[0]}")
+                    st.write(f"{i}. {student[1]}")
             else:
                 st.write("No students in this class yet.")
 else:
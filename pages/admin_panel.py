@@ -6,12 +6,24 @@ from datetime import datetime
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import (
+        execute_query, execute_all_shards, execute_reads, get_connection, shard_paths, BACKEND, CENTRAL_TABLES, DB_PATH, JOURNALED_TABLES, SHARD_DIR
+    )
     from utils.auth import is_james, create_user, hash_password
+    from utils.audio_store import release_audio
+    from utils.backups import backup_dir_for, list_snapshots, restore_snapshot, take_snapshot
+    from utils.change_journal import journal_entries, restore_to, undo_change
+    from utils.term_archive import archivable_terms, archive_term, list_archives, term_label
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import (
+        execute_query, execute_all_shards, execute_reads, get_connection, shard_paths, BACKEND, CENTRAL_TABLES, DB_PATH, JOURNALED_TABLES, SHARD_DIR
+    )
     from utils.auth import is_james, create_user, hash_password
+    from utils.audio_store import release_audio
+    from utils.backups import backup_dir_for, list_snapshots, restore_snapshot, take_snapshot
+    from utils.change_journal import journal_entries, restore_to, undo_change
+    from utils.term_archive import archivable_terms, archive_term, list_archives, term_label
 
 # SECURITY: Only James can access admin panel
 if not is_james():
@@ -74,15 +86,23 @@ with tab1:
 with tab2:
     st.subheader("📊 System Overview")
     
-    # System stats
-    stats = {
-        "Total Teachers": execute_query("SELECT COUNT(*) FROM users WHERE role = 'teacher' AND is_active = 1")[0][0],
-        "Total Classes": execute_query("SELECT COUNT(*) FROM classes")[0][0],
-        "Total Students": execute_query("SELECT COUNT(*) FROM students")[0][0],
-        "Total Essay Marks": execute_query("SELECT COUNT(*) FROM essay_marks")[0][0],
-        "Total Dictation Scores": execute_query("SELECT COUNT(*) FROM dictation_scores")[0][0],
-        "Total Comments": execute_query("SELECT COUNT(*) FROM comments")[0][0]
+    # System stats - classroom tables are counted on every teacher's shard at once
+    def count_all(table):
+        return sum(row[0] for row in execute_all_shards(f"SELECT COUNT(*) FROM {table}"))
+    
+    counted_tables = {
+        "Total Classes": "classes",
+        "Total Students": "students",
+        "Total Essay Marks": "essay_marks",
+        "Total Dictation Scores": "dictation_scores",
+        "Total Comments": "comments"
     }
+    # The counts don't depend on each other, so they all run at once
+    teacher_count, *table_counts = execute_reads([
+        "SELECT COUNT(*) FROM users WHERE role = 'teacher' AND is_active = 1",
+        *(lambda table=table: count_all(table) for table in counted_tables.values())
+    ])
+    stats = {"Total Teachers": teacher_count[0][0], **dict(zip(counted_tables, table_counts))}
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -98,22 +118,28 @@ with tab2:
     # Teacher activity
     st.write("**Teacher Activity Summary**")
     try:
-        teacher_activity = execute_query("""
-            SELECT 
-                u.full_name,
-                COALESCE(COUNT(DISTINCT c.id), 0) as classes,
-                COALESCE(COUNT(DISTINCT s.id), 0) as students,
-                COALESCE(COUNT(DISTINCT em.id), 0) as essays,
-                COALESCE(COUNT(DISTINCT ds.id), 0) as dictations
-            FROM users u
-            LEFT JOIN classes c ON u.id = COALESCE(c.teacher_id, 1)
-            LEFT JOIN students s ON u.id = COALESCE(s.teacher_id, 1)
-            LEFT JOIN essay_marks em ON s.id = em.student_id
-            LEFT JOIN dictation_scores ds ON s.id = ds.student_id
-            WHERE u.role = 'teacher' AND u.is_active = 1
-            GROUP BY u.id, u.full_name
-            ORDER BY u.full_name
-        """)
+        teachers, shard_activity = execute_reads([
+            """
+            SELECT id, full_name FROM users
+            WHERE role = 'teacher' AND is_active = 1
+            ORDER BY full_name
+            """,
+            lambda: execute_all_shards("""
+                SELECT teacher_id, SUM(classes), SUM(students), SUM(essays), SUM(dictations) FROM (
+                    SELECT COALESCE(teacher_id, 1) AS teacher_id, 1 AS classes, 0 AS students, 0 AS essays, 0 AS dictations FROM classes
+                    UNION ALL SELECT COALESCE(teacher_id, 1), 0, 1, 0, 0 FROM students
+                    UNION ALL SELECT COALESCE(s.teacher_id, 1), 0, 0, 1, 0 FROM essay_marks em JOIN students s ON em.student_id = s.id
+                    UNION ALL SELECT COALESCE(s.teacher_id, 1), 0, 0, 0, 1 FROM dictation_scores ds JOIN students s ON ds.student_id = s.id
+                )
+                GROUP BY teacher_id
+            """)
+        ])
+        # Each shard counts per teacher; the counts are added up here
+        activity = {teacher_id: [0, 0, 0, 0] for teacher_id, _ in teachers}
+        for teacher_id, classes, students, essays, dictations in shard_activity:
+            if teacher_id in activity:
+                activity[teacher_id] = [a + b for a, b in zip(activity[teacher_id], (classes, students, essays, dictations))]
+        teacher_activity = [(full_name, *activity[teacher_id]) for teacher_id, full_name in teachers]
     except Exception as e:
         st.error(f"Error loading teacher activity: {str(e)}")
         teacher_activity = []
@@ -137,45 +163,42 @@ with tab3:
     
     if st.button("📋 Generate Export"):
         if export_type == "All Students":
-            data = execute_query("""
-                SELECT s.name, s.class_name, u.full_name as teacher
+            data = execute_all_shards("""
+                SELECT s.name, c.name, u.full_name as teacher
                 FROM students s
                 JOIN users u ON s.teacher_id = u.id
-                ORDER BY u.full_name, s.class_name, s.name
+                LEFT JOIN classes c ON s.class_id = c.id
             """)
-            df = pd.DataFrame(data, columns=['Student', 'Class', 'Teacher'])
+            df = pd.DataFrame(data, columns=['Student', 'Class', 'Teacher']).sort_values(['Teacher', 'Class', 'Student'])
             
         elif export_type == "All Essay Marks":
-            data = execute_query("""
+            data = execute_all_shards("""
                 SELECT s.name, em.essay_title, em.essay_type, em.score, 
                        em.created_at, u.full_name as teacher
                 FROM essay_marks em
                 JOIN students s ON em.student_id = s.id
                 JOIN users u ON s.teacher_id = u.id
-                ORDER BY em.created_at DESC
             """)
-            df = pd.DataFrame(data, columns=['Student', 'Essay Title', 'Type', 'Score', 'Date', 'Teacher'])
+            df = pd.DataFrame(data, columns=['Student', 'Essay Title', 'Type', 'Score', 'Date', 'Teacher']).sort_values('Date', ascending=False)
             
         elif export_type == "All Dictation Scores":
-            data = execute_query("""
+            data = execute_all_shards("""
                 SELECT s.name, dt.name as task, ds.score, ds.created_at, u.full_name as teacher
                 FROM dictation_scores ds
                 JOIN students s ON ds.student_id = s.id
                 JOIN dictation_tasks dt ON ds.task_id = dt.id
                 JOIN users u ON s.teacher_id = u.id
-                ORDER BY ds.created_at DESC
             """)
-            df = pd.DataFrame(data, columns=['Student', 'Task', 'Score', 'Date', 'Teacher'])
+            df = pd.DataFrame(data, columns=['Student', 'Task', 'Score', 'Date', 'Teacher']).sort_values('Date', ascending=False)
             
         elif export_type == "All Comments":
-            data = execute_query("""
+            data = execute_all_shards("""
                 SELECT s.name, c.category, c.comment, c.created_at, u.full_name as teacher
                 FROM comments c
                 JOIN students s ON c.student_id = s.id
                 JOIN users u ON s.teacher_id = u.id
-                ORDER BY c.created_at DESC
             """)
-            df = pd.DataFrame(data, columns=['Student', 'Category', 'Comment', 'Date', 'Teacher'])
+            df = pd.DataFrame(data, columns=['Student', 'Category', 'Comment', 'Date', 'Teacher']).sort_values('Date', ascending=False)
             
         elif export_type == "Teacher Summary":
             df = activity_df if 'activity_df' in locals() else pd.DataFrame()
@@ -234,17 +257,146 @@ with tab4:
     except Exception as e:
         st.error(f"❌ Database error: {str(e)}")
     
+    # Snapshots, the change journal and term archives work on SQLite files; a database
+    # server has its own backup and point-in-time recovery
+    if BACKEND.file_based:
+        st.write("**💾 Backups**")
+        st.caption("Snapshots are taken automatically in the background and only store what changed since the last one.")
+        if st.button("💾 Back Up Now"):
+            with st.spinner("Taking snapshot..."):
+                manifest = take_snapshot("manual")
+            st.success(f"✅ Snapshot taken in {manifest['seconds']:.1f}s ({manifest['new_bytes'] / 1024:,.0f} KB of new data)")
+    
+        snapshots = list_snapshots()
+        if snapshots:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Taken": snapshot["created_at"].replace("T", " "),
+                    "Reason": snapshot["reason"],
+                    "Database Size (MB)": round(snapshot["size"] / 1024 / 1024, 1),
+                    "New Data (KB)": round(snapshot["new_bytes"] / 1024),
+                }
+                for snapshot in snapshots
+            ]), use_container_width=True, hide_index=True)
+        
+            with st.expander("⏪ Restore a Snapshot"):
+                labels = {f"{snapshot['created_at'].replace('T', ' ')} ({snapshot['reason']})": snapshot["id"] for snapshot in snapshots}
+                chosen = st.selectbox("Snapshot to restore:", list(labels))
+                st.warning("Everything written since this snapshot will be replaced. The current data is snapshotted first.")
+                if st.text_input("Type 'RESTORE' to confirm") == "RESTORE":
+                    if st.button("⏪ Restore Snapshot"):
+                        with st.spinner("Restoring..."):
+                            restore_snapshot(labels[chosen])
+                        st.success("✅ Database restored")
+                        st.rerun()
+        else:
+            st.info("No snapshots yet")
+    
+        # Both read and write one database file; with per-teacher shards every teacher's
+        # records are in their own file, so here they would only reach the admin's own
+        if SHARD_DIR:
+            st.info("🧩 Change history and term archives are off while per-teacher shards are on - "
+                    "restore a snapshot to go back in time")
+        else:
+            st.write("**🕘 Change History**")
+            st.caption("Every change to classes, students and their records is journaled and can be undone. Times are UTC.")
+            col1, col2 = st.columns(2)
+            with col1:
+                history_table = st.selectbox("Table:", ["All tables"] + list(JOURNALED_TABLES))
+            with col2:
+                history_student = st.number_input("Student ID (0 for all students):", min_value=0, step=1)
+            history_table = None if history_table == "All tables" else history_table
+            history_student = int(history_student) or None
+    
+            entries = journal_entries(history_table, history_student)
+            if entries:
+                st.dataframe(pd.DataFrame(
+                    entries,
+                    columns=['Entry', 'When (UTC)', 'Table', 'Row', 'Change', 'Student']
+                ), use_container_width=True, hide_index=True)
+        
+                col1, col2 = st.columns(2)
+                with col1:
+                    entry_id = st.selectbox(
+                        "Change to undo:",
+                        options=[entry[0] for entry in entries],
+                        format_func=lambda i: next(f"#{e[0]} {e[4]} {e[2]} row {e[3]} ({e[1]})" for e in entries if e[0] == i)
+                    )
+                    if st.button("↩️ Undo Change"):
+                        try:
+                            undo_change(entry_id)
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
+                        else:
+                            st.success("✅ Change undone")
+                            st.rerun()
+                with col2:
+                    restore_date = st.date_input("Restore to date (UTC):")
+                    restore_time = st.time_input("Time (UTC):")
+                    scope = history_table or "all journaled tables"
+                    if history_student:
+                        scope += f" for student {history_student}"
+                    if st.checkbox(f"Undo every change to {scope} after this time"):
+                        if st.button("⏪ Restore to This Time"):
+                            try:
+                                undone = restore_to(f"{restore_date} {restore_time}", history_table, history_student)
+                            except ValueError as e:
+                                st.error(f"❌ Nothing was restored: {e}")
+                            else:
+                                st.success(f"✅ Undid {undone} changes")
+            else:
+                st.info("No changes recorded yet")
+    
+            st.write("**🗄️ Term Archives**")
+            st.caption("Closed terms' homework, spelling and grammar records move to read-only archive files. Term reports and history still include them.")
+            conn = get_connection()
+            try:
+                archives = list_archives(conn)
+            finally:
+                conn.close()
+            if archives:
+                st.dataframe(pd.DataFrame(
+                    [archive[1:] for archive in archives],
+                    columns=['Term', 'From', 'To', 'File', 'Rows', 'Archived']
+                ), use_container_width=True, hide_index=True)
+            else:
+                st.info("No terms archived yet")
+            if st.button("🗄️ Archive Closed Terms"):
+                # Finding closed terms scans the archived tables, so only do it when asked
+                conn = get_connection()
+                try:
+                    closed_terms = archivable_terms(conn)
+                finally:
+                    conn.close()
+                if not closed_terms:
+                    st.info("Every closed term is already archived")
+                with st.spinner("Archiving..."):
+                    for start_year, term in closed_terms:
+                        moved = archive_term(start_year, term)
+                        st.success(f"✅ {term_label(start_year, term)}: {sum(moved.values()):,} records archived")
+    else:
+        st.info(f"💾 Backups, change history and term archives are handled by the database server ({BACKEND.describe(DB_PATH)})")
+    
     # Danger zone
     st.write("**⚠️ Danger Zone**")
     with st.expander("🗑️ Reset System Data"):
         st.warning("This will delete ALL data except user accounts!")
         if st.text_input("Type 'DELETE ALL DATA' to confirm") == "DELETE ALL DATA":
             if st.button("🗑️ Reset All Data"):
+                # Deleted data can be brought back from the Backups section
+                if BACKEND.file_based:
+                    for path in [DB_PATH] + [path for path in shard_paths() if path != DB_PATH]:
+                        take_snapshot("before reset", path, backup_dir_for(path))
                 tables_to_clear = [
                     "homework", "comments", "dictation_tasks", "dictation_scores",
                     "spelling_tests", "grammar_errors", "essay_marks", "students", "classes"
                 ]
+                # Deleting the tasks drops their references; the recordings are released afterwards
+                task_audio = execute_query("SELECT DISTINCT audio_hash FROM dictation_tasks WHERE audio_hash IS NOT NULL")
                 for table in tables_to_clear:
-                    execute_query(f"DELETE FROM {table}")
+                    # Shared tables live only in the central database; the rest on every teacher's shard
+                    (execute_query if table in CENTRAL_TABLES else execute_all_shards)(f"DELETE FROM {table}")
+                for audio_hash, in task_audio:
+                    release_audio(audio_hash)
                 st.success("✅ All data cleared (users preserved)")
                 st.rerun()
\ No newline at end of file
@@ -1,32 +1,34 @@
 import streamlit as st
 import sys
 import os
-import pandas as pd
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import execute_query, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.reports import generate_term_reports, pdf_available
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import execute_query, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.reports import generate_term_reports, pdf_available
 
 st.header("Student Comments")
 
-# Get existing classes
-classes = execute_query("SELECT name FROM classes ORDER BY name")
-if not classes:
+# Get this teacher's classes
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+if not class_options:
     st.warning("Please create classes and add students first.")
     st.stop()
 
-class_options = [cls[0] for cls in classes]
 selected_class = st.selectbox("Select Class", class_options)
 
 # Get students in selected class
-students = execute_query(
-    "SELECT id, name FROM students WHERE class_name = ? ORDER BY name", 
-    (selected_class,)
-)
+class_id = class_options[selected_class]
+students = get_class_students(class_id)
 
 if not students:
     st.warning(f"No students found in {selected_class}. Please add students first.")
@@ -73,13 +75,13 @@ query = """
     SELECT s.name, c.category, c.comment, c.evidence, c.created_at
     FROM comments c
     JOIN students s ON c.student_id = s.id
-    WHERE s.class_name = ?
+    WHERE s.class_id = ?
 """
-params = [selected_class]
+params = [class_id]
 
 if filter_student != "All Students":
-    query += " AND s.name = ?"
-    params.append(filter_student)
+    query += " AND s.id = ?"
+    params.append(student_options[filter_student])
 
 if filter_category != "All Categories":
     query += " AND c.category = ?"
@@ -143,4 +145,68 @@ if st.button("Generate Report"):
                         st.write(f"   *Evidence: {comment_data['evidence']}*")
                 st.write("")
     else:
-        st.info(f"No comments found for {report_student}")
\ No newline at end of file
+        st.info(f"No comments found for {report_student}")
+
+# Term reports for a whole class or every class at once
+st.subheader("Generate Term Reports")
+st.write("Builds a full report for every student - comments, homework, spelling, grammar, essays and dictation - and packages them as a zip.")
+
+report_scope = st.radio("Students", [f"{selected_class} only", "All my classes"], horizontal=True)
+col1, col2 = st.columns(2)
+with col1:
+    term_start = st.date_input("Term Start", datetime.now().date() - timedelta(days=120), key="term_start")
+with col2:
+    term_end = st.date_input("Term End", datetime.now().date(), key="term_end")
+
+report_formats = ["html"]
+if pdf_available():
+    if st.checkbox("Also create PDFs", key="term_report_pdf"):
+        report_formats.append("pdf")
+else:
+    st.caption("Install weasyprint to also create PDF reports.")
+
+if st.button("Generate Term Reports", type="primary"):
+    if report_scope == "All my classes":
+        report_students = execute_query("SELECT id FROM students WHERE teacher_id = ? ORDER BY id", (teacher_id,))
+        report_student_ids = [row[0] for row in report_students]
+    else:
+        report_student_ids = [student_id for student_id, _ in students]
+    
+    progress_bar = st.progress(0.0, text="Starting report workers...")
+    
+    def show_progress(done, total):
+        progress_bar.progress(done / total, text=f"Rendered {done} of {total} reports")
+    
+    started = time.perf_counter()
+    try:
+        zip_data, timings = generate_term_reports(
+            report_student_ids, term_start, term_end, formats=report_formats, progress=show_progress
+        )
+        st.session_state.term_reports = {
+            'zip': zip_data,
+            'timings': timings,
+            'elapsed': time.perf_counter() - started,
+            'file_name': f"term_reports_{term_start}_{term_end}.zip",
+        }
+    except Exception as e:
+        st.error(f"Error generating term reports: {str(e)}")
+
+if 'term_reports' in st.session_state:
+    job = st.session_state.term_reports
+    timings = job['timings']
+    if timings:
+        seconds = [duration for _, duration in timings]
+        st.success(f"Generated {len(timings)} reports in {job['elapsed']:.1f}s")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Reports", len(timings))
+        with col2:
+            st.metric("Average per Report", f"{sum(seconds) / len(seconds) * 1000:.0f} ms")
+        with col3:
+            st.metric("Slowest Report", f"{max(seconds) * 1000:.0f} ms")
+        with st.expander("Per-report timing"):
+            for file_name, duration in sorted(timings, key=lambda timing: -timing[1]):
+                st.write(f"{file_name}: {duration * 1000:.0f} ms")
+        st.download_button("📥 Download Reports (zip)", job['zip'], file_name=job['file_name'], mime="application/zip")
+    else:
+        st.info("No students to report on.")
@@ -2,15 +2,16 @@ import streamlit as st
 import sys
 import os
 import pandas as pd
-import sqlite3
 
 # Import from parent directory
 try:
-    from utils.database import execute_query, get_connection
+    from utils.database import execute_all_shards, execute_read, execute_reads, get_connection, BACKEND, CENTRAL_TABLES, DB_PATH
+    from utils.text_compression import COMPRESSED_TEXT_COLUMNS, decompress_text
     from utils.auth import is_james
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query, get_connection
+    from utils.database import execute_all_shards, execute_read, execute_reads, get_connection, BACKEND, CENTRAL_TABLES, DB_PATH
+    from utils.text_compression import COMPRESSED_TEXT_COLUMNS, decompress_text
     from utils.auth import is_james
 
 # SECURITY: Only James can access this page
@@ -39,11 +40,11 @@ with tab1:
     CLASSES (Teacher's Classes)
     ├── id (Primary Key)
     ├── name, teacher_id (→ users.id)
-    └── Links to: students.class_name
+    └── Links to: students.class_id
     
     STUDENTS (Individual Students)
     ├── id (Primary Key) 
-    ├── name, class_name, teacher_id (→ users.id)
+    ├── name, class_id (→ classes.id), teacher_id (→ users.id)
     └── Links to: homework.student_id, comments.student_id, 
                   essay_marks.student_id, dictation_scores.student_id,
                   spelling_tests.student_id, grammar_errors.student_id
@@ -64,6 +65,7 @@ with tab1:
     relationships = [
         ("classes", "teacher_id", "users", "id", "Each class belongs to one teacher"),
         ("students", "teacher_id", "users", "id", "Each student belongs to one teacher"),
+        ("students", "class_id", "classes", "id", "Each student is in one class"),
         ("homework", "student_id", "students", "id", "Each homework entry for one student"),
         ("comments", "student_id", "students", "id", "Each comment about one student"),
         ("essay_marks", "student_id", "students", "id", "Each essay score for one student"),
@@ -85,7 +87,7 @@ with tab1:
     
     1. **Teacher logs in** → `users` table (james, id=8)
     2. **Creates a class** → `classes` table (name="Year 4A", teacher_id=8)
-    3. **Adds students** → `students` table (name="Alice", class_name="Year 4A", teacher_id=8)
+    3. **Adds students** → `students` table (name="Alice", class_id=Year 4A's ID, teacher_id=8)
     4. **Records homework** → `homework` table (student_id=Alice's ID, status="on_time")
     5. **Writes comments** → `comments` table (student_id=Alice's ID, comment="Great work!")
     6. **Marks essays** → `essay_marks` table (student_id=Alice's ID, score=85)
@@ -97,32 +99,37 @@ with tab1:
     st.write("### 📊 Current Data Distribution")
     
     try:
-        # Get teacher data counts
-        teacher_stats = execute_query("""
-            SELECT 
-                u.username,
-                u.full_name,
-                COUNT(DISTINCT c.id) as classes,
-                COUNT(DISTINCT s.id) as students,
-                COUNT(DISTINCT h.id) as homework_entries,
-                COUNT(DISTINCT cm.id) as comments,
-                COUNT(DISTINCT em.id) as essays,
-                COUNT(DISTINCT ds.id) as dictations,
-                COUNT(DISTINCT st.id) as spelling_tests,
-                COUNT(DISTINCT ge.id) as grammar_errors
-            FROM users u
-            LEFT JOIN classes c ON u.id = c.teacher_id
-            LEFT JOIN students s ON u.id = s.teacher_id
-            LEFT JOIN homework h ON s.id = h.student_id
-            LEFT JOIN comments cm ON s.id = cm.student_id
-            LEFT JOIN essay_marks em ON s.id = em.student_id
-            LEFT JOIN dictation_scores ds ON s.id = ds.student_id
-            LEFT JOIN spelling_tests st ON s.id = st.student_id
-            LEFT JOIN grammar_errors ge ON s.id = ge.student_id
-            WHERE u.role IN ('teacher', 'admin')
-            GROUP BY u.id, u.username, u.full_name
-            ORDER BY u.username
-        """)
+        # Get teacher data counts - one grouped count per table, all run at once. Joining
+        # every table onto users instead multiplies each teacher's rows table by table.
+        counted = {
+            'classes': "SELECT teacher_id, COUNT(*) FROM classes GROUP BY teacher_id",
+            'students': "SELECT teacher_id, COUNT(*) FROM students GROUP BY teacher_id",
+        }
+        for table in ('homework', 'comments', 'essay_marks', 'dictation_scores', 'spelling_tests', 'grammar_errors'):
+            counted[table] = f"""
+                SELECT s.teacher_id, COUNT(*) FROM {table} r
+                JOIN students s ON r.student_id = s.id
+                GROUP BY s.teacher_id
+            """
+        def count_by_teacher(query):
+            # With per-teacher shards on, each teacher's rows are in their own file - add up every shard's counts
+            counts = {}
+            for teacher_id, count in execute_all_shards(query):
+                counts[teacher_id] = counts.get(teacher_id, 0) + count
+            return counts
+        
+        teachers, *counts_by_teacher = execute_reads([
+            """
+            SELECT id, username, full_name FROM users
+            WHERE role IN ('teacher', 'admin')
+            ORDER BY username
+            """,
+            *(lambda query=query: count_by_teacher(query) for query in counted.values())
+        ])
+        teacher_stats = [
+            (username, full_name, *(counts.get(teacher_id, 0) for counts in counts_by_teacher))
+            for teacher_id, username, full_name in teachers
+        ]
         
         if teacher_stats:
             stats_df = pd.DataFrame(teacher_stats, columns=[
@@ -146,7 +153,7 @@ with tab2:
     
     # Get all tables
     try:
-        tables = execute_query("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+        tables = execute_read("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
         
         if tables and len(tables) > 0:
             st.write("**Database Tables:**")
@@ -156,23 +163,25 @@ with tab2:
                     
                     with st.expander(f"📊 Table: {table_name}"):
                         # Get table schema
-                        schema = execute_query(f"PRAGMA table_info({table_name})")
+                        schema = execute_read(f"PRAGMA table_info({table_name})")
                         if schema:
                             schema_df = pd.DataFrame(schema, columns=['ID', 'Name', 'Type', 'NotNull', 'Default', 'PK'])
                             st.dataframe(schema_df, use_container_width=True)
                         
                         # Get row count
-                        count_result = execute_query(f"SELECT COUNT(*) FROM {table_name}")
+                        count_result = execute_read(f"SELECT COUNT(*) FROM {table_name}")
                         count = count_result[0][0] if count_result else 0
                         st.write(f"**Row Count:** {count}")
                         
                         # Show sample data (first 5 rows)
                         if count > 0:
-                            sample_data = execute_query(f"SELECT * FROM {table_name} LIMIT 5")
+                            sample_data = execute_read(f"SELECT * FROM {table_name} LIMIT 5")
                             if sample_data:
                                 columns = [col[1] for col in schema] if schema else []
                                 if columns:
                                     sample_df = pd.DataFrame(sample_data, columns=columns)
+                                    for column in COMPRESSED_TEXT_COLUMNS.get(table_name, ()):
+                                        sample_df[column] = sample_df[column].map(decompress_text)
                                     st.write("**Sample Data (first 5 rows):**")
                                     st.dataframe(sample_df, use_container_width=True)
                 except Exception as table_error:
@@ -187,7 +196,7 @@ with tab3:
     
     # Table selector
     try:
-        tables = execute_query("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+        tables = execute_read("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
         if tables:
             table_names = [table[0] if isinstance(table, (list, tuple)) else str(table) for table in tables]
             selected_table = st.selectbox("Select Table to View:", table_names)
@@ -197,7 +206,7 @@ with tab3:
                 page_size = st.selectbox("Rows per page:", [10, 25, 50, 100], index=1)
                 
                 # Get total count
-                count_result = execute_query(f"SELECT COUNT(*) FROM {selected_table}")
+                count_result = execute_read(f"SELECT COUNT(*) FROM {selected_table}")
                 total_rows = count_result[0][0] if count_result else 0
                 total_pages = (total_rows - 1) // page_size + 1 if total_rows > 0 else 1
                 
@@ -207,15 +216,18 @@ with tab3:
                 
                 # Get data for current page
                 offset = page * page_size
-                data = execute_query(f"SELECT * FROM {selected_table} LIMIT {page_size} OFFSET {offset}")
+                data = execute_read(f"SELECT * FROM {selected_table} LIMIT {page_size} OFFSET {offset}")
                 
                 if data:
                     # Get column names
-                    schema = execute_query(f"PRAGMA table_info({selected_table})")
+                    schema = execute_read(f"PRAGMA table_info({selected_table})")
                     columns = [col[1] for col in schema] if schema else []
                     
                     if columns:
                         df = pd.DataFrame(data, columns=columns)
+                        # Inflate compressed text for the rows on this page only
+                        for column in COMPRESSED_TEXT_COLUMNS.get(selected_table, ()):
+                            df[column] = df[column].map(decompress_text)
                         st.dataframe(df, use_container_width=True)
                         
                         st.write(f"Showing rows {offset + 1}-{min(offset + page_size, total_rows)} of {total_rows}")
@@ -257,7 +269,7 @@ with tab4:
                 if not query_upper.startswith('SELECT'):
                     st.error("❌ Only SELECT queries are allowed for safety!")
                 else:
-                    results = execute_query(query)
+                    results = execute_read(query)
                     if results:
                         # Try to create DataFrame
                         try:
@@ -290,16 +302,13 @@ with tab5:
     
     # Database file info
     try:
-        import os
-        db_path = "database/school.db"
-        if os.path.exists(db_path):
-            db_size = os.path.getsize(db_path)
-            st.metric("Database Size", f"{db_size / 1024:.1f} KB")
+        db_size = BACKEND.size_bytes(DB_PATH)
+        st.metric("Database Size", f"{db_size / 1024:.1f} KB")
+        st.caption(BACKEND.describe(DB_PATH))
         
-        # Connection info
-        conn = get_connection()
+        # Connection info - getting a connection at all is the health check
+        get_connection().close()
         st.success("✅ Database connection healthy")
-        conn.close()
         
     except Exception as e:
         st.error(f"❌ Database issues: {str(e)}")
@@ -307,11 +316,14 @@ with tab5:
     # Table sizes
     st.write("**Table Row Counts:**")
     if tables:
-        table_stats = []
-        for table in tables:
-            table_name = table[0]
-            count = execute_query(f"SELECT COUNT(*) FROM {table_name}")[0][0]
-            table_stats.append({'Table': table_name, 'Rows': count})
+        def count_rows(table):
+            # Shared tables are in the central database once; every other table is on each teacher's shard
+            if table in CENTRAL_TABLES:
+                return execute_read(f"SELECT COUNT(*) FROM {table}")[0][0]
+            return sum(row[0] for row in execute_all_shards(f"SELECT COUNT(*) FROM {table}"))
+        
+        counts = execute_reads([lambda table=table[0]: count_rows(table) for table in tables])
+        table_stats = [{'Table': table[0], 'Rows': count} for table, count in zip(tables, counts)]
         
         stats_df = pd.DataFrame(table_stats)
         st.dataframe(stats_df, use_container_width=True)
@@ -322,7 +334,7 @@ with tab5:
     
     # Recent activity
     st.write("**Recent User Activity:**")
-    recent_users = execute_query("""
+    recent_users = execute_read("""
         SELECT username, full_name, role, created_at 
         FROM users 
         ORDER BY created_at DESC 
@@ -3,19 +3,32 @@ import sys
 import os
 import difflib
 import re
-from openai import OpenAI
 import json
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import execute_query, execute_all_shards, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.dictation_errors import diff_dictation_words, save_dictation_score
+    from utils.audio_store import create_dictation_task, release_audio
+    from utils.audio_processing import queue_audio_processing, resume_audio_processing
+    from utils.dictation_segments import audio_mime_type, detect_segments, load_segments, save_segments
+    from utils.text_compression import decompress_text
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import execute_query, execute_all_shards, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.dictation_errors import diff_dictation_words, save_dictation_score
+    from utils.audio_store import create_dictation_task, release_audio
+    from utils.audio_processing import queue_audio_processing, resume_audio_processing
+    from utils.dictation_segments import audio_mime_type, detect_segments, load_segments, save_segments
+    from utils.text_compression import decompress_text
 
 def get_openai_client():
     """Get OpenAI client with API key from Streamlit secrets or user input"""
     try:
+        from openai import OpenAI
+
         if "openai_api_key" in st.secrets:
             return OpenAI(api_key=st.secrets["openai_api_key"])
         else:
@@ -114,7 +127,7 @@ def _basic_dictation_score(correct_text, student_text):
         "score": score,
         "feedback_english": generate_feedback_en(score, correct_text, student_text),
         "feedback_chinese": generate_feedback_zh(score),
-        "errors": []
+        "errors": diff_dictation_words(correct_text, student_text)
     }
 
 def show_differences(correct_text, student_text):
@@ -159,6 +172,10 @@ def generate_feedback_en(score, correct_text, student_text):
         st.error(f"Error generating English feedback: {str(e)}")
         return "Feedback could not be generated."
 
+def step_segment(position_key, step, segment_count):
+    """Move the phrase player forwards or back, staying within the task's phrases"""
+    st.session_state[position_key] = min(max(st.session_state.get(position_key, 1) + step, 1), segment_count)
+
 def generate_feedback_zh(score):
     """Generate Chinese feedback based on score - dictation focused"""
     try:
@@ -178,6 +195,11 @@ def generate_feedback_zh(score):
 
 st.header("Dictation Score Tracking")
 
+teacher_id = get_current_user()['id']
+
+# Pick up any recordings a restart left untranscoded
+resume_audio_processing()
+
 # Create dictation task
 st.subheader("Create Dictation Task")
 with st.form("new_dictation_task"):
@@ -188,19 +210,14 @@ with st.form("new_dictation_task"):
     submitted = st.form_submit_button("Create Task")
     
     if submitted and task_name and transcript:
-        audio_filename = None
-        if audio_file:
-            # Save audio file
-            audio_dir = "database/audio"
-            os.makedirs(audio_dir, exist_ok=True)
-            audio_filename = f"{audio_dir}/{task_name}_{audio_file.name}"
-            with open(audio_filename, "wb") as f:
-                f.write(audio_file.getvalue())
-        
-        execute_query(
-            "INSERT INTO dictation_tasks (name, transcript, audio_file) VALUES (?, ?, ?)",
-            (task_name, transcript, audio_filename)
+        # The recording is stored once per distinct upload, however many tasks reuse it
+        audio_hash = create_dictation_task(
+            task_name, transcript, audio_file, audio_file.name if audio_file else None
         )
+        if audio_hash:
+            # Transcoded, normalized and summarised in the background - queued only now the task exists,
+            # so moving the task on to the transcoded file can't happen before it is inserted
+            queue_audio_processing(audio_hash)
         st.success(f"Dictation task '{task_name}' created successfully!")
 
 # Delete dictation task
@@ -217,32 +234,27 @@ if tasks_for_deletion:
             if task_to_delete:
                 task_id = task_delete_options[task_to_delete]
                 
-                # Check if task has any scores recorded
-                existing_scores = execute_query(
-                    "SELECT COUNT(*) FROM dictation_scores WHERE task_id = ?", 
+                # Check if task has any scores recorded - tasks are shared, so by any teacher on any shard
+                score_count = sum(row[0] for row in execute_all_shards(
+                    "SELECT COUNT(*) FROM dictation_scores WHERE task_id = ?",
                     (task_id,)
-                )
-                score_count = existing_scores[0][0] if existing_scores else 0
+                ))
                 
                 if score_count > 0:
                     st.error(f"Cannot delete '{task_to_delete}' - it has {score_count} student scores recorded.")
                 else:
-                    # Get audio file path before deletion
+                    # Get the task's recording before deletion
                     audio_info = execute_query(
-                        "SELECT audio_file FROM dictation_tasks WHERE id = ?", 
+                        "SELECT audio_hash FROM dictation_tasks WHERE id = ?", 
                         (task_id,)
                     )
-                    audio_file_path = audio_info[0][0] if audio_info and audio_info[0][0] else None
+                    audio_hash = audio_info[0][0] if audio_info else None
                     
-                    # Delete the task
+                    # Delete the task - a trigger drops its reference to the recording
                     execute_query("DELETE FROM dictation_tasks WHERE id = ?", (task_id,))
                     
-                    # Delete audio file if exists
-                    if audio_file_path and os.path.exists(audio_file_path):
-                        try:
-                            os.remove(audio_file_path)
-                        except OSError:
-                            pass  # Continue even if audio file deletion fails
+                    # The file itself only goes once no other task uses it
+                    release_audio(audio_hash)
                     
                     st.success(f"Dictation task '{task_to_delete}' deleted successfully!")
                     st.rerun()
@@ -265,16 +277,93 @@ if tasks:
         with st.expander("View Correct Transcript"):
             st.write(correct_transcript)
         
+        # Play the task's recording, using the precomputed duration and waveform
+        task_audio = execute_query("""
+            SELECT af.path, af.size, af.duration_seconds, af.waveform, af.processing_status
+            FROM dictation_tasks dt
+            JOIN audio_files af ON af.hash = dt.audio_hash
+            WHERE dt.id = ?
+        """, (task_id,))
+        if task_audio:
+            audio_path, audio_size, duration, waveform, processing_status = task_audio[0]
+            if os.path.exists(audio_path):
+                st.audio(audio_path, format=audio_mime_type(audio_path))
+                if processing_status == 'done':
+                    st.caption(f"{int(duration // 60)}:{int(duration % 60):02d} · {audio_size / 1024:.0f} KB")
+                    st.area_chart(json.loads(waveform), height=80)
+                else:
+                    st.caption(f"Audio processing: {processing_status}")
+                
+                # Phrase-by-phrase playback from precomputed clips
+                segments = load_segments(task_id)
+                if segments:
+                    position_key = f"segment_position_{task_id}"
+                    position = min(st.session_state.get(position_key, 1), len(segments))
+                    
+                    st.markdown("**Phrase Player**")
+                    col1, col2, col3 = st.columns([1, 1, 2])
+                    with col1:
+                        st.button("⏮️ Previous", key="segment_previous", disabled=position <= 1,
+                                  on_click=step_segment, args=(position_key, -1, len(segments)))
+                    with col2:
+                        st.button("⏭️ Next", key="segment_next", disabled=position >= len(segments),
+                                  on_click=step_segment, args=(position_key, 1, len(segments)))
+                    with col3:
+                        repeat_segment = st.toggle("Repeat phrase", key="segment_repeat")
+                    
+                    _, start_ms, end_ms, phrase_text, segment_clip = segments[position - 1]
+                    st.caption(f"Phrase {position} of {len(segments)} ({(end_ms - start_ms) / 1000:.1f}s): {phrase_text}")
+                    if os.path.exists(segment_clip):
+                        st.audio(segment_clip, format=audio_mime_type(segment_clip), loop=repeat_segment, autoplay=True)
+                
+                with st.expander("Set Up Phrases"):
+                    st.caption("Split the recording at its pauses, then adjust the times or phrases by hand. "
+                               "To choose the phrases yourself, put | between them in the transcript.")
+                    draft_key = f"segment_draft_{task_id}"
+                    if st.button("Detect Phrases From Pauses"):
+                        try:
+                            with st.spinner("Finding pauses..."):
+                                st.session_state[draft_key] = detect_segments(audio_path, correct_transcript)
+                        except Exception as e:
+                            st.error(f"Could not read the recording: {str(e)}")
+                    
+                    draft = st.session_state.get(draft_key) or [(start, end, text) for _, start, end, text, _ in segments]
+                    if draft:
+                        import pandas as pd
+                        
+                        edited_segments = st.data_editor(
+                            pd.DataFrame(
+                                [(start / 1000, end / 1000, text) for start, end, text in draft],
+                                columns=["Start (s)", "End (s)", "Phrase"]
+                            ),
+                            num_rows="dynamic",
+                            hide_index=True,
+                            use_container_width=True,
+                            key=f"segment_editor_{task_id}",
+                        )
+                        if st.button("Save Phrases"):
+                            rows = edited_segments.dropna(subset=["Start (s)", "End (s)"])
+                            try:
+                                with st.spinner("Cutting phrase clips..."):
+                                    saved = save_segments(task_id, [
+                                        (round(start * 1000), round(end * 1000), text or "")
+                                        for start, end, text in rows.itertuples(index=False)
+                                    ])
+                            except Exception as e:
+                                st.error(f"Could not save phrases: {str(e)}")
+                            else:
+                                st.session_state.pop(draft_key, None)
+                                st.session_state[f"segment_position_{task_id}"] = 1
+                                st.success(f"Saved {saved} phrases")
+                                st.rerun()
+        
         # Get classes and students
-        classes = execute_query("SELECT name FROM classes ORDER BY name")
-        if classes:
-            class_options = [cls[0] for cls in classes]
+        class_options = get_teacher_classes(teacher_id)
+        if class_options:
             selected_class = st.selectbox("Select Class", class_options)
             
-            students = execute_query(
-                "SELECT id, name FROM students WHERE class_name = ? ORDER BY name", 
-                (selected_class,)
-            )
+            class_id = class_options[selected_class]
+            students = get_class_students(class_id)
             
             if students:
                 student_options = {name: student_id for student_id, name in students}
@@ -350,7 +439,7 @@ if tasks:
                     with tab1:
                         st.text_area(
                             "Copy-Pastable English Feedback:",
-                            feedback_en,
+                            decompress_text(feedback_en),
                             height=100,
                             key="dictation_feedback_en",
                             help="Select all and copy this feedback to paste elsewhere"
@@ -359,7 +448,7 @@ if tasks:
                     with tab2:
                         st.text_area(
                             "Copy-Pastable Chinese Feedback:",
-                            feedback_zh,
+                            decompress_text(feedback_zh),
                             height=100,
                             key="dictation_feedback_zh",
                             help="Select all and copy this feedback to paste elsewhere"
@@ -371,9 +460,9 @@ if tasks:
                         final_score = st.number_input("Final Score (%)", 0.0, 100.0, float(score))
                     with col2:
                         if st.button("Save Score"):
-                            execute_query(
-                                "INSERT INTO dictation_scores (student_id, task_id, student_text, score, feedback_en, feedback_zh) VALUES (?, ?, ?, ?, ?, ?)",
-                                (result['student_id'], result['task_id'], result['student_text'], final_score, feedback_en, feedback_zh)
+                            save_dictation_score(
+                                result['student_id'], result['task_id'], result['student_text'],
+                                final_score, feedback_en, feedback_zh, errors
                             )
                             st.success(f"Score saved for {selected_student}")
                             # Clear the result after saving
@@ -394,12 +483,14 @@ if tasks:
         task_id, _ = task_options[view_task]
         
         scores = execute_query("""
-            SELECT s.name, ds.score, ds.feedback_en, ds.feedback_zh, ds.created_at
+            SELECT s.name, ds.score, fe.text, fz.text, ds.created_at
             FROM dictation_scores ds
             JOIN students s ON ds.student_id = s.id
-            WHERE ds.task_id = ?
+            LEFT JOIN feedback_texts fe ON fe.id = ds.feedback_en_id
+            LEFT JOIN feedback_texts fz ON fz.id = ds.feedback_zh_id
+            WHERE ds.task_id = ? AND s.teacher_id = ?
             ORDER BY ds.score DESC
-        """, (task_id,))
+        """, (task_id, teacher_id))
         
         if scores:
             for i, (student_name, score, feedback_en, feedback_zh, created_at) in enumerate(scores):
@@ -409,7 +500,7 @@ if tasks:
                     with tab1:
                         st.text_area(
                             "Copy-Pastable English Feedback:",
-                            feedback_en,
+                            decompress_text(feedback_en),
                             height=100,
                             key=f"view_feedback_en_{i}",
                             help="Select all and copy"
@@ -418,10 +509,77 @@ if tasks:
                     with tab2:
                         st.text_area(
                             "Copy-Pastable Chinese Feedback:",
-                            feedback_zh,
+                            decompress_text(feedback_zh),
                             height=100,
                             key=f"view_feedback_zh_{i}",
                             help="Select all and copy"
                         )
         else:
-            st.info("No scores recorded for this task yet.")
\ No newline at end of file
+            st.info("No scores recorded for this task yet.")
+
+# Most-missed words across every task, from the dictation_errors table
+st.subheader("Most-Missed Words")
+
+analysis_classes = get_teacher_classes(teacher_id)
+if analysis_classes:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        analysis_class = st.selectbox("Class", list(analysis_classes), key="error_analysis_class")
+    analysis_class_id = analysis_classes[analysis_class]
+    analysis_students = get_class_students(analysis_class_id)
+    analysis_student_options = {"Whole class": None}
+    analysis_student_options.update({name: student_id for student_id, name in analysis_students})
+    with col2:
+        analysis_student = st.selectbox("Student", list(analysis_student_options), key="error_analysis_student")
+    with col3:
+        analysis_type = st.selectbox(
+            "Error Type", ["All errors", "missed_word", "misspelled_word", "wrong_word", "extra_word"],
+            format_func=lambda option: option.replace('_', ' ').title(), key="error_analysis_type"
+        )
+    
+    analysis_student_id = analysis_student_options[analysis_student]
+    if analysis_student_id is None:
+        scope_sql, scope_params = "de.student_id IN (SELECT id FROM students WHERE class_id = ?)", [analysis_class_id]
+    else:
+        scope_sql, scope_params = "de.student_id = ?", [analysis_student_id]
+    type_sql, type_params = ("", []) if analysis_type == "All errors" else (" AND de.error_type = ?", [analysis_type])
+    
+    top_words = execute_query(f"""
+        SELECT de.word,
+               COUNT(*) AS errors,
+               COUNT(DISTINCT de.student_id) AS students,
+               SUM(CASE WHEN de.error_type = 'missed_word' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN de.error_type = 'misspelled_word' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN de.error_type = 'wrong_word' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN de.error_type = 'extra_word' THEN 1 ELSE 0 END)
+        FROM dictation_errors de
+        WHERE {scope_sql}{type_sql}
+        GROUP BY de.word
+        ORDER BY errors DESC, de.word
+        LIMIT 20
+    """, tuple(scope_params + type_params))
+    
+    if top_words:
+        import pandas as pd
+        
+        words_df = pd.DataFrame(top_words, columns=[
+            'Word', 'Errors', 'Students', 'Missed', 'Misspelled', 'Wrong Word', 'Extra'
+        ])
+        if analysis_student_id is not None:
+            words_df = words_df.drop(columns=['Students'])
+        st.bar_chart(words_df.set_index('Word')[['Missed', 'Misspelled', 'Wrong Word', 'Extra']])
+        st.dataframe(words_df, use_container_width=True, hide_index=True)
+        
+        # What students actually wrote for one of the top words
+        detail_word = st.selectbox("Show attempts for word", words_df['Word'].tolist(), key="error_analysis_word")
+        attempts = execute_query(f"""
+            SELECT COALESCE(de.student_word, '(nothing)') AS attempt, COUNT(*) AS times
+            FROM dictation_errors de
+            WHERE {scope_sql} AND de.word = ?{type_sql}
+            GROUP BY attempt
+            ORDER BY times DESC
+            LIMIT 10
+        """, tuple(scope_params + [detail_word] + type_params))
+        st.write(", ".join(f"**{attempt}** ×{times}" for attempt, times in attempts))
+    else:
+        st.info("No dictation errors recorded for this selection yet.")
@@ -0,0 +1,107 @@
+import streamlit as st
+import sys
+import os
+import time
+
+# Import from parent directory
+try:
+    from utils.database import execute_all_shards, get_teacher_classes, get_table_version
+    from utils.auth import get_current_user, is_admin
+    from utils.essay_analytics import load_essay_analytics
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.database import execute_all_shards, get_teacher_classes, get_table_version
+    from utils.auth import get_current_user, is_admin
+    from utils.essay_analytics import load_essay_analytics
+
+import plotly.express as px
+
+st.header("Essay Analytics")
+
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+
+scope_options = []
+if class_options:
+    scope_options += ["One class", "All my classes"]
+if is_admin():
+    scope_options.append("Whole school")
+if not scope_options:
+    st.warning("Please create classes and add students first.")
+    st.stop()
+
+col1, col2 = st.columns(2)
+with col1:
+    scope = st.radio("Show", scope_options, horizontal=True)
+with col2:
+    if scope == "One class":
+        selected_class = st.selectbox("Select Class", class_options)
+
+if scope == "One class":
+    class_ids = (class_options[selected_class],)
+elif scope == "All my classes":
+    class_ids = tuple(sorted(class_options.values()))
+else:
+    # With per-teacher shards on, the school's classes are spread over every teacher's file
+    class_ids = tuple(sorted(row[0] for row in execute_all_shards("SELECT id FROM classes")))
+whole_school = scope == "Whole school"
+
+# A single class is broken down by student; anything wider by class
+heatmap_by = 'student' if scope == "One class" else 'class'
+
+started = time.perf_counter()
+analytics = load_essay_analytics(class_ids, heatmap_by, get_table_version('essay_marks', whole_school), whole_school)
+elapsed = time.perf_counter() - started
+
+if not analytics:
+    st.info("No marked essays for this selection yet.")
+    st.stop()
+
+st.caption(f"{analytics['essays']:,} essays · computed in {elapsed * 1000:.0f} ms")
+
+# Criterion heatmap
+st.subheader("Criteria Heatmap")
+heatmap = analytics['heatmap']
+fig_heatmap = px.imshow(
+    heatmap,
+    labels=dict(x="Criterion", y="Student" if heatmap_by == 'student' else "Class", color="Average /25"),
+    color_continuous_scale="RdYlGn",
+    zmin=0,
+    zmax=25,
+    text_auto=".1f",
+    aspect="auto",
+)
+fig_heatmap.update_layout(height=max(300, 28 * len(heatmap) + 120))
+st.plotly_chart(fig_heatmap, use_container_width=True)
+
+# Term-over-term trends
+st.subheader("Term Trends")
+trends = analytics['trends']
+if len(trends) > 1:
+    criteria_trends = trends.drop(columns=['Total (/100)'])
+    fig_trends = px.line(
+        criteria_trends.reset_index().melt(id_vars='term', var_name='Criterion', value_name='Average'),
+        x='term',
+        y='Average',
+        color='Criterion',
+        markers=True,
+        title="Average Criterion Score by Term (/25)",
+    )
+    st.plotly_chart(fig_trends, use_container_width=True)
+st.dataframe(trends.round(1), use_container_width=True)
+
+# Distribution by essay type
+st.subheader("Scores by Essay Type")
+col1, col2 = st.columns([2, 1])
+with col1:
+    distribution = analytics['distribution']
+    fig_distribution = px.bar(
+        distribution.reset_index().melt(id_vars='Score band', var_name='Essay type', value_name='Essays'),
+        x='Score band',
+        y='Essays',
+        color='Essay type',
+        barmode='group',
+    )
+    st.plotly_chart(fig_distribution, use_container_width=True)
+with col2:
+    st.dataframe(analytics['type_summary'], use_container_width=True)
@@ -2,18 +2,25 @@ import streamlit as st
 import sys
 import os
 import json
-from openai import OpenAI
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import criterion_score, execute_query, get_teacher_classes, get_class_students, encode_long_text, ESSAY_CRITERIA
+    from utils.feedback_texts import save_feedback
+    from utils.text_compression import decompress_text
+    from utils.auth import get_current_user
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import criterion_score, execute_query, get_teacher_classes, get_class_students, encode_long_text, ESSAY_CRITERIA
+    from utils.feedback_texts import save_feedback
+    from utils.text_compression import decompress_text
+    from utils.auth import get_current_user
 
 def get_openai_client():
     """Get OpenAI client with API key from Streamlit secrets"""
     try:
+        from openai import OpenAI
+
         if "openai_api_key" in st.secrets:
             return OpenAI(api_key=st.secrets["openai_api_key"])
         else:
@@ -137,19 +144,17 @@ def mark_essay_with_ai(essay_text, essay_type, student_name):
 
 st.header("Essay Marking")
 
-# Get existing classes
-classes = execute_query("SELECT name FROM classes ORDER BY name")
-if not classes:
+# Get this teacher's classes
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+if not class_options:
     st.warning("Please create classes and add students first.")
     st.stop()
 
-class_options = [cls[0] for cls in classes]
 selected_class = st.selectbox("Select Class", class_options)
 
-students = execute_query(
-    "SELECT id, name FROM students WHERE class_name = ? ORDER BY name", 
-    (selected_class,)
-)
+class_id = class_options[selected_class]
+students = get_class_students(class_id)
 
 if not students:
     st.warning(f"No students found in {selected_class}. Please add students first.")
@@ -273,83 +278,135 @@ if hasattr(st.session_state, 'essay_result') and st.session_state.essay_result:
         final_score = st.number_input("Final Score (if adjusting)", 0, 100, total_score)
     with col2:
         if st.button("Save Essay Mark"):
-            criteria_breakdown = json.dumps({
-                'content_ideas': result['content_ideas']['score'],
-                'organization': result['organization']['score'], 
-                'language_use': result['language_use']['score'],
-                'conventions': result['conventions']['score']
-            })
-            
+            # The model's scores aren't guaranteed to be in range, and the columns reject anything outside 0-25
+            criteria_scores = [criterion_score(result.get(criterion)) for criterion in ESSAY_CRITERIA]
+            essay_text, = encode_long_text(data['essay_text'])
+            feedback_en_id, feedback_zh_id = save_feedback(result['feedback_english'], result['feedback_chinese'])
             execute_query(
-                "INSERT INTO essay_marks (student_id, essay_title, essay_type, essay_text, score, feedback_en, feedback_zh, criteria_breakdown) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                (data['student_id'], data['essay_title'], data['essay_type'], data['essay_text'], 
-                 final_score, result['feedback_english'], result['feedback_chinese'], criteria_breakdown)
+                """INSERT INTO essay_marks (student_id, essay_title, essay_type, essay_text, score, feedback_en_id, feedback_zh_id,
+                                            content_ideas, organization, language_use, conventions)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (data['student_id'], data['essay_title'], data['essay_type'], essay_text,
+                 final_score, feedback_en_id, feedback_zh_id, *criteria_scores)
             )
             st.success(f"Essay mark saved for {data['student_name']}")
             # Clear results after saving
             del st.session_state.essay_result
 
+# Class criterion averages, computed in SQL from the typed criteria columns
+st.subheader("Class Criteria Averages")
+
+criteria_averages = execute_query("""
+    SELECT COUNT(*), AVG(em.score), AVG(em.content_ideas), AVG(em.organization),
+           AVG(em.language_use), AVG(em.conventions)
+    FROM essay_marks em
+    JOIN students s ON em.student_id = s.id
+    WHERE s.class_id = ? AND em.content_ideas IS NOT NULL
+""", (class_id,))[0]
+
+if criteria_averages[0]:
+    essays_scored, average_total, *average_criteria = criteria_averages
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Average Total", f"{average_total:.1f}/100", help=f"{essays_scored} essays")
+    for column, label, average in zip((col2, col3, col4, col5),
+                                      ["Content & Ideas", "Organization", "Language Use", "Conventions"],
+                                      average_criteria):
+        with column:
+            st.metric(label, f"{average:.1f}/25")
+    
+    criteria_trend = execute_query("""
+        SELECT strftime('%Y-%m', em.created_at) AS month, AVG(em.content_ideas), AVG(em.organization),
+               AVG(em.language_use), AVG(em.conventions)
+        FROM essay_marks em
+        JOIN students s ON em.student_id = s.id
+        WHERE s.class_id = ? AND em.content_ideas IS NOT NULL
+        GROUP BY month
+        ORDER BY month
+    """, (class_id,))
+    if len(criteria_trend) > 1:
+        import pandas as pd
+        
+        trend_df = pd.DataFrame(criteria_trend, columns=['Month', 'Content & Ideas', 'Organization', 'Language Use', 'Conventions'])
+        st.line_chart(trend_df.set_index('Month'))
+else:
+    st.info("No criterion scores recorded for this class yet.")
+
 # View previous essay marks
 st.subheader("Previous Essay Marks")
 
+ESSAYS_PER_PAGE_OPTIONS = [10, 25, 50]
+
+essay_count = execute_query("""
+    SELECT COUNT(*)
+    FROM essay_marks em
+    JOIN students s ON em.student_id = s.id
+    WHERE s.class_id = ?
+""", (class_id,))[0][0]
+
+# Page through the history - details for the whole page come back in the same query
+col1, col2 = st.columns(2)
+with col1:
+    essays_per_page = st.selectbox("Essays per page", ESSAYS_PER_PAGE_OPTIONS, key="essays_per_page")
+total_pages = max(1, -(-essay_count // essays_per_page))
+with col2:
+    essay_page = st.number_input(f"Page (of {total_pages})", 1, total_pages, 1, key="essay_history_page")
+
 essay_history = execute_query("""
-    SELECT s.name, em.essay_title, em.essay_type, em.score, em.created_at, em.id
+    SELECT s.name, em.essay_title, em.essay_type, em.score, em.created_at, em.id,
+           fe.text, fz.text, em.content_ideas, em.organization, em.language_use, em.conventions
     FROM essay_marks em
     JOIN students s ON em.student_id = s.id
-    WHERE s.class_name = ?
-    ORDER BY em.created_at DESC
-""", (selected_class,))
+    LEFT JOIN feedback_texts fe ON fe.id = em.feedback_en_id
+    LEFT JOIN feedback_texts fz ON fz.id = em.feedback_zh_id
+    WHERE s.class_id = ?
+    ORDER BY em.created_at DESC, em.id DESC
+    LIMIT ? OFFSET ?
+""", (class_id, essays_per_page, (essay_page - 1) * essays_per_page))
 
 if essay_history:
-    for student_name, essay_title, essay_type, score, created_at, essay_id in essay_history:
+    st.caption(f"Showing {(essay_page - 1) * essays_per_page + 1}-"
+               f"{(essay_page - 1) * essays_per_page + len(essay_history)} of {essay_count} essays")
+    for (student_name, essay_title, essay_type, score, created_at, essay_id,
+         feedback_en, feedback_zh, *criteria_scores) in essay_history:
         with st.expander(f"📝 {student_name} - {essay_title} ({score}/100) - {created_at[:10]}"):
             st.write(f"**Type:** {essay_type.replace('_', ' ').title()}")
             
-            # Get full essay details
-            essay_details = execute_query(
-                "SELECT feedback_en, feedback_zh, criteria_breakdown FROM essay_marks WHERE id = ?",
-                (essay_id,)
-            )
+            if any(criterion_score is not None for criterion_score in criteria_scores):
+                content_score, organization_score, language_score, conventions_score = (
+                    'N/A' if criterion_score is None else criterion_score for criterion_score in criteria_scores
+                )
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.write(f"Content: {content_score}/25")
+                with col2:
+                    st.write(f"Organization: {organization_score}/25")
+                with col3:
+                    st.write(f"Language: {language_score}/25")
+                with col4:
+                    st.write(f"Conventions: {conventions_score}/25")
+            else:
+                st.info("No detailed breakdown available for this essay.")
+            
+            # Copy-pastable feedback tabs
+            tab1, tab2 = st.tabs(["English Feedback", "Chinese Feedback"])
+            
+            with tab1:
+                st.text_area(
+                    "English Feedback:",
+                    decompress_text(feedback_en),
+                    height=150,
+                    key=f"en_feedback_{essay_id}",
+                    help="Select all and copy"
+                )
             
-            if essay_details:
-                feedback_en, feedback_zh, criteria_breakdown = essay_details[0]
-                
-                if criteria_breakdown and criteria_breakdown.strip():
-                    try:
-                        breakdown = json.loads(criteria_breakdown)
-                        col1, col2, col3, col4 = st.columns(4)
-                        with col1:
-                            st.write(f"Content: {breakdown.get('content_ideas', 'N/A')}/25")
-                        with col2:
-                            st.write(f"Organization: {breakdown.get('organization', 'N/A')}/25")
-                        with col3:
-                            st.write(f"Language: {breakdown.get('language_use', 'N/A')}/25")
-                        with col4:
-                            st.write(f"Conventions: {breakdown.get('conventions', 'N/A')}/25")
-                    except (json.JSONDecodeError, TypeError) as e:
-                        st.warning("Unable to display detailed breakdown for this essay.")
-                else:
-                    st.info("No detailed breakdown available for this essay.")
-                
-                # Copy-pastable feedback tabs
-                tab1, tab2 = st.tabs(["English Feedback", "Chinese Feedback"])
-                
-                with tab1:
-                    st.text_area(
-                        "English Feedback:",
-                        feedback_en,
-                        height=150,
-                        key=f"en_feedback_{essay_id}",
-                        help="Select all and copy"
-                    )
-                
-                with tab2:
-                    st.text_area(
-                        "Chinese Feedback:",
-                        feedback_zh,
-                        height=150,
-                        key=f"zh_feedback_{essay_id}",
-                        help="Select all and copy"
-                    )
+            with tab2:
+                st.text_area(
+                    "Chinese Feedback:",
+                    decompress_text(feedback_zh),
+                    height=150,
+                    key=f"zh_feedback_{essay_id}",
+                    help="Select all and copy"
+                )
 else:
     st.info("No essays marked yet.")
\ No newline at end of file
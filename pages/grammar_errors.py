@@ -1,33 +1,30 @@
 import streamlit as st
 import sys
 import os
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import execute_query, execute_read, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import execute_query, execute_read, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
 
 st.header("Grammar Error Tracking")
 
-# Get existing classes
-classes = execute_query("SELECT name FROM classes ORDER BY name")
-if not classes:
+# Get this teacher's classes
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+if not class_options:
     st.warning("Please create classes and add students first.")
     st.stop()
 
-class_options = [cls[0] for cls in classes]
 selected_class = st.selectbox("Select Class", class_options)
 
-students = execute_query(
-    "SELECT id, name FROM students WHERE class_name = ? ORDER BY name", 
-    (selected_class,)
-)
+class_id = class_options[selected_class]
+students = get_class_students(class_id)
 
 if not students:
     st.warning(f"No students found in {selected_class}. Please add students first.")
@@ -70,15 +67,18 @@ with st.form("grammar_error"):
 st.subheader("Grammar Error Analysis")
 
 # Get all grammar error data for the selected class
-grammar_data = execute_query("""
+grammar_data = execute_read("""
     SELECT s.name, ge.error_type, ge.example, ge.created_at
     FROM grammar_errors ge
     JOIN students s ON ge.student_id = s.id
-    WHERE s.class_name = ?
+    WHERE s.class_id = ?
     ORDER BY ge.created_at DESC
-""", (selected_class,))
+""", (class_id,))
 
 if grammar_data:
+    import pandas as pd
+    import plotly.express as px
+
     df = pd.DataFrame(grammar_data, columns=['Student', 'Error Type', 'Example', 'Date'])
     
     # Overall error distribution
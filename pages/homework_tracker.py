@@ -1,32 +1,33 @@
 import streamlit as st
 import sys
 import os
-import pandas as pd
 from datetime import datetime, timedelta
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import execute_query, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.term_archive import archived_term, execute_archive_query
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import execute_query, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.term_archive import archived_term, execute_archive_query
 
 st.header("Homework Tracker")
 
-# Get existing classes
-classes = execute_query("SELECT name FROM classes ORDER BY name")
-if not classes:
+# Get this teacher's classes
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+if not class_options:
     st.warning("Please create classes and add students first.")
     st.stop()
 
-class_options = [cls[0] for cls in classes]
 selected_class = st.selectbox("Select Class", class_options)
 
 # Get students in selected class
-students = execute_query(
-    "SELECT id, name FROM students WHERE class_name = ? ORDER BY name", 
-    (selected_class,)
-)
+class_id = class_options[selected_class]
+students = get_class_students(class_id)
 
 if not students:
     st.warning(f"No students found in {selected_class}. Please add students first.")
@@ -66,27 +67,32 @@ with st.form("homework_tracker"):
     submitted = st.form_submit_button("Save Homework Status")
     
     if submitted:
-        for student_id, status in homework_data.items():
-            # Check if record exists
-            existing = execute_query(
-                "SELECT id FROM homework WHERE student_id = ? AND date = ?",
-                (student_id, str(selected_date))
-            )
-            
-            if existing:
-                # Update existing record
-                execute_query(
-                    "UPDATE homework SET status = ? WHERE student_id = ? AND date = ?",
-                    (status, student_id, str(selected_date))
-                )
-            else:
-                # Insert new record
-                execute_query(
-                    "INSERT INTO homework (student_id, date, status) VALUES (?, ?, ?)",
-                    (student_id, str(selected_date), status)
+        # Closed terms live in read-only archive files; saving here would duplicate their rows
+        closed_term = archived_term(selected_date)
+        if closed_term:
+            st.error(f"{closed_term} is archived and closed - its homework can no longer be changed")
+        else:
+            for student_id, status in homework_data.items():
+                # Check if record exists
+                existing = execute_query(
+                    "SELECT id FROM homework WHERE student_id = ? AND date = ?",
+                    (student_id, str(selected_date))
                 )
+            
+                if existing:
+                    # Update existing record
+                    execute_query(
+                        "UPDATE homework SET status = ? WHERE student_id = ? AND date = ?",
+                        (status, student_id, str(selected_date))
+                    )
+                else:
+                    # Insert new record
+                    execute_query(
+                        "INSERT INTO homework (student_id, date, status) VALUES (?, ?, ?)",
+                        (student_id, str(selected_date), status)
+                    )
         
-        st.success(f"Homework status saved for {selected_date}")
+            st.success(f"Homework status saved for {selected_date}")
 
 # Display homework history
 st.subheader("Homework History")
@@ -98,16 +104,18 @@ with col1:
 with col2:
     end_date = st.date_input("To Date", datetime.now().date())
 
-# Get homework data for the selected class and date range
-homework_history = execute_query("""
+# Get homework data for the selected class and date range - ranges reaching past terms read their archives
+homework_history = execute_archive_query("""
     SELECT s.name, h.date, h.status 
-    FROM homework h
+    FROM homework_all h
     JOIN students s ON h.student_id = s.id
-    WHERE s.class_name = ? AND h.date BETWEEN ? AND ?
+    WHERE s.class_id = ? AND h.date BETWEEN ? AND ?
     ORDER BY h.date, s.name
-""", (selected_class, str(start_date), str(end_date)))
+""", (class_id, str(start_date), str(end_date)), start_date, end_date)
 
 if homework_history:
+    import pandas as pd
+
     # Create a DataFrame for better display
     df = pd.DataFrame(homework_history, columns=['Student', 'Date', 'Status'])
     
@@ -126,7 +134,9 @@ if homework_history:
             return 'background-color: lightgray'
         return ''
     
-    styled_df = pivot_df.style.applymap(color_status)
+    # Styler.applymap was renamed to map in pandas 2.1 and removed in 3.0
+    styler = pivot_df.style
+    styled_df = styler.map(color_status) if hasattr(styler, 'map') else styler.applymap(color_status)
     st.dataframe(styled_df, use_container_width=True)
     
     # Summary statistics
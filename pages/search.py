@@ -0,0 +1,72 @@
+import streamlit as st
+import sys
+import os
+import time
+
+# Import from parent directory
+try:
+    from utils.database import get_teacher_classes, BACKEND
+    from utils.auth import get_current_user
+    from utils.search import SEARCH_SOURCES, build_match_query, count_matches, search_source, format_snippet
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.database import get_teacher_classes, BACKEND
+    from utils.auth import get_current_user
+    from utils.search import SEARCH_SOURCES, build_match_query, count_matches, search_source, format_snippet
+
+st.header("Search")
+st.caption("Find comments, essays and grammar examples across your classes. "
+           "Every word must match; end a word with * to match its beginning, e.g. lead*")
+
+if not BACKEND.file_based:
+    st.info("Search uses SQLite's full-text indexes, so it isn't available on a PostgreSQL database.")
+    st.stop()
+
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+
+col1, col2 = st.columns([3, 1])
+with col1:
+    search_text = st.text_input("Search", placeholder="e.g. leadership, seasons, don't like")
+with col2:
+    class_filter = st.selectbox("Class", ["All classes"] + list(class_options))
+
+sources = st.multiselect("Search in", list(SEARCH_SOURCES), default=list(SEARCH_SOURCES))
+max_results = st.slider("Results per section", 10, 200, 50, step=10)
+
+match_query = build_match_query(search_text)
+if not match_query:
+    st.info("Enter a word or phrase to search.")
+    st.stop()
+
+class_id = class_options.get(class_filter)
+
+started = time.perf_counter()
+try:
+    results = {}
+    for source in sources:
+        results[source] = (
+            count_matches(source, match_query, teacher_id, class_id),
+            search_source(source, match_query, teacher_id, class_id, max_results)
+        )
+except Exception as e:
+    st.error(f"Search failed: {str(e)}")
+    st.stop()
+elapsed = time.perf_counter() - started
+
+total = sum(count for count, _ in results.values())
+st.write(f"**{total}** matches in {elapsed * 1000:.0f} ms")
+
+if results:
+    tabs = st.tabs([f"{source} ({count})" for source, (count, _) in results.items()])
+    for tab, (source, (count, rows)) in zip(tabs, results.items()):
+        with tab:
+            if not rows:
+                st.write("No matches.")
+                continue
+            if count > len(rows):
+                st.caption(f"Showing the best {len(rows)} of {count}")
+            for student, class_name, title, created_at, snippet in rows:
+                date = str(created_at)[:10] if created_at else ""
+                st.markdown(f"**{student}** · {class_name or ''} · {title} · {date}")
+                st.markdown(f"> {format_snippet(snippet)}")
@@ -1,32 +1,32 @@
 import streamlit as st
 import sys
 import os
-import pandas as pd
-import plotly.express as px
 from datetime import datetime, timedelta
 
 # Import from parent directory
 try:
-    from utils.database import execute_query
+    from utils.database import execute_query, execute_read, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.term_archive import archived_term
 except ImportError:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from utils.database import execute_query
+    from utils.database import execute_query, execute_read, get_teacher_classes, get_class_students
+    from utils.auth import get_current_user
+    from utils.term_archive import archived_term
 
 st.header("Spelling Tests")
 
-# Get existing classes
-classes = execute_query("SELECT name FROM classes ORDER BY name")
-if not classes:
+# Get this teacher's classes
+teacher_id = get_current_user()['id']
+class_options = get_teacher_classes(teacher_id)
+if not class_options:
     st.warning("Please create classes and add students first.")
     st.stop()
 
-class_options = [cls[0] for cls in classes]
 selected_class = st.selectbox("Select Class", class_options)
 
-students = execute_query(
-    "SELECT id, name FROM students WHERE class_name = ? ORDER BY name", 
-    (selected_class,)
-)
+class_id = class_options[selected_class]
+students = get_class_students(class_id)
 
 if not students:
     st.warning(f"No students found in {selected_class}. Please add students first.")
@@ -55,44 +55,51 @@ with st.form("spelling_scores"):
     submitted = st.form_submit_button("Save Scores")
     
     if submitted:
-        for student_id, score in scores_data.items():
-            if score > 0:  # Only save non-zero scores
-                percentage = (score / max_score) * 100
+        closed_term = archived_term(week_date)
+        if closed_term:
+            st.error(f"{closed_term} is archived and closed - its spelling scores can no longer be changed")
+        else:
+            for student_id, score in scores_data.items():
+                if score > 0:  # Only save non-zero scores
+                    percentage = (score / max_score) * 100
                 
-                # Check if score already exists for this week
-                existing = execute_query(
-                    "SELECT id FROM spelling_tests WHERE student_id = ? AND week_date = ?",
-                    (student_id, str(week_date))
-                )
-                
-                if existing:
-                    # Update existing score
-                    execute_query(
-                        "UPDATE spelling_tests SET score = ?, max_score = ?, percentage = ? WHERE student_id = ? AND week_date = ?",
-                        (score, max_score, percentage, student_id, str(week_date))
-                    )
-                else:
-                    # Insert new score
-                    execute_query(
-                        "INSERT INTO spelling_tests (student_id, score, max_score, week_date, percentage) VALUES (?, ?, ?, ?, ?)",
-                        (student_id, score, max_score, str(week_date), percentage)
+                    # Check if score already exists for this week
+                    existing = execute_query(
+                        "SELECT id FROM spelling_tests WHERE student_id = ? AND week_date = ?",
+                        (student_id, str(week_date))
                     )
+                
+                    if existing:
+                        # Update existing score
+                        execute_query(
+                            "UPDATE spelling_tests SET score = ?, max_score = ?, percentage = ? WHERE student_id = ? AND week_date = ?",
+                            (score, max_score, percentage, student_id, str(week_date))
+                        )
+                    else:
+                        # Insert new score
+                        execute_query(
+                            "INSERT INTO spelling_tests (student_id, score, max_score, week_date, percentage) VALUES (?, ?, ?, ?, ?)",
+                            (student_id, score, max_score, str(week_date), percentage)
+                        )
         
-        st.success(f"Spelling test scores saved for week of {week_date}")
+            st.success(f"Spelling test scores saved for week of {week_date}")
 
 # View and analyze scores
 st.subheader("Spelling Test Analysis")
 
 # Get all spelling test data for the selected class
-spelling_data = execute_query("""
+spelling_data = execute_read("""
     SELECT s.name, st.score, st.max_score, st.percentage, st.week_date
     FROM spelling_tests st
     JOIN students s ON st.student_id = s.id
-    WHERE s.class_name = ?
+    WHERE s.class_id = ?
     ORDER BY st.week_date DESC, s.name
-""", (selected_class,))
+""", (class_id,))
 
 if spelling_data:
+    import pandas as pd
+    import plotly.express as px
+
     df = pd.DataFrame(spelling_data, columns=['Student', 'Score', 'Max Score', 'Percentage', 'Week Date'])
     
     # Weekly class averages
@@ -5,9 +5,10 @@ Run this to update the passwords in the database
 """
 
 import hashlib
-import sqlite3
 import os
 
+from utils.database import DB_PATH, get_connection, on_database_server
+
 def hash_password(password):
     """Hash password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -16,34 +17,35 @@ def reset_founder_passwords():
     print("🔐 Resetting Founder Passwords...")
     
     # Connect to database
-    db_path = "database/school.db"
-    if not os.path.exists(db_path):
+    if not on_database_server(DB_PATH) and not os.path.exists(DB_PATH):
         print("❌ Database not found!")
         return
     
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    conn = get_connection(DB_PATH)
+    try:
+        cursor = conn.cursor()
     
-    # Reset founder passwords
-    founders = [
-        ('james', 'rx9K2p', 'James Pares'),
-        ('joe', 'mL7Ht3', 'Joe (Founder)'),
-        ('jake', 'qN4Xv8', 'Jake (Founder)')
-    ]
+        # Reset founder passwords
+        founders = [
+            ('james', 'rx9K2p', 'James Pares'),
+            ('joe', 'mL7Ht3', 'Joe (Founder)'),
+            ('jake', 'qN4Xv8', 'Jake (Founder)')
+        ]
     
-    for username, password, full_name in founders:
-        password_hash = hash_password(password)
+        for username, password, full_name in founders:
+            password_hash = hash_password(password)
         
-        # Update or insert the user
-        cursor.execute('''
-            INSERT OR REPLACE INTO users (username, password_hash, full_name, role, is_active) 
-            VALUES (?, ?, ?, 'admin', 1)
-        ''', (username, password_hash, full_name))
+            # Update or insert the user
+            cursor.execute('''
+                INSERT OR REPLACE INTO users (username, password_hash, full_name, role, is_active) 
+                VALUES (?, ?, ?, 'admin', 1)
+            ''', (username, password_hash, full_name))
         
-        print(f"✅ Updated {username} with password: {password}")
+            print(f"✅ Updated {username} with password: {password}")
     
-    conn.commit()
-    conn.close()
+        conn.commit()
+    finally:
+        conn.close()
     
     print("🎉 All founder passwords updated!")
     print("\nLogin credentials:")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Script to split the Class Tracker database into one shard per teacher
+
+Each teacher's classes, students and student records move to their own file in the
+shard folder, so one teacher's bulk imports and essay jobs no longer hold the write
+lock everyone else is waiting for. Logins, dictation tasks, audio and the todo list
+stay in the central database. Start the app with CLASS_TRACKER_SHARD_DIR set to the
+shard folder afterwards.
+
+Examples:
+    python shard_database.py --shard-dir database/teachers
+    python shard_database.py --db database/school_large.db --shard-dir database/large_teachers
+"""
+
+import argparse
+import os
+import sys
+
+# Rows that belong to one teacher, by table, in the order they are copied. Feedback
+# comes first because the search triggers on essay_marks read it as essays arrive.
+_TEACHER_STUDENTS = "SELECT id FROM source.students WHERE teacher_id = :teacher"
+TEACHER_ROWS = {
+    'feedback_texts': f"""id IN (
+        SELECT feedback_en_id FROM source.essay_marks WHERE student_id IN ({_TEACHER_STUDENTS})
+        UNION SELECT feedback_zh_id FROM source.essay_marks WHERE student_id IN ({_TEACHER_STUDENTS})
+        UNION SELECT feedback_en_id FROM source.dictation_scores WHERE student_id IN ({_TEACHER_STUDENTS})
+        UNION SELECT feedback_zh_id FROM source.dictation_scores WHERE student_id IN ({_TEACHER_STUDENTS})
+    )""",
+    'classes': "teacher_id = :teacher",
+    'students': "teacher_id = :teacher",
+    'homework': f"student_id IN ({_TEACHER_STUDENTS})",
+    'comments': f"student_id IN ({_TEACHER_STUDENTS})",
+    'spelling_tests': f"student_id IN ({_TEACHER_STUDENTS})",
+    'grammar_errors': f"student_id IN ({_TEACHER_STUDENTS})",
+    'essay_marks': f"student_id IN ({_TEACHER_STUDENTS})",
+    'dictation_scores': f"student_id IN ({_TEACHER_STUDENTS})",
+    'dictation_errors': f"student_id IN ({_TEACHER_STUDENTS})",
+}
+
+
+def copy_teacher(database, db_path, teacher_id, compressed):
+    """Create a teacher's shard and copy their rows into it; returns {table: rows copied}"""
+    path = database.init_shard(teacher_id)
+    conn = database.get_connection(path, attach_central=False)
+    try:
+        cursor = conn.cursor()
+        if compressed:
+            database.set_text_compression(conn)
+        # Moving rows isn't a change to them, so it stays out of the shard's journal
+        database.drop_journal_triggers(cursor)
+        cursor.execute("ATTACH DATABASE ? AS source", (db_path,))
+        copied = {}
+        for table, condition in TEACHER_ROWS.items():
+            columns = ", ".join(row[1] for row in cursor.execute(f"PRAGMA main.table_info({table})").fetchall())
+            cursor.execute(
+                f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM source.{table} WHERE {condition}",
+                {"teacher": teacher_id}
+            )
+            copied[table] = cursor.rowcount
+        conn.commit()
+        cursor.execute("DETACH DATABASE source")
+        database.create_journal_triggers(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    return copied
+
+
+def clear_central(database, db_path, compressed):
+    """Empty the teacher tables in the central database once every shard holds its rows"""
+    conn = database.get_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        database.drop_journal_triggers(cursor)
+        # Emptying the search indexes row by row is slow, so they are dropped and rebuilt empty
+        for table in database.SEARCH_INDEXES:
+            database.drop_search_index(cursor, table)
+        for table in TEACHER_ROWS:
+            cursor.execute(f"DELETE FROM {table}")
+            if table in database.JOURNALED_TABLES:
+                cursor.execute(f"DELETE FROM journal_{table}")
+        # Their undo history went with them; the snapshot taken before splitting keeps it
+        cursor.execute(
+            f"DELETE FROM change_journal WHERE table_name IN ({', '.join('?' * len(TEACHER_ROWS))})",
+            list(TEACHER_ROWS)
+        )
+        database.create_search_indexes(cursor, compressed)
+        database.create_journal_triggers(cursor)
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split Class Tracker into per-teacher shards")
+    parser.add_argument("--db", default=os.environ.get("CLASS_TRACKER_DB", "database/school.db"),
+                        help="Database to split (it becomes the central database)")
+    parser.add_argument("--shard-dir", default=os.environ.get("CLASS_TRACKER_SHARD_DIR", "database/teachers"),
+                        help="Folder to write the teacher shards to")
+    args = parser.parse_args()
+
+    print("🧩 Class Tracker - Per-Teacher Shards")
+    print("=" * 40)
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found")
+        sys.exit(1)
+
+    # Routing reads these when utils.database is first imported
+    os.environ["CLASS_TRACKER_DB"] = args.db
+    os.environ["CLASS_TRACKER_SHARD_DIR"] = args.shard_dir
+    from utils import database
+    from utils.backups import take_snapshot
+
+    if not database.BACKEND.file_based:
+        print("❌ Shards split a SQLite database - a PostgreSQL server doesn't need them")
+        sys.exit(1)
+    if database.shard_paths():
+        print(f"❌ {args.shard_dir} already holds shards")
+        sys.exit(1)
+
+    # Bring older databases up to the current schema first
+    database.init_database(args.db)
+    conn = database.get_connection(args.db)
+    cursor = conn.cursor()
+    if cursor.execute("SELECT COUNT(*) FROM term_archives").fetchone()[0]:
+        conn.close()
+        print("❌ Archived terms can't be split into shards - shard before archiving terms")
+        sys.exit(1)
+    compressed = database.text_compression_enabled(cursor)
+    teacher_ids = [row[0] for row in cursor.execute(
+        "SELECT teacher_id FROM classes UNION SELECT teacher_id FROM students ORDER BY 1"
+    )]
+    conn.close()
+
+    size_before = os.path.getsize(args.db)
+    manifest = take_snapshot("before sharding", args.db)
+    print(f"💾 Snapshot {manifest['id']} taken first")
+
+    os.makedirs(args.shard_dir, exist_ok=True)
+    for teacher_id in teacher_ids:
+        copied = copy_teacher(database, args.db, teacher_id, compressed)
+        path = database.shard_path(teacher_id)
+        print(f"✅ Teacher {teacher_id}: {copied['students']:,} students, {sum(copied.values()):,} rows "
+              f"-> {path} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+
+    clear_central(database, args.db, compressed)
+    print(f"\n   Central database: {size_before / 1024 / 1024:.1f} MB -> {os.path.getsize(args.db) / 1024 / 1024:.1f} MB")
+    print(f"   Run the app with CLASS_TRACKER_SHARD_DIR={args.shard_dir}")
+
+
+if __name__ == "__main__":
+    main()
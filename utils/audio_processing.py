@@ -0,0 +1,132 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.database import DB_PATH, get_connection
+
+# Speech-friendly output: mono MP3 with a capped bitrate, or compact WAV when ffmpeg isn't installed
+OUTPUT_BITRATE = "64k"
+OUTPUT_SAMPLE_RATE = 22050
+FALLBACK_SAMPLE_RATE = 16000
+
+# Loudness every recording is brought to, without pushing peaks past the headroom
+TARGET_DBFS = -20.0
+PEAK_CEILING_DBFS = -1.0
+
+WAVEFORM_POINTS = 200
+
+# One worker, so a burst of uploads is transcoded one at a time in the background
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-processing")
+_resume_lock = threading.Lock()
+_resumed = set()
+
+def ffmpeg_available():
+    """MP3/OGG decoding and MP3 encoding need ffmpeg; WAV works without it"""
+    return shutil.which("ffmpeg") is not None or shutil.which("avconv") is not None
+
+def normalize_loudness(segment):
+    """Apply gain to reach TARGET_DBFS average loudness, limited so peaks stay under PEAK_CEILING_DBFS"""
+    if segment.dBFS == float("-inf"):
+        return segment
+    gain = min(TARGET_DBFS - segment.dBFS, PEAK_CEILING_DBFS - segment.max_dBFS)
+    return segment.apply_gain(gain)
+
+def waveform_summary(segment, points=WAVEFORM_POINTS):
+    """Peak level (0-1) of each of `points` equal slices of a mono recording"""
+    samples = np.abs(np.array(segment.get_array_of_samples(), dtype=np.float64))
+    if not len(samples):
+        return []
+    full_scale = float(1 << (8 * segment.sample_width - 1))
+    return [round(float(chunk.max()) / full_scale, 3) for chunk in np.array_split(samples, min(points, len(samples)))]
+
+def transcode_audio(source_path, audio_dir):
+    """Decode, downmix, normalize and re-encode a recording; returns (output_path, duration_seconds, waveform)"""
+    from pydub import AudioSegment
+
+    extension = os.path.splitext(source_path)[1].lower()
+    if extension != ".wav" and not ffmpeg_available():
+        raise RuntimeError(f"ffmpeg is needed to decode {extension} audio")
+    segment = normalize_loudness(AudioSegment.from_file(source_path).set_channels(1))
+    base = os.path.splitext(source_path)[0]
+    fd, temp_path = tempfile.mkstemp(dir=audio_dir, suffix=".part")
+    os.close(fd)
+    try:
+        if ffmpeg_available():
+            output_path = f"{base}.speech.mp3"
+            segment.set_frame_rate(OUTPUT_SAMPLE_RATE).export(temp_path, format="mp3", bitrate=OUTPUT_BITRATE)
+        else:
+            output_path = f"{base}.speech.wav"
+            segment.set_frame_rate(FALLBACK_SAMPLE_RATE).set_sample_width(2).export(temp_path, format="wav")
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return output_path, len(segment) / 1000, waveform_summary(segment)
+
+def process_audio(audio_hash, db_path=None):
+    """Transcode one stored recording in place of its original and record its duration and waveform"""
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT path FROM audio_files WHERE hash = ? AND processing_status != 'done'", (audio_hash,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        source_path = row[0]
+        cursor.execute("UPDATE audio_files SET processing_status = 'processing' WHERE hash = ?", (audio_hash,))
+        conn.commit()
+
+        try:
+            output_path, duration, waveform = transcode_audio(source_path, os.path.dirname(source_path))
+        except Exception as e:
+            # The original stays in place and is served as uploaded
+            cursor.execute(
+                "UPDATE audio_files SET processing_status = 'failed', processing_error = ? WHERE hash = ?",
+                (str(e)[:500], audio_hash)
+            )
+            conn.commit()
+            return
+
+        cursor.execute("""
+            UPDATE audio_files
+            SET path = ?, size = ?, duration_seconds = ?, waveform = ?, processing_status = 'done', processing_error = NULL
+            WHERE hash = ?
+        """, (output_path, os.path.getsize(output_path), duration, json.dumps(waveform), audio_hash))
+        if cursor.rowcount == 0:
+            # Every task using the recording was deleted while it was being processed
+            conn.commit()
+            os.remove(output_path)
+            return
+        cursor.execute("UPDATE dictation_tasks SET audio_file = ? WHERE audio_hash = ?", (output_path, audio_hash))
+        conn.commit()
+    finally:
+        conn.close()
+
+    if os.path.abspath(output_path) != os.path.abspath(source_path) and os.path.exists(source_path):
+        os.remove(source_path)
+
+def queue_audio_processing(audio_hash, db_path=None):
+    """Transcode a recording on the background worker; returns the Future"""
+    return _executor.submit(process_audio, audio_hash, db_path or DB_PATH)
+
+def resume_audio_processing(db_path=None):
+    """Queue recordings left unprocessed (e.g. by a restart), once per database per process"""
+    db_path = db_path or DB_PATH
+    with _resume_lock:
+        if db_path in _resumed:
+            return
+        _resumed.add(db_path)
+    conn = get_connection(db_path)
+    try:
+        pending = conn.execute(
+            "SELECT hash FROM audio_files WHERE processing_status IN ('pending', 'processing')"
+        ).fetchall()
+    finally:
+        conn.close()
+    for (audio_hash,) in pending:
+        queue_audio_processing(audio_hash, db_path)
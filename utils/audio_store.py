@@ -0,0 +1,140 @@
+import glob
+import hashlib
+import os
+import tempfile
+
+from utils.database import DB_PATH, get_connection
+
+# Audio lives next to the database, one file per distinct recording named by its SHA-256
+AUDIO_DIR = os.path.join(os.path.dirname(DB_PATH) or ".", "audio")
+
+# Uploads are copied and hashed this many bytes at a time
+CHUNK_SIZE = 1024 * 1024
+
+def audio_path(audio_hash, extension, audio_dir=None):
+    """Where a recording is stored - fanned out by the first two hex digits of its hash"""
+    return os.path.join(audio_dir or AUDIO_DIR, audio_hash[:2], f"{audio_hash}{extension}")
+
+def write_audio(cursor, source, filename, audio_dir=None):
+    """Stream a file object into the store in chunks and register it, returning (hash, path)
+
+    Identical recordings are stored once; the new copy is discarded if the content is
+    already there. The row starts with no references - dictation_tasks triggers count them -
+    and pending processing (see utils/audio_processing.py).
+    """
+    audio_dir = audio_dir or AUDIO_DIR
+    extension = os.path.splitext(filename)[1].lower()
+    os.makedirs(audio_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=audio_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        audio_hash = digest.hexdigest()
+
+        cursor.execute("SELECT path FROM audio_files WHERE hash = ?", (audio_hash,))
+        row = cursor.fetchone()
+        if row and os.path.exists(row[0]):
+            os.remove(temp_path)
+            return audio_hash, row[0]
+
+        path = audio_path(audio_hash, extension, audio_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    cursor.execute("""
+        INSERT INTO audio_files (hash, path, size, original_name) VALUES (?, ?, ?, ?)
+        ON CONFLICT (hash) DO UPDATE SET path = excluded.path, size = excluded.size, processing_status = 'pending'
+    """, (audio_hash, path, size, filename))
+    return audio_hash, path
+
+def create_dictation_task(name, transcript, source=None, filename=None):
+    """Create a dictation task, storing its recording (if any) in the same transaction; returns the audio hash
+
+    The recording is registered and referenced at once, so release_audio never sees it unused
+    in between, and a failed insert leaves no unreferenced file behind.
+    """
+    # Tasks and recordings are shared, so they live in the central database
+    conn = get_connection(DB_PATH)
+    audio_hash = path = None
+    try:
+        cursor = conn.cursor()
+        if source is None:
+            cursor.execute("INSERT INTO dictation_tasks (name, transcript) VALUES (?, ?)", (name, transcript))
+        else:
+            audio_hash, path = write_audio(cursor, source, filename)
+            # The path is read under the write lock: a reused recording may have been transcoded since write_audio
+            # looked, and processing moves every task on to the new file in one transaction
+            cursor.execute("""
+                INSERT INTO dictation_tasks (name, transcript, audio_file, audio_hash)
+                SELECT ?, ?, path, hash FROM audio_files WHERE hash = ?
+            """, (name, transcript, audio_hash))
+        conn.commit()
+        return audio_hash
+    except BaseException:
+        conn.rollback()
+        # Only a recording this upload added is gone with the rollback; one already stored keeps its file
+        if audio_hash and not conn.execute("SELECT 1 FROM audio_files WHERE hash = ?", (audio_hash,)).fetchone():
+            _remove_audio_files(audio_hash, path)
+        raise
+    finally:
+        conn.close()
+
+def _remove_audio_files(audio_hash, path):
+    """Delete a recording and everything derived from it - named by its hash - from its directory"""
+    directory = os.path.dirname(path)
+    for file_path in glob.glob(os.path.join(directory, f"{audio_hash}*")):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass  # Already gone - the row is what counts
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass  # The fan-out directory still holds other recordings
+
+def release_audio(audio_hash):
+    """Delete a recording once no dictation task references it; returns True if the file was removed"""
+    if not audio_hash:
+        return False
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT path FROM audio_files WHERE hash = ?", (audio_hash,))
+        row = cursor.fetchone()
+        if not row:
+            return False
+        # Checked and deleted in one statement, so a task created meanwhile keeps its recording
+        cursor.execute("DELETE FROM audio_files WHERE hash = ? AND ref_count <= 0", (audio_hash,))
+        if cursor.rowcount == 0:
+            return False
+        conn.commit()
+    finally:
+        conn.close()
+
+    # The recording, its transcoded copy and any phrase clips cut from it
+    _remove_audio_files(audio_hash, row[0])
+    return True
+
+def import_legacy_audio(cursor, audio_dir=None):
+    """Move audio saved under the old {task_name}_{filename} scheme into the store and link the tasks"""
+    cursor.execute("SELECT id, audio_file FROM dictation_tasks WHERE audio_file IS NOT NULL AND audio_hash IS NULL")
+    imported = {}
+    for task_id, old_path in cursor.fetchall():
+        if old_path not in imported:
+            if not os.path.exists(old_path):
+                continue
+            with open(old_path, "rb") as source:
+                imported[old_path] = write_audio(cursor, source, old_path, audio_dir)
+            if os.path.abspath(imported[old_path][1]) != os.path.abspath(old_path):
+                os.remove(old_path)
+        audio_hash, path = imported[old_path]
+        cursor.execute("UPDATE dictation_tasks SET audio_file = ?, audio_hash = ? WHERE id = ?", (path, audio_hash, task_id))
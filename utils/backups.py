@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from utils.change_journal import prune_change_journal
+from utils.database import DB_PATH, SHARD_DIR, is_shard, on_database_server, shard_paths
+
+# Snapshots live next to the database: a JSON manifest per snapshot, and the database pages
+# they list stored once each in a content-addressed chunk store shared by every snapshot
+BACKUP_DIR = os.path.join(os.path.dirname(DB_PATH) or ".", "backups")
+
+# Pages per chunk - a snapshot only stores the chunks that changed since any earlier snapshot
+CHUNK_PAGES = 64
+CHUNK_COMPRESSION_LEVEL = 1
+
+# The copy runs a few pages at a time, letting teachers' writes in between steps. If writes
+# keep restarting it, it falls back to one pass, which holds the read lock only as long as a file copy.
+PAGES_PER_STEP = 256
+STEP_SLEEP_SECONDS = 0.005
+MAX_RESTARTS = 3
+
+# Scheduled snapshots (CLASS_TRACKER_BACKUP_INTERVAL minutes, 0 turns them off) and retention
+BACKUP_INTERVAL_MINUTES = float(os.environ.get("CLASS_TRACKER_BACKUP_INTERVAL", "60"))
+STARTUP_DELAY_SECONDS = 60
+KEEP_RECENT = 24
+KEEP_DAILY = 30
+
+_backup_lock = threading.Lock()
+_scheduler_lock = threading.Lock()
+_schedulers = {}
+
+class _TooBusy(Exception):
+    pass
+
+def _chunk_path(backup_dir, digest):
+    return os.path.join(backup_dir, "chunks", digest[:2], digest)
+
+def _manifest_dir(backup_dir):
+    return os.path.join(backup_dir, "snapshots")
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _last_write_ns(db_path):
+    """When a database was last written - under WAL, recent commits only touch the -wal file until a checkpoint"""
+    return max(os.stat(path).st_mtime_ns for path in (db_path, db_path + "-wal") if os.path.exists(path))
+
+def copy_database(source_path, target_path, pages=PAGES_PER_STEP, sleep=STEP_SLEEP_SECONDS):
+    """Consistent copy of a live database through SQLite's backup API; returns how many times writes restarted it"""
+    source = sqlite3.connect(source_path, timeout=30)
+    target = sqlite3.connect(target_path)
+    restarts = 0
+    remaining_before = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, remaining_before
+        if remaining_before is not None and remaining > remaining_before:
+            restarts += 1
+            if restarts > MAX_RESTARTS:
+                raise _TooBusy()
+        remaining_before = remaining
+
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        except _TooBusy:
+            source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+    return restarts
+
+def take_snapshot(reason="scheduled", db_path=None, backup_dir=None):
+    """Back up the database online and store the chunks not already held; returns the new manifest"""
+    db_path = db_path or DB_PATH
+    backup_dir = backup_dir or BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+
+    with _backup_lock:
+        started = time.perf_counter()
+        source_mtime_ns = _last_write_ns(db_path)
+        fd, copy_path = tempfile.mkstemp(dir=backup_dir, suffix=".db.part")
+        os.close(fd)
+        try:
+            restarts = copy_database(db_path, copy_path)
+            copy_seconds = time.perf_counter() - started
+
+            conn = sqlite3.connect(copy_path)
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            conn.close()
+
+            chunk_size = page_size * CHUNK_PAGES
+            whole = hashlib.sha256()
+            chunks = []
+            new_chunks = 0
+            new_bytes = 0
+            with open(copy_path, "rb") as copy:
+                while chunk := copy.read(chunk_size):
+                    whole.update(chunk)
+                    digest = hashlib.sha256(chunk).hexdigest()
+                    path = _chunk_path(backup_dir, digest)
+                    if not os.path.exists(path):
+                        stored = zlib.compress(chunk, CHUNK_COMPRESSION_LEVEL)
+                        _write_atomic(path, stored)
+                        new_chunks += 1
+                        new_bytes += len(stored)
+                    chunks.append(digest)
+            size = os.path.getsize(copy_path)
+        finally:
+            os.remove(copy_path)
+
+        created_at = datetime.now()
+        manifest = {
+            "id": created_at.strftime("%Y%m%d-%H%M%S-%f"),
+            "created_at": created_at.isoformat(timespec="seconds"),
+            "reason": reason,
+            "source": os.path.abspath(db_path),
+            "source_mtime_ns": source_mtime_ns,
+            "size": size,
+            "page_size": page_size,
+            "chunk_size": chunk_size,
+            "sha256": whole.hexdigest(),
+            "chunks": chunks,
+            "new_chunks": new_chunks,
+            "new_bytes": new_bytes,
+            "restarts": restarts,
+            "copy_seconds": round(copy_seconds, 3),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        _write_atomic(os.path.join(_manifest_dir(backup_dir), f"{manifest['id']}.json"),
+                      json.dumps(manifest).encode("utf-8"))
+        return manifest
+
+def list_snapshots(backup_dir=None):
+    """Every snapshot's manifest, newest first"""
+    manifest_dir = _manifest_dir(backup_dir or BACKUP_DIR)
+    if not os.path.isdir(manifest_dir):
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(manifest_dir), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(manifest_dir, name), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+    return snapshots
+
+def prune_snapshots(keep_recent=KEEP_RECENT, keep_daily=KEEP_DAILY, backup_dir=None):
+    """Keep the newest keep_recent snapshots plus the last of each of the keep_daily most recent days,
+    then delete chunks no remaining snapshot uses; returns (snapshots_removed, chunks_removed)"""
+    backup_dir = backup_dir or BACKUP_DIR
+    with _backup_lock:
+        snapshots = list_snapshots(backup_dir)
+        keep = {snapshot["id"] for snapshot in snapshots[:keep_recent]}
+        days = []
+        for snapshot in snapshots:
+            day = snapshot["created_at"][:10]
+            if day not in days:
+                days.append(day)
+                if len(days) <= keep_daily:
+                    keep.add(snapshot["id"])
+
+        removed = 0
+        for snapshot in snapshots:
+            if snapshot["id"] not in keep:
+                os.remove(os.path.join(_manifest_dir(backup_dir), f"{snapshot['id']}.json"))
+                removed += 1
+
+        in_use = {digest for snapshot in snapshots if snapshot["id"] in keep for digest in snapshot["chunks"]}
+        chunks_removed = 0
+        chunk_root = os.path.join(backup_dir, "chunks")
+        for fan_out in os.listdir(chunk_root) if os.path.isdir(chunk_root) else []:
+            fan_out_dir = os.path.join(chunk_root, fan_out)
+            for digest in os.listdir(fan_out_dir):
+                if digest not in in_use:
+                    os.remove(os.path.join(fan_out_dir, digest))
+                    chunks_removed += 1
+            try:
+                os.rmdir(fan_out_dir)
+            except OSError:
+                pass  # Still holds chunks in use
+        return removed, chunks_removed
+
+def assemble_snapshot(snapshot_id, target_path, backup_dir=None):
+    """Rebuild a snapshot's database file at target_path from its chunks, checking its hash; returns the manifest"""
+    backup_dir = backup_dir or BACKUP_DIR
+    manifest_path = os.path.join(_manifest_dir(backup_dir), f"{snapshot_id}.json")
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No snapshot {snapshot_id}")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    whole = hashlib.sha256()
+    with open(target_path, "wb") as out:
+        for digest in manifest["chunks"]:
+            with open(_chunk_path(backup_dir, digest), "rb") as stored:
+                chunk = zlib.decompress(stored.read())
+            whole.update(chunk)
+            out.write(chunk)
+    if whole.hexdigest() != manifest["sha256"]:
+        raise ValueError(f"Snapshot {snapshot_id} is damaged - its chunks don't match the recorded hash")
+    return manifest
+
+def restore_snapshot(snapshot_id, db_path=None, backup_dir=None):
+    """Replace the database's contents with a snapshot, keeping a snapshot of what it replaces
+
+    The restored pages are written through the backup API, so open connections see the
+    restored data on their next query instead of a file swapped out underneath them.
+    Recordings in the audio store are not part of snapshots. Returns the restored manifest.
+    """
+    db_path = db_path or DB_PATH
+    backup_dir = backup_dir or BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+    fd, restored_path = tempfile.mkstemp(dir=backup_dir, suffix=".db.part")
+    os.close(fd)
+    try:
+        manifest = assemble_snapshot(snapshot_id, restored_path, backup_dir)
+        restored = sqlite3.connect(restored_path)
+        try:
+            check = restored.execute("PRAGMA quick_check").fetchone()[0]
+            if check != "ok":
+                raise ValueError(f"Snapshot {snapshot_id} failed its integrity check: {check}")
+            if os.path.exists(db_path):
+                take_snapshot(f"before restoring {snapshot_id}", db_path, backup_dir)
+            target = sqlite3.connect(db_path, timeout=30)
+            try:
+                restored.backup(target)
+            finally:
+                target.close()
+        finally:
+            restored.close()
+    finally:
+        os.remove(restored_path)
+    return manifest
+
+def backup_if_changed(db_path=None, backup_dir=None):
+    """Take a scheduled snapshot and apply retention, unless nothing was written since the last one"""
+    db_path = db_path or DB_PATH
+    snapshots = list_snapshots(backup_dir)
+    if snapshots and snapshots[0].get("source_mtime_ns") == _last_write_ns(db_path):
+        return None
+    manifest = take_snapshot("scheduled", db_path, backup_dir)
+    prune_snapshots(backup_dir=backup_dir)
+    return manifest
+
+def backup_dir_for(db_path, backup_dir=None):
+    """Where a database's snapshots go - each teacher shard gets its own folder under the central one"""
+    backup_dir = backup_dir or BACKUP_DIR
+    if is_shard(db_path):
+        return os.path.join(backup_dir, "shards", os.path.splitext(os.path.basename(db_path))[0])
+    return backup_dir
+
+def _run_scheduler(db_path, backup_dir, interval_minutes, stop):
+    stop.wait(STARTUP_DELAY_SECONDS)
+    while not stop.is_set():
+        # The central database also brings along every teacher shard
+        paths = [db_path] + (shard_paths() if SHARD_DIR and db_path == DB_PATH else [])
+        for path in paths:
+            try:
+                backup_if_changed(path, backup_dir_for(path, backup_dir))
+                prune_change_journal(db_path=path)
+            except Exception as e:
+                print(f"Backup warning ({path}): {e}")
+        stop.wait(interval_minutes * 60)
+
+def start_backup_scheduler(db_path=None, backup_dir=None, interval_minutes=None):
+    """Start the background snapshot thread, once per database per process; returns its stop Event"""
+    db_path = db_path or DB_PATH
+    interval_minutes = BACKUP_INTERVAL_MINUTES if interval_minutes is None else interval_minutes
+    # A database server is backed up with its own tools (pg_dump, WAL archiving), not file snapshots
+    if interval_minutes <= 0 or on_database_server(db_path):
+        return None
+    with _scheduler_lock:
+        if db_path not in _schedulers:
+            stop = threading.Event()
+            threading.Thread(
+                target=_run_scheduler, args=(db_path, backup_dir, interval_minutes, stop),
+                name="backup-scheduler", daemon=True
+            ).start()
+            _schedulers[db_path] = stop
+        return _schedulers[db_path]
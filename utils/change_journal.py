@@ -0,0 +1,124 @@
+from utils.database import JOURNALED_TABLES, get_connection
+
+# Journal entries older than this are dropped; snapshots (utils/backups.py) cover anything earlier
+JOURNAL_RETENTION_DAYS = 30
+
+def _check_recording(cursor, audio_hash, task_id):
+    """Refuse to bring back a dictation task whose recording has already been released"""
+    if audio_hash is None:
+        return
+    cursor.execute("SELECT 1 FROM audio_files WHERE hash = ?", (audio_hash,))
+    if not cursor.fetchone():
+        raise ValueError(f"Dictation task {task_id}'s recording has been deleted, so it can't be brought back")
+
+def _revert(cursor, entry_id, table_name, row_id, op, table_columns):
+    """Apply the inverse of one journal entry"""
+    if op == 'insert':
+        cursor.execute(f"DELETE FROM {table_name} WHERE id = ?", (row_id,))
+        return
+    # Columns dropped from the table since the entry was written are left out
+    columns = [col for col in table_columns if col != 'id']
+    cursor.execute(f"SELECT {', '.join(columns)} FROM journal_{table_name} WHERE entry_id = ?", (entry_id,))
+    old_row = cursor.fetchone()
+    if table_name == 'dictation_tasks' and 'audio_hash' in columns:
+        _check_recording(cursor, old_row[columns.index('audio_hash')], row_id)
+    if op == 'update':
+        cursor.execute(
+            f"UPDATE {table_name} SET {', '.join(f'{col} = ?' for col in columns)} WHERE id = ?",
+            (*old_row, row_id)
+        )
+    else:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {table_name} (id, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})",
+            (row_id, *old_row)
+        )
+
+def _revert_entries(cursor, entries):
+    columns = {}
+    for entry_id, table_name, row_id, op in entries:
+        if table_name not in columns:
+            cursor.execute(f"PRAGMA table_info({table_name})")
+            columns[table_name] = [row[1] for row in cursor.fetchall()]
+        _revert(cursor, entry_id, table_name, row_id, op, columns[table_name])
+
+def journal_entries(table_name=None, student_id=None, limit=200):
+    """Most recent journal entries, newest first, as (id, changed_at, table_name, row_id, op, student_id)"""
+    conditions, params = [], []
+    if table_name:
+        conditions.append("table_name = ?")
+        params.append(table_name)
+    if student_id is not None:
+        conditions.append("student_id = ?")
+        params.append(student_id)
+    conn = get_connection()
+    try:
+        return conn.execute(f"""
+            SELECT id, changed_at, table_name, row_id, op, student_id FROM change_journal
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY id DESC LIMIT ?
+        """, (*params, limit)).fetchall()
+    finally:
+        conn.close()
+
+def undo_change(entry_id):
+    """Undo one journaled change; the undo is itself journaled, so it can be undone too"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, table_name, row_id, op FROM change_journal WHERE id = ?", (entry_id,))
+        entries = cursor.fetchall()
+        if not entries:
+            raise ValueError(f"No journal entry {entry_id}")
+        _revert_entries(cursor, entries)
+        conn.commit()
+    finally:
+        conn.close()
+
+def restore_to(as_of, table_name=None, student_id=None):
+    """Roll a table, a student's rows, or everything journaled back to how it was at `as_of` (UTC)
+
+    Every later change that matches is undone, newest first, in one transaction.
+    Returns how many changes were undone.
+    """
+    conditions, params = ["changed_at > ?"], [as_of]
+    if table_name:
+        if table_name not in JOURNALED_TABLES:
+            raise ValueError(f"{table_name} is not journaled")
+        conditions.append("table_name = ?")
+        params.append(table_name)
+    if student_id is not None:
+        conditions.append("student_id = ?")
+        params.append(student_id)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT id, table_name, row_id, op FROM change_journal
+            WHERE {' AND '.join(conditions)} ORDER BY id DESC
+        """, params)
+        entries = cursor.fetchall()
+        _revert_entries(cursor, entries)
+        conn.commit()
+        return len(entries)
+    finally:
+        conn.close()
+
+def prune_change_journal(days=JOURNAL_RETENTION_DAYS, db_path=None):
+    """Delete journal entries older than `days`; returns how many were removed"""
+    # Without the central database attached, so a shard never reaches into its journal tables
+    conn = get_connection(db_path, attach_central=False)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM change_journal WHERE changed_at < strftime('%Y-%m-%d %H:%M:%f', 'now', ?)",
+                       (f"-{days} days",))
+        last_id = cursor.fetchone()[0]
+        # Entry ids grow with time, so everything up to the last old entry goes
+        for table in JOURNALED_TABLES:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (f"journal_{table}",))
+            if cursor.fetchone():
+                cursor.execute(f"DELETE FROM journal_{table} WHERE entry_id <= ?", (last_id,))
+        cursor.execute("DELETE FROM change_journal WHERE id <= ?", (last_id,))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
@@ -1,14 +1,406 @@
 import sqlite3
 import os
+import re
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-DB_PATH = "database/school.db"
+from utils.text_compression import COMPRESSED_TEXT_COLUMNS, compress_text, decompress_text, register_text_functions
+from utils.feedback_texts import FEEDBACK_COLUMNS, feedback_id, store_feedback
+from utils.storage_backends import SQLiteBackend, postgres_schema, storage_backend
 
-def init_database():
-    """Initialize the SQLite database with all required tables"""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+DB_PATH = os.environ.get("CLASS_TRACKER_DB", "database/school.db")
+
+# Where the app database (DB_PATH) lives - a SQLite file unless CLASS_TRACKER_DATABASE_URL names a
+# PostgreSQL server. Other paths (shards, snapshots, archives, benchmark copies) are always SQLite files.
+BACKEND = storage_backend()
+_SQLITE_FILES = SQLiteBackend()
+
+# Optional per-teacher shards: when set, each teacher's classroom data lives in its own file in
+# this folder and DB_PATH keeps only the shared tables (see shard_database.py). A PostgreSQL
+# server already takes writers concurrently, so shards are SQLite only.
+SHARD_DIR = os.environ.get("CLASS_TRACKER_SHARD_DIR") if BACKEND.file_based else None
+
+# Sample sentences per grammar error type, shared by the demo and synthetic data generators
+GRAMMAR_ERROR_EXAMPLES = {
+    'subject-verb agreement': 'She don\'t like apples',
+    'verb tense': 'Yesterday I go to the store',
+    'articles': 'I saw a elephant at zoo',
+    'prepositions': 'I am good in math',
+    'word order': 'Always I do my homework',
+    'plurals': 'I have two childs',
+    'pronouns': 'Me and him went to school'
+}
+
+# Essay criteria, each scored out of 25 (ISA Year 4 rubric)
+ESSAY_CRITERIA = ('content_ideas', 'organization', 'language_use', 'conventions')
+
+# Labels used by the old free-text breakdown ("Organization: 18/20, Content: 17/20, ...")
+LEGACY_CRITERIA_LABELS = {
+    'content': 'content_ideas',
+    'content & ideas': 'content_ideas',
+    'organization': 'organization',
+    'language': 'language_use',
+    'language use': 'language_use',
+    'mechanics': 'conventions',
+    'conventions': 'conventions',
+}
+
+def criterion_score(value):
+    """A criterion score as stored - rounded and clamped to 0-25 - or None if it isn't a number"""
+    if isinstance(value, dict):
+        value = value.get('score')
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().split('/')[0])
+        except ValueError:
+            return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        return None
+    return max(0, min(25, int(round(value))))
+
+def parse_criteria_breakdown(breakdown):
+    """Parse a stored criteria breakdown (JSON or legacy text) into {criterion: score out of 25}"""
+    if not breakdown or not breakdown.strip():
+        return None
+    try:
+        data = json.loads(breakdown)
+    except (json.JSONDecodeError, TypeError):
+        data = None
     
-    conn = sqlite3.connect(DB_PATH)
+    scores = {}
+    if isinstance(data, dict):
+        for criterion in ESSAY_CRITERIA:
+            score = criterion_score(data.get(criterion))
+            if score is not None:
+                scores[criterion] = score
+    else:
+        # Legacy text may be out of any maximum, so rescale each part to 25
+        for label, score, out_of in re.findall(r"([A-Za-z& ]+):\s*(\d+(?:\.\d+)?)\s*/\s*(\d+)", breakdown):
+            criterion = LEGACY_CRITERIA_LABELS.get(label.strip().lower())
+            if criterion and float(out_of) > 0:
+                scores[criterion] = int(round(float(score) * 25 / float(out_of)))
+    
+    scores = {criterion: max(0, min(25, score)) for criterion, score in scores.items()}
+    return scores or None
+
+# Full-text search indexes: source table -> indexed text columns
+SEARCH_INDEXES = {
+    'comments': ('comment', 'evidence'),
+    'essay_marks': ('essay_title', 'essay_text', 'feedback_en'),
+    'grammar_errors': ('example',),
+}
+
+def _indexed_value(table, column, row, compressed):
+    """SQL for a search-indexed column of the new/old row inside a trigger"""
+    if column in FEEDBACK_COLUMNS.get(table, ()):
+        text = "decompress_text(text)" if compressed else "text"
+        return f"(SELECT {text} FROM feedback_texts WHERE id = {row}.{column}_id)"
+    if compressed and column in COMPRESSED_TEXT_COLUMNS.get(table, ()):
+        return f"decompress_text({row}.{column})"
+    return f"{row}.{column}"
+
+def create_search_indexes(cursor, compressed=False):
+    """Create FTS5 indexes over the free-text columns, kept in sync with their tables by triggers
+
+    Tables with shared feedback are indexed and snippeted through their {table}_plain
+    view, and the triggers look up (and with text compression, inflate) what they index.
+    """
+    for table, columns in SEARCH_INDEXES.items():
+        fts = f"{table}_fts"
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,))
+        exists = cursor.fetchone()
+        
+        content = f"{table}_plain" if table in PLAIN_VIEW_TABLES else table
+        column_list = ", ".join(columns)
+        watched_columns = ", ".join(
+            f"{col}_id" if col in FEEDBACK_COLUMNS.get(table, ()) else col for col in columns
+        )
+        new_values = ", ".join(_indexed_value(table, col, "new", compressed) for col in columns)
+        old_values = ", ".join(_indexed_value(table, col, "old", compressed) for col in columns)
+        
+        # External-content tables store only the index; the text stays in the source table
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column_list}, content='{content}', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {watched_columns} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {fts} (rowid, {column_list}) VALUES (new.id, {new_values});
+            END
+        """)
+        
+        # Index rows written before search existed
+        if not exists:
+            cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def drop_search_index(cursor, table):
+    """Drop a table's FTS index and its triggers (create_search_indexes rebuilds them)"""
+    for event in ('insert', 'delete', 'update'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{event}")
+    cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+# Tables readable as plain text, feedback included, through a {table}_plain view
+PLAIN_VIEW_TABLES = ('essay_marks', 'dictation_scores')
+
+def create_plain_views(cursor, compressed=False):
+    """Create the {table}_plain views - every column, feedback text joined back in, prose inflated"""
+    for table in PLAIN_VIEW_TABLES:
+        packed = COMPRESSED_TEXT_COLUMNS.get(table, ()) if compressed else ()
+        cursor.execute(f"PRAGMA table_info({table})")
+        view_columns = [
+            f"decompress_text(t.{name}) AS {name}" if name in packed else f"t.{name}"
+            for _, name, *_ in cursor.fetchall()
+        ]
+        joins = []
+        for column in FEEDBACK_COLUMNS.get(table, ()):
+            text = f"{column}_text.text"
+            view_columns.append(f"{'decompress_text(' + text + ')' if compressed else text} AS {column}")
+            joins.append(f"LEFT JOIN feedback_texts {column}_text ON {column}_text.id = t.{column}_id")
+        cursor.execute(f"""
+            CREATE VIEW IF NOT EXISTS {table}_plain AS
+            SELECT {', '.join(view_columns)} FROM {table} t {' '.join(joins)}
+        """)
+
+def text_compression_enabled(cursor):
+    """Whether this database stores its long-text columns compressed"""
+    cursor.execute("SELECT value FROM settings WHERE key = 'text_compression'")
+    row = cursor.fetchone()
+    return row is not None and row[0] == '1'
+
+def set_text_compression(conn, enabled=True, batch_size=1000):
+    """Compress the long-text columns in place (or inflate them back) and re-point search at them
+
+    The connection needs decompress_text() registered; the caller commits and may VACUUM
+    afterwards to hand the freed pages back to the file system.
+    """
+    register_text_functions(conn)
+    cursor = conn.cursor()
+    
+    # Re-encoding doesn't change what any row says, so it stays out of the change journal
+    drop_journal_triggers(cursor)
+    
+    # Views and search indexes read these columns, so they are rebuilt from the new content below
+    for table in PLAIN_VIEW_TABLES:
+        if table in SEARCH_INDEXES:
+            drop_search_index(cursor, table)
+        cursor.execute(f"DROP VIEW IF EXISTS {table}_plain")
+    
+    convert = compress_text if enabled else decompress_text
+    for table, columns in COMPRESSED_TEXT_COLUMNS.items():
+        assignments = ", ".join(f"{col} = ?" for col in columns)
+        # feedback_texts ids are hashes and can be negative, so the first batch has no lower bound
+        last_id = None
+        while True:
+            cursor.execute(
+                f"SELECT id, {', '.join(columns)} FROM {table} "
+                f"{'' if last_id is None else 'WHERE id > ?'} ORDER BY id LIMIT ?",
+                (batch_size,) if last_id is None else (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            # Compressing already-compressed values (or inflating plain ones) leaves them as they are
+            cursor.executemany(
+                f"UPDATE {table} SET {assignments} WHERE id = ?",
+                [tuple(convert(decompress_text(value)) for value in values) + (row_id,) for row_id, *values in rows]
+            )
+            last_id = rows[-1][0]
+    
+    cursor.execute("UPDATE settings SET value = ? WHERE key = 'text_compression'", ('1' if enabled else '0',))
+    create_plain_views(cursor, compressed=enabled)
+    create_search_indexes(cursor, compressed=enabled)
+    create_journal_triggers(cursor)
+
+def encode_long_text(*values):
+    """Long-text values as they should be written - compressed if the database has text compression enabled"""
+    conn = get_connection()
+    try:
+        enabled = text_compression_enabled(conn.cursor())
+    finally:
+        conn.close()
+    return tuple(compress_text(value) for value in values) if enabled else values
+
+def create_audio_triggers(cursor):
+    """Keep audio_files.ref_count equal to the number of dictation tasks using each recording"""
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dictation_tasks_audio_insert AFTER INSERT ON dictation_tasks
+        WHEN new.audio_hash IS NOT NULL BEGIN
+            UPDATE audio_files SET ref_count = ref_count + 1 WHERE hash = new.audio_hash;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dictation_tasks_audio_delete AFTER DELETE ON dictation_tasks
+        WHEN old.audio_hash IS NOT NULL BEGIN
+            UPDATE audio_files SET ref_count = ref_count - 1 WHERE hash = old.audio_hash;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dictation_tasks_audio_update AFTER UPDATE OF audio_hash ON dictation_tasks
+        WHEN old.audio_hash IS NOT new.audio_hash BEGIN
+            UPDATE audio_files SET ref_count = ref_count - 1 WHERE hash = old.audio_hash;
+            UPDATE audio_files SET ref_count = ref_count + 1 WHERE hash = new.audio_hash;
+        END
+    ''')
+
+# Tables whose writes bump a version number, so cached analytics know when to recompute
+VERSIONED_TABLES = ('essay_marks',)
+
+def create_version_triggers(cursor):
+    """Keep table_versions.version increasing on every write to the versioned tables"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        cursor.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            """)
+
+def get_table_version(table, every_shard=False):
+    """Current write version of a versioned table - with every_shard, the sum over every teacher's shard"""
+    if every_shard:
+        return sum(row[0] for row in execute_all_shards("SELECT version FROM table_versions WHERE table_name = ?", (table,)))
+    result = execute_query("SELECT version FROM table_versions WHERE table_name = ?", (table,))
+    return result[0][0] if result else 0
+
+# Tables whose inserts, updates and deletes are recorded in change_journal, so they can be undone
+JOURNALED_TABLES = (
+    'users', 'classes', 'students', 'homework', 'comments', 'todos', 'spelling_tests', 'grammar_errors',
+    'essay_marks', 'dictation_tasks', 'dictation_segments', 'dictation_scores', 'dictation_errors',
+)
+
+def _journal_trigger_sql(table, table_columns):
+    """CREATE TRIGGER statements journaling a table, by trigger name"""
+    student = 'id' if table == 'students' else 'student_id' if 'student_id' in table_columns else None
+    entry = f"INSERT INTO change_journal (table_name, row_id, op, student_id) VALUES ('{table}', {{row}}.id, '{{op}}', {{student}});"
+    save_old_row = (f"INSERT INTO journal_{table} (entry_id, {', '.join(table_columns)}) "
+                    f"VALUES (last_insert_rowid(), {', '.join(f'old.{col}' for col in table_columns)});")
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in table_columns)
+    return {
+        f"{table}_journal_insert": f"""CREATE TRIGGER {table}_journal_insert AFTER INSERT ON {table} BEGIN
+            {entry.format(row='new', op='insert', student=f'new.{student}' if student else 'NULL')}
+        END""",
+        f"{table}_journal_update": f"""CREATE TRIGGER {table}_journal_update AFTER UPDATE ON {table} WHEN {changed} BEGIN
+            {entry.format(row='old', op='update', student=f'old.{student}' if student else 'NULL')}
+            {save_old_row}
+        END""",
+        f"{table}_journal_delete": f"""CREATE TRIGGER {table}_journal_delete AFTER DELETE ON {table} BEGIN
+            {entry.format(row='old', op='delete', student=f'old.{student}' if student else 'NULL')}
+            {save_old_row}
+        END""",
+    }
+
+def create_journal_triggers(cursor):
+    """Record every insert, update and delete on the journaled tables in change_journal
+
+    Inserts store only the row id; updates and deletes also copy the old row into
+    journal_{table}, which has the table's columns without its constraints.
+    Triggers and journal tables follow the journaled tables' columns as they change.
+    """
+    # Nothing to check if the schema hasn't changed since the triggers were last built
+    cursor.execute("PRAGMA schema_version")
+    schema_version = str(cursor.fetchone()[0])
+    cursor.execute("SELECT value FROM settings WHERE key = 'journal_schema_version'")
+    if cursor.fetchone() == (schema_version,):
+        return
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_journal (
+            id INTEGER PRIMARY KEY,
+            changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT CHECK(op IN ('insert', 'update', 'delete')) NOT NULL,
+            student_id INTEGER
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_journal_changed_at ON change_journal (changed_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_change_journal_student ON change_journal (student_id) WHERE student_id IS NOT NULL")
+    
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%\\_journal\\_%' ESCAPE '\\'")
+    existing = dict(cursor.fetchall())
+    for table in JOURNALED_TABLES:
+        cursor.execute(f"PRAGMA main.table_info({table})")
+        declared = {row[1]: row[2] for row in cursor.fetchall()}
+        if not declared:
+            # Shared tables are absent from teacher shards; the central database journals them
+            continue
+        cursor.execute(f"PRAGMA main.table_info(journal_{table})")
+        journaled = {row[1] for row in cursor.fetchall()}
+        if not journaled:
+            columns = ", ".join(f"{col} {type_}" for col, type_ in declared.items())
+            cursor.execute(f"CREATE TABLE journal_{table} (entry_id INTEGER PRIMARY KEY, {columns})")
+        for col, type_ in declared.items():
+            if journaled and col not in journaled:
+                cursor.execute(f"ALTER TABLE journal_{table} ADD COLUMN {col} {type_}")
+        
+        for name, sql in _journal_trigger_sql(table, list(declared)).items():
+            if existing.get(name) != sql:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cursor.execute(sql)
+    
+    cursor.execute("PRAGMA schema_version")
+    cursor.execute(
+        "INSERT OR REPLACE INTO settings (key, value) VALUES ('journal_schema_version', ?)",
+        (str(cursor.fetchone()[0]),)
+    )
+
+def drop_journal_triggers(cursor):
+    """Stop journaling, for bulk rewrites that change how rows are stored rather than what they say"""
+    for table in JOURNALED_TABLES:
+        for event in ('insert', 'update', 'delete'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_journal_{event}")
+
+def backfill_dictation_errors(cursor):
+    """Derive word errors for scores saved before dictation_errors existed, by diffing against the transcript"""
+    from utils.dictation_errors import diff_dictation_words, error_rows
+    
+    cursor.execute("""
+        SELECT ds.id, ds.student_id, ds.task_id, ds.student_text, dt.transcript, ds.created_at
+        FROM dictation_scores ds
+        JOIN dictation_tasks dt ON ds.task_id = dt.id
+    """)
+    rows = []
+    for score_id, student_id, task_id, student_text, transcript, created_at in cursor.fetchall():
+        errors = diff_dictation_words(transcript, decompress_text(student_text))
+        rows.extend(row + (created_at,) for row in error_rows(score_id, student_id, task_id, errors))
+    cursor.executemany(
+        "INSERT INTO dictation_errors (score_id, student_id, task_id, error_type, word, student_word, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+
+def init_database(db_path=None, shard=False):
+    """Initialize the SQLite database with all required tables (a teacher shard leaves out the shared ones)"""
+    if on_database_server(db_path):
+        return _init_server_database()
+    db_path = db_path or DB_PATH
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    
+    conn = sqlite3.connect(db_path)
+    register_text_functions(conn)
+    # WAL lets readers (get_read_connection) keep a consistent snapshot while others write,
+    # without either waiting for the other; the setting is stored in the file
+    conn.execute("PRAGMA journal_mode = WAL")
     cursor = conn.cursor()
     
     # Users/Teachers table
@@ -65,8 +457,10 @@ def init_database():
             name TEXT NOT NULL,
             class_name TEXT NOT NULL,
             teacher_id INTEGER NOT NULL,
+            class_id INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (teacher_id) REFERENCES users (id)
+            FOREIGN KEY (teacher_id) REFERENCES users (id),
+            FOREIGN KEY (class_id) REFERENCES classes (id)
         )
     ''')
     
@@ -113,10 +507,55 @@ def init_database():
             name TEXT NOT NULL,
             transcript TEXT NOT NULL,
             audio_file TEXT,
+            audio_hash TEXT REFERENCES audio_files (hash),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Dictation phrases - a span of the task's recording with a precomputed clip
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dictation_segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            start_ms INTEGER NOT NULL,
+            end_ms INTEGER NOT NULL,
+            text TEXT,
+            clip_path TEXT NOT NULL,
+            FOREIGN KEY (task_id) REFERENCES dictation_tasks (id),
+            UNIQUE (task_id, position)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dictation_tasks_delete_segments AFTER DELETE ON dictation_tasks BEGIN
+            DELETE FROM dictation_segments WHERE task_id = old.id;
+        END
+    ''')
+    
+    # Audio recordings - stored once per distinct content (see utils/audio_store.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS audio_files (
+            hash TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            original_name TEXT,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            duration_seconds REAL,
+            waveform TEXT,
+            processing_status TEXT CHECK(processing_status IN ('pending', 'processing', 'done', 'failed')) DEFAULT 'pending',
+            processing_error TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
     
+    # Feedback texts - each distinct text stored once, keyed by its content hash (see feedback_id)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS feedback_texts (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL
+        )
+    ''')
+    
     # Dictation scores
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS dictation_scores (
@@ -125,13 +564,39 @@ def init_database():
             task_id INTEGER,
             student_text TEXT NOT NULL,
             score REAL NOT NULL,
-            feedback_en TEXT,
-            feedback_zh TEXT,
+            feedback_en_id INTEGER REFERENCES feedback_texts (id),
+            feedback_zh_id INTEGER REFERENCES feedback_texts (id),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students (id),
+            FOREIGN KEY (task_id) REFERENCES dictation_tasks (id)
+        )
+    ''')
+    
+    # Dictation errors - one row per wrong word in a scored attempt
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dictation_errors'")
+    dictation_errors_existed = cursor.fetchone() is not None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dictation_errors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            score_id INTEGER NOT NULL,
+            student_id INTEGER NOT NULL,
+            task_id INTEGER NOT NULL,
+            error_type TEXT CHECK(error_type IN ('missed_word', 'extra_word', 'misspelled_word', 'wrong_word')) NOT NULL,
+            word TEXT NOT NULL,
+            student_word TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (score_id) REFERENCES dictation_scores (id),
             FOREIGN KEY (student_id) REFERENCES students (id),
             FOREIGN KEY (task_id) REFERENCES dictation_tasks (id)
         )
     ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dictation_scores_delete_errors AFTER DELETE ON dictation_scores BEGIN
+            DELETE FROM dictation_errors WHERE score_id = old.id;
+        END
+    ''')
+    if not dictation_errors_existed:
+        backfill_dictation_errors(cursor)
     
     # Spelling tests
     cursor.execute('''
@@ -181,14 +646,46 @@ def init_database():
             essay_type TEXT CHECK(essay_type IN ('opinion_argumentative', 'creative_narrative')) NOT NULL,
             essay_text TEXT NOT NULL,
             score INTEGER,
-            feedback_en TEXT,
-            feedback_zh TEXT,
+            feedback_en_id INTEGER REFERENCES feedback_texts (id),
+            feedback_zh_id INTEGER REFERENCES feedback_texts (id),
             criteria_breakdown TEXT,
+            content_ideas INTEGER CHECK(content_ideas BETWEEN 0 AND 25),
+            organization INTEGER CHECK(organization BETWEEN 0 AND 25),
+            language_use INTEGER CHECK(language_use BETWEEN 0 AND 25),
+            conventions INTEGER CHECK(conventions BETWEEN 0 AND 25),
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (student_id) REFERENCES students (id)
         )
     ''')
     
+    # Database-wide storage options
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    # Closed terms moved out to their own files (see utils/term_archive.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS term_archives (
+            schema_name TEXT PRIMARY KEY,
+            label TEXT NOT NULL,
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            file TEXT NOT NULL,
+            row_count INTEGER NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Databases compressed before this table existed are recognised by their essay_marks_plain view
+    cursor.execute('''
+        INSERT OR IGNORE INTO settings (key, value)
+        SELECT 'text_compression', EXISTS (SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = 'essay_marks_plain')
+    ''')
+    compressed = text_compression_enabled(cursor)
+    feedback_migrated = False
+    legacy_audio = False
+    
     # Migrate existing database to add teacher_id columns if they don't exist
     try:
         # Check if classes table has teacher_id column
@@ -204,38 +701,393 @@ def init_database():
         if 'teacher_id' not in students_columns:
             cursor.execute("ALTER TABLE students ADD COLUMN teacher_id INTEGER DEFAULT 1")
             cursor.execute("UPDATE students SET teacher_id = 1 WHERE teacher_id IS NULL")
+        
+        # Link students to classes by id instead of the free-text class_name
+        if 'class_id' not in students_columns:
+            cursor.execute("ALTER TABLE students ADD COLUMN class_id INTEGER REFERENCES classes (id)")
+        cursor.execute("SELECT COUNT(*) FROM students WHERE class_id IS NULL")
+        if cursor.fetchone()[0]:
+            # Students whose class row was never created get one, so every student can be linked
+            cursor.execute("""
+                INSERT OR IGNORE INTO classes (name, teacher_id)
+                SELECT DISTINCT class_name, teacher_id FROM students WHERE class_id IS NULL
+            """)
+            cursor.execute("""
+                UPDATE students SET class_id = (
+                    SELECT c.id FROM classes c
+                    WHERE c.name = students.class_name AND c.teacher_id = students.teacher_id
+                )
+                WHERE class_id IS NULL
+            """)
+        
+        # Move essay criteria out of the criteria_breakdown text into typed columns
+        cursor.execute("PRAGMA table_info(essay_marks)")
+        essay_columns = [col[1] for col in cursor.fetchall()]
+        if 'content_ideas' not in essay_columns:
+            for criterion in ESSAY_CRITERIA:
+                cursor.execute(f"ALTER TABLE essay_marks ADD COLUMN {criterion} INTEGER CHECK({criterion} BETWEEN 0 AND 25)")
+            cursor.execute("SELECT id, criteria_breakdown FROM essay_marks WHERE criteria_breakdown IS NOT NULL")
+            updates = []
+            for essay_id, breakdown in cursor.fetchall():
+                scores = parse_criteria_breakdown(breakdown)
+                if scores:
+                    updates.append(tuple(scores.get(criterion) for criterion in ESSAY_CRITERIA) + (essay_id,))
+            cursor.executemany(
+                "UPDATE essay_marks SET content_ideas = ?, organization = ?, language_use = ?, conventions = ? WHERE id = ?",
+                updates
+            )
+        
+        # Link dictation tasks to content-addressed audio
+        cursor.execute("PRAGMA table_info(dictation_tasks)")
+        if 'audio_hash' not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE dictation_tasks ADD COLUMN audio_hash TEXT REFERENCES audio_files (hash)")
+            legacy_audio = True
+        
+        # Transcoded audio records its duration, waveform and processing state
+        cursor.execute("PRAGMA table_info(audio_files)")
+        if 'processing_status' not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE audio_files ADD COLUMN duration_seconds REAL")
+            cursor.execute("ALTER TABLE audio_files ADD COLUMN waveform TEXT")
+            cursor.execute("""
+                ALTER TABLE audio_files ADD COLUMN processing_status TEXT
+                CHECK(processing_status IN ('pending', 'processing', 'done', 'failed')) DEFAULT 'pending'
+            """)
+            cursor.execute("ALTER TABLE audio_files ADD COLUMN processing_error TEXT")
+        
+        # Move per-row feedback copies into feedback_texts, storing each distinct text once
+        for table, columns in FEEDBACK_COLUMNS.items():
+            cursor.execute(f"PRAGMA table_info({table})")
+            table_columns = [col[1] for col in cursor.fetchall()]
+            if columns[0] not in table_columns:
+                continue
+            
+            # The search index and view read the old columns, so they go first and are recreated below
+            if table in SEARCH_INDEXES:
+                drop_search_index(cursor, table)
+            cursor.execute(f"DROP VIEW IF EXISTS {table}_plain")
+            
+            for column in columns:
+                if f"{column}_id" not in table_columns:
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}_id INTEGER REFERENCES feedback_texts (id)")
+            cursor.execute(f"SELECT id, {', '.join(columns)} FROM {table}")
+            texts = {}
+            updates = []
+            for row_id, *values in cursor.fetchall():
+                values = [decompress_text(value) for value in values]
+                ids = [feedback_id(value) for value in values]
+                texts.update(zip(ids, values))
+                updates.append((*ids, row_id))
+            texts.pop(None, None)
+            store_feedback(cursor, list(texts.values()), compressed)
+            cursor.executemany(
+                f"UPDATE {table} SET {', '.join(f'{column}_id = ?' for column in columns)} WHERE id = ?",
+                updates
+            )
+            for column in columns:
+                cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            feedback_migrated = True
             
     except Exception as e:
         print(f"Migration warning: {e}")
     
+    # Indexes - every page works on one teacher's classes, so teacher_id leads the composite keys
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_classes_teacher_name ON classes (teacher_id, name)")
+    cursor.execute("DROP INDEX IF EXISTS idx_students_teacher_class")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_class ON students (class_id, name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_students_teacher ON students (teacher_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_homework_student_date ON homework (student_id, date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_comments_student ON comments (student_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_spelling_tests_student_week ON spelling_tests (student_id, week_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_grammar_errors_student ON grammar_errors (student_id, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictation_scores_task_student ON dictation_scores (task_id, student_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictation_scores_student ON dictation_scores (student_id)")
+    # Most-missed-word rollups per student/class are answered from this covering index alone
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictation_errors_student_word ON dictation_errors (student_id, word, error_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictation_errors_word_type ON dictation_errors (word, error_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_dictation_errors_score ON dictation_errors (score_id)")
+    cursor.execute("DROP INDEX IF EXISTS idx_essay_marks_student")
+    # Covers per-class criterion averages and trends without touching the essay text
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_essay_marks_student_criteria ON essay_marks
+        (student_id, created_at, score, content_ideas, organization, language_use, conventions)
+    """)
+    
+    create_version_triggers(cursor)
+    create_plain_views(cursor, compressed)
+    create_audio_triggers(cursor)
+    create_journal_triggers(cursor)
+    if legacy_audio:
+        from utils.audio_store import import_legacy_audio
+        
+        # Uploads from before the audio store sit beside the database as {task_name}_{filename}
+        import_legacy_audio(cursor, os.path.join(os.path.dirname(db_path) or ".", "audio"))
+    
+    try:
+        create_search_indexes(cursor, compressed)
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 still run the rest of the app; only search is unavailable
+        print(f"Search index warning: {e}")
+    
+    if shard:
+        # Shard connections reach the shared tables by attaching the central database
+        for table in CENTRAL_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS journal_{table}")
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    
     conn.commit()
+    if feedback_migrated:
+        # Hand the pages the old feedback copies used back to the file system
+        conn.execute("VACUUM")
     conn.close()
 
-def get_connection():
-    """Get database connection"""
-    return sqlite3.connect(DB_PATH)
+# Tables PostgreSQL leaves out: SQLite's change journal (a server has point-in-time recovery of its own)
+SQLITE_ONLY_TABLES = ('journal_', 'change_journal')
+_server_ready = False
+_server_lock = threading.Lock()
+
+def on_database_server(db_path):
+    """Whether a path means the app database on a server backend rather than a SQLite file"""
+    return not BACKEND.file_based and db_path in (None, DB_PATH)
+
+def _init_server_database():
+    """Bring the server database up to the SQLite schema, once per process"""
+    global _server_ready
+    import tempfile
+    from utils.term_archive import ARCHIVED_TABLES
+
+    with _server_lock:
+        if _server_ready:
+            return
+        # The reference schema is whatever init_database builds in a fresh SQLite file
+        with tempfile.TemporaryDirectory() as reference_dir:
+            reference_path = os.path.join(reference_dir, "reference.db")
+            init_database(reference_path)
+            statements = postgres_schema(reference_path, skip=SQLITE_ONLY_TABLES)
+        # Nothing is archived to files, so the history views are just the tables
+        statements += [f"CREATE OR REPLACE VIEW {table}_all AS SELECT * FROM {table}" for table in ARCHIVED_TABLES]
+
+        conn = BACKEND.connect()
+        try:
+            cursor = conn.cursor()
+            for statement in statements:
+                if isinstance(statement, tuple):
+                    cursor.execute(*statement)
+                else:
+                    cursor.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+        BACKEND.reset_schema_cache()
+        _server_ready = True
+
+# Optional callback run on every new connection; the page benchmarks use it to count and time queries
+_connection_hook = None
+
+def set_connection_hook(callback):
+    """Register a callback that receives each new connection (None to disable)"""
+    global _connection_hook
+    _connection_hook = callback
+
+# Tables every teacher shares, kept in the central database when per-teacher shards are on;
+# everything else (classes, students and their records) lives in the teacher's shard
+CENTRAL_TABLES = ('users', 'todos', 'dictation_tasks', 'dictation_segments', 'audio_files')
+
+# Shard row ids start at teacher_id * SHARD_ID_SPAN, so ids stay unique across shards
+SHARD_ID_SPAN = 10 ** 9
+SHARD_FANOUT_WORKERS = 8
+# Independent reads execute_reads runs at once; on a server each holds a pooled connection, and waits for one when all are out
+READ_FANOUT_WORKERS = 8
+
+# The teacher whose shard this thread's queries go to - each Streamlit session runs in its own thread
+_routing = threading.local()
+_ready_shards = set()
+_shard_names = set()
+_shard_lock = threading.Lock()
+
+def shard_path(teacher_id):
+    """File holding one teacher's classroom data"""
+    return os.path.join(SHARD_DIR, f"teacher_{teacher_id}.db")
+
+def is_shard(db_path):
+    return bool(SHARD_DIR) and os.path.dirname(os.path.abspath(db_path)) == os.path.abspath(SHARD_DIR)
+
+def init_shard(teacher_id):
+    """Create (or bring up to date) a teacher's shard, once per process"""
+    path = shard_path(teacher_id)
+    with _shard_lock:
+        if path in _ready_shards:
+            return path
+        init_database(path, shard=True)
+        conn = sqlite3.connect(path)
+        conn.executemany("""
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT name, ? FROM sqlite_master
+            WHERE type = 'table' AND sql LIKE '%AUTOINCREMENT%' AND name NOT IN (SELECT name FROM sqlite_sequence)
+        """, [(teacher_id * SHARD_ID_SPAN,)])
+        conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE seq < ?", (teacher_id * SHARD_ID_SPAN,) * 2)
+        conn.commit()
+        _shard_names.update(row[0] for row in conn.execute("SELECT name FROM sqlite_master"))
+        conn.close()
+        _ready_shards.add(path)
+    return path
+
+def set_current_teacher(teacher_id):
+    """Route this thread's queries to a teacher's shard (None for the central database)"""
+    _routing.teacher_id = teacher_id
+    if SHARD_DIR and teacher_id is not None:
+        init_shard(teacher_id)
+
+def current_database_path():
+    """The database this thread's queries go to by default"""
+    teacher_id = getattr(_routing, 'teacher_id', None)
+    if SHARD_DIR and teacher_id is not None:
+        return shard_path(teacher_id)
+    return DB_PATH
+
+def shard_paths():
+    """Every file holding classroom data - the teacher shards, or just DB_PATH when shards are off"""
+    if not SHARD_DIR:
+        return [DB_PATH]
+    if not os.path.isdir(SHARD_DIR):
+        return []
+    return sorted(
+        os.path.join(SHARD_DIR, name) for name in os.listdir(SHARD_DIR)
+        if re.fullmatch(r"teacher_\d+\.db", name)
+    )
+
+def _route(query):
+    """(database path, whether it needs the central database attached) for one statement"""
+    db_path = current_database_path()
+    if not is_shard(db_path):
+        return db_path, False
+    names = set(re.findall(r"\w+", query.lower()))
+    if not names & set(CENTRAL_TABLES):
+        return db_path, False
+    if not names & _shard_names:
+        # Only shared tables - no need to open the shard at all
+        return DB_PATH, False
+    return db_path, True
+
+def get_connection(db_path=None, attach_central=True):
+    """Get database connection - by default to the current teacher's shard when shards are on"""
+    db_path = db_path or current_database_path()
+    if on_database_server(db_path):
+        return BACKEND.connect()
+    conn = _SQLITE_FILES.connect(db_path)
+    if attach_central and is_shard(db_path):
+        # The shard has no shared tables, so their names resolve to the attached central database
+        conn.execute("ATTACH DATABASE ? AS central", (DB_PATH,))
+    if _connection_hook:
+        _connection_hook(conn)
+    return conn
 
 def execute_query(query, params=None):
     """Execute a query and return results"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    if params:
-        cursor.execute(query, params)
-    else:
-        cursor.execute(query)
-    
-    if query.strip().upper().startswith('SELECT'):
-        results = cursor.fetchall()
+    db_path, attach_central = _route(query)
+    conn = get_connection(db_path, attach_central)
+    try:
+        cursor = conn.cursor()
+        
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        
+        if query.strip().upper().startswith('SELECT'):
+            return cursor.fetchall()
+        else:
+            conn.commit()
+            return cursor.lastrowid
+    finally:
+        # Always - on a database server the connection goes back to the pool
         conn.close()
-        return results
-    else:
+
+def get_read_connection(db_path=None, attach_central=True):
+    """Read-only connection for analytics and dashboards
+
+    All its queries see one consistent snapshot (under WAL, SQLite readers never block
+    writers or wait for them), and any attempt to write through it fails. Close it promptly -
+    an open snapshot holds back WAL checkpoints.
+    """
+    db_path = db_path or current_database_path()
+    if on_database_server(db_path):
+        return BACKEND.connect(read_only=True)
+    conn = _SQLITE_FILES.connect(db_path, read_only=True)
+    if attach_central and is_shard(db_path):
+        conn.execute("ATTACH DATABASE ? AS central", (f"file:{os.path.abspath(DB_PATH)}?mode=ro",))
+    # Attaching has to happen outside a transaction, so the snapshot starts after it
+    conn.execute("BEGIN")
+    if _connection_hook:
+        _connection_hook(conn)
+    return conn
+
+def execute_read(query, params=None):
+    """Run a read-only query on its own snapshot connection and return all rows"""
+    db_path, attach_central = _route(query)
+    conn = get_read_connection(db_path, attach_central)
+    try:
+        return conn.execute(query, params or ()).fetchall()
+    finally:
+        conn.close()
+
+def execute_reads(reads):
+    """Run independent reads at the same time and return their results in the same order
+
+    Each read is a query, a (query, params) pair, or a function taking no arguments (a
+    count across every shard, say). A page's data then takes as long as its slowest read
+    rather than all of them added up. Every read has its own snapshot, so figures loaded
+    together can straddle a save made in between.
+    """
+    # Worker threads start unrouted, so they take on the calling session's teacher
+    teacher_id = getattr(_routing, 'teacher_id', None)
+
+    def run(read):
+        _routing.teacher_id = teacher_id
+        if callable(read):
+            return read()
+        query, params = (read, None) if isinstance(read, str) else read
+        return execute_read(query, params)
+
+    if len(reads) <= 1:
+        return [run(read) for read in reads]
+    with ThreadPoolExecutor(max_workers=min(len(reads), READ_FANOUT_WORKERS)) as pool:
+        return list(pool.map(run, reads))
+
+def _execute_on(db_path, query, params):
+    names = set(re.findall(r"\w+", query.lower()))
+    conn = get_connection(db_path, attach_central=bool(names & set(CENTRAL_TABLES)))
+    try:
+        results = conn.execute(query, params or ()).fetchall()
         conn.commit()
+        return results
+    finally:
         conn.close()
-        return cursor.lastrowid
+
+def execute_all_shards(query, params=None):
+    """Run a statement against every teacher's data, shards in parallel, and return all their rows
+
+    With shards off this is execute_query on the one database. Rows come back shard by
+    shard, so cross-teacher reports aggregate and sort them afterwards.
+    """
+    paths = shard_paths()
+    if len(paths) <= 1:
+        return [row for path in paths for row in _execute_on(path, query, params)]
+    with ThreadPoolExecutor(max_workers=min(len(paths), SHARD_FANOUT_WORKERS)) as pool:
+        results = pool.map(lambda path: _execute_on(path, query, params), paths)
+        return [row for rows in results for row in rows]
+
+def get_teacher_classes(teacher_id):
+    """Map the names of one teacher's classes to their ids"""
+    classes = execute_query("SELECT name, id FROM classes WHERE teacher_id = ? ORDER BY name", (teacher_id,))
+    return {name: class_id for name, class_id in classes}
+
+def get_class_students(class_id):
+    """Get (id, name) for every student in a class"""
+    return execute_query("SELECT id, name FROM students WHERE class_id = ? ORDER BY name", (class_id,))
 
 def insert_demo_data():
     """Insert comprehensive test data for demo purposes"""
+    conn = None
     try:
         conn = get_connection()
         cursor = conn.cursor()
@@ -265,10 +1117,10 @@ def insert_demo_data():
             ("6A Science", demo_user_id)
         ]
         
-        class_ids = []
+        class_ids = {}
         for class_name, teacher_id in demo_classes:
             cursor.execute("INSERT INTO classes (name, teacher_id) VALUES (?, ?)", (class_name, teacher_id))
-            class_ids.append(cursor.lastrowid)
+            class_ids[class_name] = cursor.lastrowid
         
         # Create demo students
         demo_students = [
@@ -286,7 +1138,10 @@ def insert_demo_data():
         
         student_ids = []
         for name, class_name, teacher_id in demo_students:
-            cursor.execute("INSERT INTO students (name, class_name, teacher_id) VALUES (?, ?, ?)", (name, class_name, teacher_id))
+            cursor.execute(
+                "INSERT INTO students (name, class_name, class_id, teacher_id) VALUES (?, ?, ?, ?)",
+                (name, class_name, class_ids[class_name], teacher_id)
+            )
             student_ids.append(cursor.lastrowid)
         
         # Create demo homework records (last 10 days)
@@ -326,21 +1181,12 @@ def insert_demo_data():
                              (student_id, score, 20, week_date, percentage))
         
         # Create demo grammar errors
-        grammar_types = ['subject-verb agreement', 'verb tense', 'articles', 'prepositions', 'word order', 'plurals', 'pronouns']
-        grammar_examples = {
-            'subject-verb agreement': 'She don\'t like apples',
-            'verb tense': 'Yesterday I go to the store',
-            'articles': 'I saw a elephant at zoo',
-            'prepositions': 'I am good in math',
-            'word order': 'Always I do my homework',
-            'plurals': 'I have two childs',
-            'pronouns': 'Me and him went to school'
-        }
+        grammar_types = list(GRAMMAR_ERROR_EXAMPLES)
         
         for student_id in student_ids[:6]:
             import random
             error_type = random.choice(grammar_types)
-            example = grammar_examples[error_type]
+            example = GRAMMAR_ERROR_EXAMPLES[error_type]
             cursor.execute("INSERT INTO grammar_errors (student_id, error_type, example) VALUES (?, ?, ?)",
                          (student_id, error_type, example))
         
@@ -357,12 +1203,13 @@ def insert_demo_data():
             if random.random() < 0.3:
                 student_text = student_text.replace("jumps", "jump")
             score = random.uniform(75, 95)
-            feedback_en = "Good listening skills, minor spelling errors"
-            feedback_zh = "听力技能良好，拼写错误较少"
+            feedback_en_id, feedback_zh_id = store_feedback(
+                cursor, ("Good listening skills, minor spelling errors", "听力技能良好，拼写错误较少")
+            )
             
-            cursor.execute("""INSERT INTO dictation_scores (student_id, task_id, student_text, score, feedback_en, feedback_zh) 
+            cursor.execute("""INSERT INTO dictation_scores (student_id, task_id, student_text, score, feedback_en_id, feedback_zh_id) 
                            VALUES (?, ?, ?, ?, ?, ?)""",
-                         (student_id, task_id, student_text, score, feedback_en, feedback_zh))
+                         (student_id, task_id, student_text, score, feedback_en_id, feedback_zh_id))
         
         # Create demo essay marks
         essay_types = ['opinion_argumentative', 'creative_narrative']
@@ -372,13 +1219,16 @@ def insert_demo_data():
             essay_text = "This is a sample essay text for demonstration purposes. The student wrote about their thoughts and experiences..."
             import random
             score = random.randint(75, 95)
-            feedback_en = "Well-structured essay with clear ideas"
-            feedback_zh = "结构清晰的文章，观点明确"
-            criteria_breakdown = "Organization: 18/20, Content: 17/20, Language: 16/20, Mechanics: 15/20"
+            feedback_en_id, feedback_zh_id = store_feedback(
+                cursor, ("Well-structured essay with clear ideas", "结构清晰的文章，观点明确")
+            )
+            # Spread the total across the four criteria (out of 25 each)
+            criteria = [score // 4 + (1 if n < score % 4 else 0) for n in range(4)]
             
-            cursor.execute("""INSERT INTO essay_marks (student_id, essay_title, essay_type, essay_text, score, feedback_en, feedback_zh, criteria_breakdown) 
-                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                         (student_id, essay_title, essay_type, essay_text, score, feedback_en, feedback_zh, criteria_breakdown))
+            cursor.execute("""INSERT INTO essay_marks (student_id, essay_title, essay_type, essay_text, score, feedback_en_id, feedback_zh_id,
+                                                       content_ideas, organization, language_use, conventions) 
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                         (student_id, essay_title, essay_type, essay_text, score, feedback_en_id, feedback_zh_id, *criteria))
         
         # Create some demo todos
         demo_todos = [
@@ -393,12 +1243,13 @@ def insert_demo_data():
             cursor.execute("INSERT INTO todos (task, status) VALUES (?, ?)", (task, status))
         
         conn.commit()
-        conn.close()
         
         return True, f"Successfully inserted demo data with {len(demo_students)} students across {len(demo_classes)} classes"
         
     except Exception as e:
         if conn:
             conn.rollback()
-            conn.close()
-        return False, f"Error inserting demo data: {str(e)}"
\ No newline at end of file
+        return False, f"Error inserting demo data: {str(e)}"
+    finally:
+        if conn:
+            conn.close()
\ No newline at end of file
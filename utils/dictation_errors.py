@@ -0,0 +1,90 @@
+import difflib
+import re
+
+ERROR_TYPES = ['missed_word', 'extra_word', 'misspelled_word', 'wrong_word']
+
+# A replaced word at least this similar to the right one counts as a misspelling rather than a wrong word
+MISSPELLING_SIMILARITY = 0.6
+
+def normalize_word(text):
+    """Lowercase a word or short phrase and strip punctuation so errors group together"""
+    return " ".join(re.sub(r"[^\w\s']", " ", str(text or "")).lower().split())
+
+def diff_dictation_words(correct_text, student_text):
+    """Word-level errors between the transcript and a student's attempt, in the AI errors format"""
+    correct_words = normalize_word(correct_text).split()
+    student_words = normalize_word(student_text).split()
+    errors = []
+
+    matcher = difflib.SequenceMatcher(None, correct_words, student_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        expected, written = correct_words[i1:i2], student_words[j1:j2]
+        if tag == 'delete':
+            errors.extend({'type': 'missed_word', 'correct': word, 'student': '',
+                           'explanation': f'The speaker said "{word}" but it was not written'} for word in expected)
+        elif tag == 'insert':
+            errors.extend({'type': 'extra_word', 'correct': '', 'student': word,
+                           'explanation': f'"{word}" was written but not said'} for word in written)
+        else:
+            # Pair replaced words up in order; any left over were missed or added
+            for index in range(max(len(expected), len(written))):
+                right = expected[index] if index < len(expected) else ''
+                wrote = written[index] if index < len(written) else ''
+                if not wrote:
+                    error_type = 'missed_word'
+                elif not right:
+                    error_type = 'extra_word'
+                elif difflib.SequenceMatcher(None, right, wrote).ratio() >= MISSPELLING_SIMILARITY:
+                    error_type = 'misspelled_word'
+                else:
+                    error_type = 'wrong_word'
+                errors.append({'type': error_type, 'correct': right, 'student': wrote,
+                               'explanation': f'You wrote "{wrote}" but the speaker said "{right}"'})
+    return errors
+
+def error_rows(score_id, student_id, task_id, errors):
+    """Rows for dictation_errors from an AI or diff errors list (anything but an error of a known type is skipped)"""
+    rows = []
+    for error in errors or []:
+        # A model reply can list bare strings or nulls instead of error objects
+        if not isinstance(error, dict):
+            continue
+        error_type = error.get('type')
+        if error_type not in ERROR_TYPES:
+            continue
+        correct = normalize_word(error.get('correct'))
+        written = normalize_word(error.get('student'))
+        # Extra words have no transcript word, so they are counted under what was written
+        word = correct or written
+        if word:
+            rows.append((score_id, student_id, task_id, error_type, word, written or None))
+    return rows
+
+def save_dictation_score(student_id, task_id, student_text, score, feedback_en, feedback_zh, errors):
+    """Save a dictation score and its word errors in one transaction, returning the score id"""
+    from utils.database import get_connection, text_compression_enabled
+    from utils.feedback_texts import store_feedback
+    from utils.text_compression import compress_text
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        compressed = text_compression_enabled(cursor)
+        if compressed:
+            student_text = compress_text(student_text)
+        feedback_en_id, feedback_zh_id = store_feedback(cursor, (feedback_en, feedback_zh), compressed)
+        cursor.execute(
+            "INSERT INTO dictation_scores (student_id, task_id, student_text, score, feedback_en_id, feedback_zh_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (student_id, task_id, student_text, score, feedback_en_id, feedback_zh_id)
+        )
+        score_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO dictation_errors (score_id, student_id, task_id, error_type, word, student_word) VALUES (?, ?, ?, ?, ?, ?)",
+            error_rows(score_id, student_id, task_id, errors)
+        )
+        conn.commit()
+        return score_id
+    finally:
+        conn.close()
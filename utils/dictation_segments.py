@@ -0,0 +1,170 @@
+import glob
+import os
+import re
+import tempfile
+
+from utils.database import get_connection
+
+# Silence detection: a pause this long, this far below the recording's average loudness, ends a phrase
+MIN_SILENCE_MS = 400
+SILENCE_BELOW_AVERAGE_DB = 16
+SILENCE_SEEK_STEP_MS = 10
+
+# Clips keep a little of the surrounding audio so words aren't cut off
+CLIP_PADDING_MS = 150
+
+MIME_TYPES = {'.mp3': 'audio/mpeg', '.wav': 'audio/wav', '.ogg': 'audio/ogg'}
+
+def audio_mime_type(path):
+    """MIME type for st.audio from a stored file's extension"""
+    return MIME_TYPES.get(os.path.splitext(path)[1].lower(), 'audio/mpeg')
+
+def split_phrases(transcript):
+    """Phrases to dictate - split on | markers if the transcript has any, otherwise into sentences"""
+    if '|' in transcript:
+        parts = transcript.split('|')
+    else:
+        parts = re.split(r'(?<=[.!?;])\s+', transcript)
+    return [" ".join(part.split()) for part in parts if part.strip()]
+
+def align_phrases(phrases, speech_ranges):
+    """Assign phrases to the detected speech, cutting at the pauses nearest each phrase's expected start
+
+    Expected boundaries are placed in proportion to each phrase's word count, so a
+    recording with extra or missing pauses still lines up roughly and can be fixed by hand.
+    Returns [(start_ms, end_ms, text)].
+    """
+    if not phrases or not speech_ranges:
+        return []
+    start, end = speech_ranges[0][0], speech_ranges[-1][1]
+    if len(phrases) == 1:
+        return [(start, end, phrases[0])]
+
+    # Candidate cut points: the middle of every pause between speech ranges
+    pauses = [((previous[1] + following[0]) // 2, previous[1], following[0])
+              for previous, following in zip(speech_ranges, speech_ranges[1:])]
+    word_counts = [len(phrase.split()) for phrase in phrases]
+    total_words = sum(word_counts)
+
+    cuts = []
+    last = -1
+    words_so_far = 0
+    for k, count in enumerate(word_counts[:-1]):
+        words_so_far += count
+        expected = start + (end - start) * words_so_far / total_words
+        # Cuts stay in order, and each later phrase still needs a pause of its own
+        choices = range(last + 1, len(pauses) - (len(phrases) - 2 - k))
+        if choices:
+            last = min(choices, key=lambda i: abs(pauses[i][0] - expected))
+            cuts.append(pauses[last])
+        else:
+            # Too few pauses - cut mid-speech where the phrase should end
+            cut = max(int(expected), cuts[-1][2] if cuts else start)
+            cuts.append((cut, cut, cut))
+
+    segments = []
+    segment_start = start
+    for phrase, (_, pause_start, pause_end) in zip(phrases, cuts):
+        segments.append((segment_start, pause_start, phrase))
+        segment_start = pause_end
+    segments.append((segment_start, end, phrases[-1]))
+    return segments
+
+def detect_segments(audio_path, transcript):
+    """Propose phrase segments for a recording by silence detection"""
+    from pydub import AudioSegment
+    from pydub.silence import detect_nonsilent
+
+    recording = AudioSegment.from_file(audio_path)
+    speech_ranges = detect_nonsilent(
+        recording,
+        min_silence_len=MIN_SILENCE_MS,
+        silence_thresh=recording.dBFS - SILENCE_BELOW_AVERAGE_DB,
+        seek_step=SILENCE_SEEK_STEP_MS,
+    )
+    return align_phrases(split_phrases(transcript), speech_ranges)
+
+def clip_path(audio_path, audio_hash, start_ms, end_ms):
+    """Cached clip file for a span of a stored recording - shared by every task using that span"""
+    extension = os.path.splitext(audio_path)[1]
+    return os.path.join(os.path.dirname(audio_path), f"{audio_hash}.clip-{start_ms}-{end_ms}{extension}")
+
+def build_clips(audio_path, audio_hash, segments):
+    """Cut and save the clips that aren't cached yet; returns their paths in segment order"""
+    recording = None
+    paths = []
+    for start_ms, end_ms, _ in segments:
+        path = clip_path(audio_path, audio_hash, start_ms, end_ms)
+        if not os.path.exists(path):
+            if recording is None:
+                from pydub import AudioSegment
+                recording = AudioSegment.from_file(audio_path)
+            clip = recording[max(0, start_ms - CLIP_PADDING_MS):end_ms + CLIP_PADDING_MS]
+            extension = os.path.splitext(audio_path)[1].lstrip('.').lower() or 'mp3'
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(audio_path), suffix=".part")
+            os.close(fd)
+            try:
+                clip.export(temp_path, format=extension)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        paths.append(path)
+    return paths
+
+def remove_unused_clips(audio_hash, audio_dir):
+    """Delete cached clips of a recording that no segment points at any more"""
+    conn = get_connection()
+    try:
+        in_use = {row[0] for row in conn.execute(
+            "SELECT clip_path FROM dictation_segments WHERE clip_path LIKE ?", (f"%{audio_hash}.clip-%",)
+        )}
+    finally:
+        conn.close()
+    for path in glob.glob(os.path.join(audio_dir, f"{audio_hash}.clip-*")):
+        if path not in in_use:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def save_segments(task_id, segments):
+    """Replace a task's segments with [(start_ms, end_ms, text)], precomputing a clip for each"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT af.hash, af.path FROM dictation_tasks dt
+            JOIN audio_files af ON af.hash = dt.audio_hash
+            WHERE dt.id = ?
+        """, (task_id,))
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError("This task has no audio to segment")
+        audio_hash, audio_path = row
+
+        segments = sorted((int(start), int(end), text) for start, end, text in segments if end > start)
+        paths = build_clips(audio_path, audio_hash, segments)
+        cursor.execute("DELETE FROM dictation_segments WHERE task_id = ?", (task_id,))
+        cursor.executemany(
+            "INSERT INTO dictation_segments (task_id, position, start_ms, end_ms, text, clip_path) VALUES (?, ?, ?, ?, ?, ?)",
+            [(task_id, position, start, end, text, path)
+             for position, ((start, end, text), path) in enumerate(zip(segments, paths), start=1)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    remove_unused_clips(audio_hash, os.path.dirname(audio_path))
+    return len(segments)
+
+def load_segments(task_id):
+    """A task's segments in order as (position, start_ms, end_ms, text, clip_path)"""
+    conn = get_connection()
+    try:
+        return conn.execute("""
+            SELECT position, start_ms, end_ms, text, clip_path FROM dictation_segments
+            WHERE task_id = ? ORDER BY position
+        """, (task_id,)).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.database import ESSAY_CRITERIA, execute_all_shards, get_connection
+
+CRITERIA_LABELS = {
+    'content_ideas': "Content & Ideas",
+    'organization': "Organization",
+    'language_use': "Language Use",
+    'conventions': "Conventions",
+}
+
+ESSAY_TYPE_LABELS = {
+    'opinion_argumentative': "Opinion / Argumentative",
+    'creative_narrative': "Creative / Narrative",
+}
+
+# Score bands of 10 marks; the top band includes 100
+SCORE_BINS = list(range(0, 100, 10)) + [101]
+SCORE_BAND_LABELS = [f"{low}-{low + 9}" for low in range(0, 90, 10)] + ["90-100"]
+
+ESSAY_FRAME_COLUMNS = ['student', 'class_id', 'class_name', 'teacher', 'essay_type', 'score', *ESSAY_CRITERIA, 'created_at']
+
+def fetch_essay_frame(class_ids, every_shard=False):
+    """Fetch the scored columns of every essay in the given classes as one DataFrame
+
+    every_shard reads every teacher's shard (for school-wide views) instead of the current one.
+    """
+    class_ids = list(class_ids)
+    if not class_ids:
+        return pd.DataFrame(columns=ESSAY_FRAME_COLUMNS)
+    placeholders = ", ".join("?" * len(class_ids))
+    # Only covering-index columns plus names - the essay text is never read
+    query = f"""
+        SELECT s.name AS student, c.id AS class_id, c.name AS class_name, u.full_name AS teacher,
+               em.essay_type, em.score,
+               {", ".join(f"em.{criterion}" for criterion in ESSAY_CRITERIA)}, em.created_at
+        FROM essay_marks em
+        JOIN students s ON em.student_id = s.id
+        JOIN classes c ON s.class_id = c.id
+        LEFT JOIN users u ON c.teacher_id = u.id
+        WHERE s.class_id IN ({placeholders})
+    """
+    if every_shard:
+        return pd.DataFrame(execute_all_shards(query, class_ids), columns=ESSAY_FRAME_COLUMNS)
+    # Rows rather than pd.read_sql_query, which only supports sqlite3 among DB-API connections
+    conn = get_connection()
+    try:
+        return pd.DataFrame(conn.execute(query, class_ids).fetchall(), columns=ESSAY_FRAME_COLUMNS)
+    finally:
+        conn.close()
+
+def add_terms(df):
+    """Label each essay with its school term (Aug-Dec T1, Jan-Mar T2, Apr-Jul T3)"""
+    created = pd.to_datetime(df['created_at'], format='ISO8601', errors='coerce')
+    valid = created.notna().to_numpy()
+    df, created = df[valid], created[valid]
+    year = created.dt.year.to_numpy()
+    month = created.dt.month.to_numpy()
+    start_year = np.where(month >= 8, year, year - 1)
+    term = np.select([month >= 8, month <= 3], [1, 2], default=3)
+    # Build labels per distinct term rather than per essay
+    term_order = start_year * 10 + term
+    labels = {order: f"{order // 10}-{(order // 10 + 1) % 100:02d} T{order % 10}" for order in np.unique(term_order)}
+    return df.assign(term_order=term_order, term=pd.Series(term_order, index=df.index).map(labels))
+
+def class_labels(df):
+    """Heatmap row label for each class id - class names repeat across teachers, so those get the teacher's name"""
+    classes = df.groupby('class_id')[['class_name', 'teacher']].first()
+    if classes['teacher'].nunique() <= 1:
+        return classes['class_name']
+    return classes['teacher'].fillna("No teacher") + " – " + classes['class_name']
+
+def compute_essay_analytics(df, heatmap_by='student'):
+    """Aggregate an essay frame into heatmap, term trend and essay-type distribution tables
+
+    heatmap_by is 'student' (one row per student name) or 'class' (one row per class).
+    """
+    if df.empty:
+        return None
+    criteria = list(ESSAY_CRITERIA)
+    df = add_terms(df)
+
+    if heatmap_by == 'class':
+        heatmap = df.groupby('class_id')[criteria].mean()
+        heatmap.index = class_labels(df).loc[heatmap.index].to_numpy()
+    else:
+        heatmap = df.groupby(heatmap_by)[criteria].mean()
+    heatmap = heatmap.rename(columns=CRITERIA_LABELS).sort_index()
+
+    trends = (
+        df.groupby(['term_order', 'term'])[['score'] + criteria].mean()
+        .reset_index(level='term_order', drop=True)
+        .rename(columns={'score': 'Total (/100)', **CRITERIA_LABELS})
+    )
+
+    essay_types = df['essay_type'].map(ESSAY_TYPE_LABELS).fillna(df['essay_type'])
+    score_band = pd.cut(df['score'], bins=SCORE_BINS, labels=SCORE_BAND_LABELS, right=False)
+    distribution = pd.crosstab(score_band, essay_types, dropna=False)
+    distribution.index.name = "Score band"
+
+    type_summary = df.groupby(essay_types)['score'].agg(['count', 'mean', 'median', 'std']).round(1)
+    type_summary.columns = ["Essays", "Mean", "Median", "Std Dev"]
+    type_summary.index.name = "Essay type"
+
+    return {
+        'essays': len(df),
+        'heatmap': heatmap,
+        'trends': trends,
+        'distribution': distribution,
+        'type_summary': type_summary,
+    }
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def load_essay_analytics(class_ids, heatmap_by, data_version, every_shard=False):
+    """Cached analytics for a set of classes - data_version (see get_table_version) invalidates old results"""
+    return compute_essay_analytics(fetch_essay_frame(class_ids, every_shard), heatmap_by)
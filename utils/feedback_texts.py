@@ -0,0 +1,37 @@
+import hashlib
+
+from utils.text_compression import compress_text
+
+# Score tables whose feedback is stored once in feedback_texts and referenced from <column>_id
+FEEDBACK_COLUMNS = {
+    'essay_marks': ('feedback_en', 'feedback_zh'),
+    'dictation_scores': ('feedback_en', 'feedback_zh'),
+}
+
+def feedback_id(text):
+    """Content address of a feedback text - the first 8 bytes of its SHA-256 as a signed 64-bit integer"""
+    if text is None:
+        return None
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big', signed=True)
+
+def store_feedback(cursor, texts, compressed=False):
+    """Insert the feedback texts that aren't stored yet and return their ids (None stays None)"""
+    ids = tuple(feedback_id(text) for text in texts)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO feedback_texts (id, text) VALUES (?, ?)",
+        [(text_id, compress_text(text) if compressed else text) for text_id, text in zip(ids, texts) if text_id is not None]
+    )
+    return ids
+
+def save_feedback(*texts):
+    """Store feedback texts in their own transaction (compressed if the database is) and return their ids"""
+    from utils.database import get_connection, text_compression_enabled
+
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        ids = store_feedback(cursor, texts, text_compression_enabled(cursor))
+        conn.commit()
+        return ids
+    finally:
+        conn.close()
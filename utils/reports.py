@@ -0,0 +1,142 @@
+import html
+import io
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from utils import database
+from utils.student_profiles import load_student_profiles
+
+COMMENT_CATEGORIES = ["English", "UOI", "General Behaviour"]
+
+REPORT_CSS = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 2em; color: #222; }
+h1 { margin-bottom: 0; } .subtitle { color: #666; margin-top: 0.2em; }
+table { border-collapse: collapse; margin: 0.5em 0 1em; }
+td, th { border: 1px solid #ccc; padding: 4px 10px; text-align: left; }
+.evidence { color: #555; font-style: italic; }
+"""
+
+def _percent(value):
+    return "-" if value is None else f"{value:.0f}%"
+
+def render_report_html(profile, term_start, term_end):
+    """Render one student's term report as a standalone HTML page"""
+    e = html.escape
+    homework = profile.homework_counts
+    on_time_rate = profile.homework_on_time_rate
+    parts = [
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{e(profile.name)} - Term Report</title>",
+        f"<style>{REPORT_CSS}</style></head><body>",
+        f"<h1>{e(profile.name)}</h1>",
+        f"<p class='subtitle'>{e(profile.class_name)} · {e(profile.teacher_name)} · {term_start} to {term_end}</p>",
+        "<h2>Summary</h2><table>",
+        f"<tr><th>Homework on time</th><td>{_percent(None if on_time_rate is None else on_time_rate * 100)}"
+        f" ({homework['on_time']} on time, {homework['late']} late, {homework['absent']} absent)</td></tr>",
+        f"<tr><th>Spelling average</th><td>{_percent(profile.spelling_average)} over {len(profile.spelling)} tests</td></tr>",
+        f"<tr><th>Dictation average</th><td>{_percent(profile.dictation_average)} over {len(profile.dictation)} tasks</td></tr>",
+        "</table>",
+    ]
+
+    weak_spots = profile.grammar_weak_spots()
+    if weak_spots:
+        parts.append("<h2>Grammar Focus Areas</h2><ul>")
+        parts.extend(f"<li>{e(error_type)} ({count} errors)</li>" for error_type, count in weak_spots)
+        parts.append("</ul>")
+
+    if profile.essays:
+        parts.append("<h2>Essays</h2><table><tr><th>Date</th><th>Title</th><th>Score</th></tr>")
+        parts.extend(
+            f"<tr><td>{str(essay.created_at)[:10]}</td><td>{e(essay.title)}</td>"
+            f"<td>{'-' if essay.score is None else f'{essay.score}/100'}</td></tr>"
+            for essay in profile.essays
+        )
+        parts.append("</table>")
+
+    for category in COMMENT_CATEGORIES:
+        comments = [comment for comment in profile.comments if comment.category == category]
+        if comments:
+            parts.append(f"<h2>{e(category)}</h2><ul>")
+            for comment in comments:
+                parts.append(f"<li>({str(comment.created_at)[:10]}) {e(comment.comment)}")
+                if comment.evidence:
+                    parts.append(f"<br><span class='evidence'>Evidence: {e(comment.evidence)}</span>")
+                parts.append("</li>")
+            parts.append("</ul>")
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def pdf_available():
+    """PDF output needs the optional weasyprint package"""
+    try:
+        import weasyprint  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def report_filename(profile):
+    """Filesystem-safe name for a report, unique by student id"""
+    safe = lambda text: re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+    return f"{safe(profile.class_name) or 'No_Class'}/{safe(profile.name)}_{profile.id}"
+
+def render_reports(db_path, student_ids, term_start, term_end, formats=("html",)):
+    """Worker entry point - load and render a chunk of reports on its own connection"""
+    if "pdf" in formats:
+        from weasyprint import HTML
+
+    conn = database.get_connection(db_path)
+    try:
+        started = time.perf_counter()
+        profiles = load_student_profiles(student_ids, term_start, term_end, conn=conn)
+        # The chunk is loaded in one batch, so each report is charged an equal share of the load time
+        load_share = (time.perf_counter() - started) / max(len(profiles), 1)
+    finally:
+        conn.close()
+
+    rendered = []
+    for profile in profiles.values():
+        started = time.perf_counter()
+        page = render_report_html(profile, term_start, term_end)
+        files = {}
+        if "html" in formats:
+            files["html"] = page.encode("utf-8")
+        if "pdf" in formats:
+            files["pdf"] = HTML(string=page).write_pdf()
+        rendered.append((report_filename(profile), files, load_share + time.perf_counter() - started))
+    return rendered
+
+def generate_term_reports(student_ids, term_start, term_end, formats=("html",), db_path=None,
+                          workers=None, chunk_size=50, progress=None):
+    """Render term reports for many students in worker processes and return (zip bytes, timings)
+
+    progress, if given, is called with (reports_done, reports_total) as chunks finish.
+    timings is a list of (report file name, seconds) in completion order.
+    """
+    db_path = db_path or database.current_database_path()
+    student_ids = list(student_ids)
+    chunks = [student_ids[i:i + chunk_size] for i in range(0, len(student_ids), chunk_size)]
+    workers = workers or min(len(chunks), os.cpu_count() or 1) or 1
+
+    buffer = io.BytesIO()
+    timings = []
+    # Workers are spawned fresh - forked from the threaded Streamlit server they could inherit a held
+    # lock or the parent's pooled database connections
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [
+            pool.submit(render_reports, db_path, chunk, str(term_start), str(term_end), tuple(formats))
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            for filename, files, seconds in future.result():
+                for extension, data in files.items():
+                    archive.writestr(f"{filename}.{extension}", data)
+                timings.append((filename, seconds))
+            if progress:
+                progress(len(timings), len(student_ids))
+
+    return buffer.getvalue(), timings
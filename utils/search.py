@@ -0,0 +1,74 @@
+import re
+from utils.database import execute_query
+
+# Markers put around matched terms by SQLite; swapped for markdown bold after escaping the text
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+# Search sources: FTS table, bm25 weight per indexed column, extra columns and joins back to the student
+SEARCH_SOURCES = {
+    'Comments': {
+        'fts': 'comments_fts',
+        'weights': (1.0, 0.5),
+        'select': "cm.category, cm.created_at",
+        'joins': "JOIN comments cm ON cm.id = comments_fts.rowid JOIN students s ON s.id = cm.student_id",
+    },
+    'Essays': {
+        'fts': 'essay_marks_fts',
+        'weights': (3.0, 1.0, 0.5),
+        'select': "em.essay_title, em.created_at",
+        'joins': "JOIN essay_marks em ON em.id = essay_marks_fts.rowid JOIN students s ON s.id = em.student_id",
+    },
+    'Grammar Examples': {
+        'fts': 'grammar_errors_fts',
+        'weights': (1.0,),
+        'select': "ge.error_type, ge.created_at",
+        'joins': "JOIN grammar_errors ge ON ge.id = grammar_errors_fts.rowid JOIN students s ON s.id = ge.student_id",
+    },
+}
+
+def build_match_query(text):
+    """Turn free text into an FTS5 query that matches every word (a trailing * matches prefixes)"""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.replace('"', '').strip('*')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms) or None
+
+def _scope(teacher_id, class_id):
+    if class_id is None:
+        return "s.teacher_id = ?", [teacher_id]
+    return "s.teacher_id = ? AND s.class_id = ?", [teacher_id, class_id]
+
+def count_matches(source, match_query, teacher_id, class_id=None):
+    """Count one teacher's matching rows in a search source"""
+    config = SEARCH_SOURCES[source]
+    scope, params = _scope(teacher_id, class_id)
+    result = execute_query(f"""
+        SELECT COUNT(*) FROM {config['fts']} {config['joins']}
+        WHERE {config['fts']} MATCH ? AND {scope}
+    """, [match_query] + params)
+    return result[0][0]
+
+def search_source(source, match_query, teacher_id, class_id=None, limit=50):
+    """Best-ranked matches in one source as (student, class, title, date, snippet) rows"""
+    config = SEARCH_SOURCES[source]
+    fts = config['fts']
+    weights = ", ".join(str(weight) for weight in config['weights'])
+    scope, params = _scope(teacher_id, class_id)
+    return execute_query(f"""
+        SELECT s.name, c.name, {config['select']},
+               snippet({fts}, -1, '{MATCH_START}', '{MATCH_END}', '…', 24)
+        FROM {fts} {config['joins']}
+        LEFT JOIN classes c ON c.id = s.class_id
+        WHERE {fts} MATCH ? AND {scope}
+        ORDER BY bm25({fts}, {weights})
+        LIMIT ?
+    """, [match_query] + params + [limit])
+
+def format_snippet(snippet):
+    """Escape markdown in a snippet and bold the matched terms"""
+    escaped = re.sub(r"([\\`*_{}\[\]<>()#+\-!|~])", r"\\\1", snippet or "")
+    return escaped.replace(MATCH_START, "**").replace(MATCH_END, "**").replace("\n", " ")
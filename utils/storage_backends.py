@@ -0,0 +1,455 @@
+import os
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+from utils.text_compression import register_text_functions
+
+# Where the app database lives: the SQLite file at CLASS_TRACKER_DB (the default), or a
+# PostgreSQL server when this is a postgresql:// URL, e.g. postgresql://tracker:secret@db:5432/class_tracker
+# (which needs the optional psycopg2-binary package - see requirements.txt)
+DATABASE_URL = os.environ.get("CLASS_TRACKER_DATABASE_URL", "")
+
+# Connections the PostgreSQL pool keeps open, and the most it hands out at once
+POOL_MIN_CONNECTIONS = int(os.environ.get("CLASS_TRACKER_POOL_MIN", "1"))
+POOL_MAX_CONNECTIONS = int(os.environ.get("CLASS_TRACKER_POOL_MAX", "20"))
+# How long a query waits for a connection to be handed back when every one is in use
+POOL_WAIT_SECONDS = float(os.environ.get("CLASS_TRACKER_POOL_WAIT", "30"))
+
+# --- Dialect: the app's queries are written for SQLite and rewritten for PostgreSQL here ---
+
+_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_INSERT_OR_IGNORE = re.compile(r"\bINSERT\s+OR\s+IGNORE\s+INTO\b", re.IGNORECASE)
+_INSERT_OR_REPLACE = re.compile(r"\bINSERT\s+OR\s+REPLACE\s+INTO\s+(\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+_TABLE_INFO = re.compile(r"^\s*PRAGMA\s+(?:main\.)?table_info\s*\(\s*(\w+)\s*\)\s*;?\s*$", re.IGNORECASE)
+_PRAGMA = re.compile(r"^\s*PRAGMA\b", re.IGNORECASE)
+_IS_NOT = re.compile(r"\bIS\s+NOT\s+(?!NULL\b|TRUE\b|FALSE\b|DISTINCT\b)", re.IGNORECASE)
+_IS = re.compile(r"\bIS\s+(?!NOT\b|NULL\b|TRUE\b|FALSE\b|DISTINCT\b)", re.IGNORECASE)
+
+# SQLite's CURRENT_TIMESTAMP is UTC text, which every date comparison in the app relies on
+_UTC_NOW_TEXT = "to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')"
+
+# sqlite_master's type/name/tbl_name/sql, read from the PostgreSQL catalog
+_SQLITE_MASTER = """(
+    SELECT CASE table_type WHEN 'VIEW' THEN 'view' ELSE 'table' END AS type,
+           table_name AS name, table_name AS tbl_name, NULL AS sql
+    FROM information_schema.tables WHERE table_schema = current_schema()
+    UNION ALL
+    SELECT 'index', indexname, tablename, indexdef FROM pg_indexes WHERE schemaname = current_schema()
+) AS sqlite_master"""
+
+# PRAGMA table_info's cid/name/type/notnull/dflt_value/pk
+_TABLE_INFO_QUERY = """
+    SELECT c.ordinal_position - 1 AS cid, c.column_name AS name, upper(c.data_type) AS type,
+           CASE c.is_nullable WHEN 'NO' THEN 1 ELSE 0 END AS notnull, c.column_default AS dflt_value,
+           CASE WHEN k.column_name IS NULL THEN 0 ELSE 1 END AS pk
+    FROM information_schema.columns c
+    LEFT JOIN information_schema.table_constraints t
+        ON t.table_schema = c.table_schema AND t.table_name = c.table_name AND t.constraint_type = 'PRIMARY KEY'
+    LEFT JOIN information_schema.key_column_usage k
+        ON k.constraint_name = t.constraint_name AND k.table_schema = c.table_schema AND k.column_name = c.column_name
+    WHERE c.table_schema = current_schema() AND c.table_name = '{table}'
+    ORDER BY c.ordinal_position
+"""
+
+
+def _rewrite_code(code, with_params):
+    """Rewrite the parts of a statement outside string literals"""
+    code = re.sub(r"\bsqlite_master\b", _SQLITE_MASTER, code)
+    code = re.sub(r"\bCURRENT_TIMESTAMP\b", _UTC_NOW_TEXT, code, flags=re.IGNORECASE)
+    # SQLite compares with IS / IS NOT where PostgreSQL needs IS [NOT] DISTINCT FROM
+    code = _IS_NOT.sub("IS DISTINCT FROM ", code)
+    code = _IS.sub("IS NOT DISTINCT FROM ", code)
+    # SQLite's LIKE ignores case
+    code = re.sub(r"\bLIKE\b", "ILIKE", code, flags=re.IGNORECASE)
+    if with_params:
+        code = re.sub(r"[?%]", lambda m: "%s" if m.group() == "?" else "%%", code)
+    return code
+
+
+@lru_cache(maxsize=2048)
+def translate(query, with_params=False):
+    """A SQLite statement rewritten for PostgreSQL (with_params when it will run with bound parameters)"""
+    table_info = _TABLE_INFO.match(query)
+    if table_info:
+        return _TABLE_INFO_QUERY.format(table=table_info.group(1))
+    if _PRAGMA.match(query):
+        raise ValueError(f"{query.strip()} only works on SQLite")
+
+    conflict = ""
+    if _INSERT_OR_IGNORE.search(query):
+        query = _INSERT_OR_IGNORE.sub("INSERT INTO", query)
+        conflict = " ON CONFLICT DO NOTHING"
+    replace = _INSERT_OR_REPLACE.search(query)
+    if replace:
+        # The first column listed is the key a replaced row matches on
+        key, *columns = [column.strip() for column in replace.group(2).split(",")]
+        query = _INSERT_OR_REPLACE.sub(r"INSERT INTO \1 (\2)", query)
+        conflict = f" ON CONFLICT ({key}) DO UPDATE SET " + ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+
+    parts = _LITERAL.split(query.strip().rstrip(";"))
+    return "".join(
+        (part.replace("%", "%%") if with_params else part) if i % 2 else _rewrite_code(part, with_params)
+        for i, part in enumerate(parts)
+    ) + conflict
+
+
+# SQLite declared type -> PostgreSQL column type. Booleans stay 0/1 integers as the queries expect,
+# and dates stay ISO text so they compare and substr() the same way
+_COLUMN_TYPES = {
+    'INTEGER': 'BIGINT',
+    'BOOLEAN': 'BIGINT',
+    'REAL': 'DOUBLE PRECISION',
+    'BLOB': 'BYTEA',
+    'TIMESTAMP': 'TEXT',
+    'DATE': 'TEXT',
+}
+_COLUMN_DEFINITION = re.compile(r"((?:^|[(,])\s*\w+\s+)([A-Za-z]+)\b")
+
+# Foreign keys are documentation only in SQLite (the app never turns enforcement on), so they stay that way
+_FOREIGN_KEY = re.compile(r",\s*FOREIGN\s+KEY\s*\([^)]*\)\s*REFERENCES\s+\w+\s*\([^)]*\)", re.IGNORECASE)
+_REFERENCES = re.compile(r"\s+REFERENCES\s+\w+\s*\([^)]*\)", re.IGNORECASE)
+
+_TRIGGER = re.compile(
+    r"CREATE\s+TRIGGER\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)\s+(BEFORE|AFTER)\s+(INSERT|DELETE|UPDATE(?:\s+OF\s+[\w\s,]+?)?)"
+    r"\s+ON\s+(\w+)(?:\s+WHEN\s+(.*?))?\s+BEGIN\s+(.*)\s+END\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+# SQLite functions the queries use that PostgreSQL lacks
+POSTGRES_FUNCTIONS = (
+    """CREATE OR REPLACE FUNCTION strftime(format TEXT, value TEXT) RETURNS TEXT LANGUAGE sql STABLE AS $$
+        SELECT to_char(
+            CASE WHEN value = 'now' THEN now() AT TIME ZONE 'UTC' ELSE value::timestamp END,
+            replace(replace(replace(replace(replace(replace(replace(format,
+                '%Y', 'YYYY'), '%m', 'MM'), '%d', 'DD'), '%H', 'HH24'), '%M', 'MI'), '%S', 'SS'), '%f', 'SS.MS')
+        )
+    $$""",
+)
+
+
+def _column_types(sql):
+    """Column definitions in a CREATE TABLE (or a single declared type) with PostgreSQL types"""
+    if sql.upper() in _COLUMN_TYPES:
+        return _COLUMN_TYPES[sql.upper()]
+    sql = _COLUMN_DEFINITION.sub(lambda m: m.group(1) + _COLUMN_TYPES.get(m.group(2).upper(), m.group(2)), sql)
+    sql = re.sub(r"\bBIGINT\s+PRIMARY\s+KEY\s+AUTOINCREMENT\b", "BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY", sql, flags=re.IGNORECASE)
+    return _boolean_defaults(sql)
+
+
+def _boolean_defaults(sql):
+    return re.sub(r"\bDEFAULT\s+(TRUE|FALSE)\b", lambda m: "DEFAULT " + ("1" if m.group(1).upper() == "TRUE" else "0"), sql, flags=re.IGNORECASE)
+
+
+def _translate_trigger(sql):
+    """A SQLite trigger as a PostgreSQL trigger function plus the trigger that calls it"""
+    name, timing, event, table, when, body = _TRIGGER.match(sql.strip()).groups()
+    statements = [translate(statement) for statement in body.split(";") if statement.strip()]
+    return [
+        f"CREATE OR REPLACE FUNCTION {name}_fn() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        + "; ".join(statements) + "; RETURN NULL; END $$",
+        f"DROP TRIGGER IF EXISTS {name} ON {table}",
+        f"CREATE TRIGGER {name} {timing} {event} ON {table} FOR EACH ROW "
+        + (f"WHEN ({translate(when)}) " if when else "") + f"EXECUTE FUNCTION {name}_fn()",
+    ]
+
+
+def postgres_schema(reference_path, skip=()):
+    """Statements that bring a PostgreSQL database up to the schema of a freshly initialized SQLite file
+
+    Tables are created if missing and gain any columns they lack; indexes, views and triggers are
+    (re)created. Objects whose names start with an entry of `skip` are left out.
+    """
+    conn = sqlite3.connect(reference_path)
+    try:
+        objects = conn.execute("""
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+            ORDER BY CASE type WHEN 'table' THEN 0 WHEN 'index' THEN 1 WHEN 'view' THEN 2 ELSE 3 END, rowid
+        """).fetchall()
+        skipped = {name for _, name, _, sql in objects if sql.upper().startswith("CREATE VIRTUAL TABLE")}
+        skipped |= {name for _, name, _, _ in objects if name.startswith(tuple(skip))}
+        skipped |= {name for _, name, _, _ in objects if any(name.startswith(f"{virtual}_") for virtual in skipped)}
+
+        sql_of = {name: sql for _, name, _, sql in objects}
+        statements = list(POSTGRES_FUNCTIONS)
+        for type_, name, table, sql in objects:
+            if name in skipped or table in skipped or any(re.search(rf"\b{other}\b", sql) for other in skipped):
+                continue
+            if type_ == 'table':
+                sql = _REFERENCES.sub("", _FOREIGN_KEY.sub("", sql))
+                sql = re.sub(r"^CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?", "CREATE TABLE IF NOT EXISTS ", sql, flags=re.IGNORECASE)
+                statements.append(translate(_column_types(sql)))
+                # Tables created by an older version gain the columns added since
+                for _, column, declared, _, default, pk in conn.execute(f"PRAGMA table_info({name})"):
+                    if not pk:
+                        definition = f"{column} {_column_types(declared or 'TEXT')}" + (f" DEFAULT {default}" if default is not None else "")
+                        statements.append(translate(_boolean_defaults(f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS {definition}")))
+            elif type_ == 'index':
+                statements.append(re.sub(r"^CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?",
+                                         r"CREATE \1INDEX IF NOT EXISTS ", sql, flags=re.IGNORECASE))
+            elif type_ == 'view':
+                statements.append(f"DROP VIEW IF EXISTS {name}")
+                statements.append(translate(re.sub(r"^CREATE\s+VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?", "CREATE VIEW ", sql, flags=re.IGNORECASE)))
+            else:
+                statements.extend(_translate_trigger(sql))
+
+        # Rows init_database seeds (founder accounts, settings) go in once
+        for type_, name, _, _ in objects:
+            if type_ != 'table' or name in skipped:
+                continue
+            cursor = conn.execute(f"SELECT * FROM {name}")
+            columns = ", ".join(column[0] for column in cursor.description)
+            for row in cursor:
+                statements.append((f"INSERT OR IGNORE INTO {name} ({columns}) VALUES ({', '.join('?' * len(row))})", row))
+            if "AUTOINCREMENT" in sql_of[name].upper():
+                # Seeded ids don't move the identity sequence on
+                statements.append(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {name}")
+        return statements
+    finally:
+        conn.close()
+
+
+# --- Backends ---
+
+class SQLiteBackend:
+    """Database files opened with the sqlite3 module - one file per database, the default"""
+
+    name = "sqlite"
+    file_based = True
+    IntegrityError = sqlite3.IntegrityError
+    OperationalError = sqlite3.OperationalError
+
+    def connect(self, db_path, read_only=False):
+        if read_only:
+            conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+        else:
+            conn = sqlite3.connect(db_path)
+        register_text_functions(conn)
+        return conn
+
+    def size_bytes(self, db_path):
+        return os.path.getsize(db_path) if os.path.exists(db_path) else 0
+
+    def describe(self, db_path):
+        return f"SQLite file {db_path}"
+
+
+class PostgresCursor:
+    """A psycopg2 cursor that takes SQLite statements and reports lastrowid like sqlite3"""
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+        self.lastrowid = None
+
+    def execute(self, query, params=None):
+        statement = translate(query, params is not None)
+        table = re.match(r"\s*INSERT\s+INTO\s+(\w+)", statement, re.IGNORECASE)
+        returning = table is not None and table.group(1).lower() in self._connection.backend.id_tables(self._cursor)
+        self._cursor.execute(statement + " RETURNING id" if returning else statement, params)
+        if returning:
+            ids = self._cursor.fetchall()
+            self.lastrowid = ids[-1][0] if ids else None
+        return self
+
+    def executemany(self, query, seq_of_params):
+        from psycopg2.extras import execute_batch
+
+        execute_batch(self._cursor, translate(query, True), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def close(self):
+        self._cursor.close()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
+class PostgresConnection:
+    """A pooled psycopg2 connection with the parts of the sqlite3 connection API the app uses
+
+    close() hands the connection back to the pool, discarding anything uncommitted as sqlite3 does.
+    """
+
+    def __init__(self, backend, read_only=False):
+        self.backend = backend
+        self._conn = backend.checkout()
+        if read_only:
+            try:
+                # Every query until close() reads the same snapshot, and none of them can write
+                self._conn.cursor().execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            except BaseException:
+                self.close()
+                raise
+
+    def cursor(self):
+        return PostgresCursor(self, self._conn.cursor())
+
+    def execute(self, query, params=None):
+        return self.cursor().execute(query, params)
+
+    def executemany(self, query, seq_of_params):
+        return self.cursor().executemany(query, seq_of_params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                conn.rollback()
+            finally:
+                self.backend.checkin(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+class PostgresBackend:
+    """A PostgreSQL server reached through a thread-safe psycopg2 connection pool (optional dependency)"""
+
+    name = "postgresql"
+    file_based = False
+
+    def __init__(self, url, min_connections=POOL_MIN_CONNECTIONS, max_connections=POOL_MAX_CONNECTIONS,
+                 wait_seconds=POOL_WAIT_SECONDS):
+        self.url = url
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.wait_seconds = wait_seconds
+        self._pool = None
+        self._id_tables = None
+        self._lock = threading.Lock()
+        # psycopg2's pool raises PoolError when every connection is out rather than waiting, so
+        # checkouts queue here first - concurrent page reads then wait their turn instead of failing
+        self._available = threading.BoundedSemaphore(max_connections)
+        self._inherited_pools = []
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        """A forked child opens its own pool rather than sharing the parent's server sockets"""
+        # The lock may have been held by a parent thread that doesn't exist here, and the
+        # connections counted out were the parent's
+        self._lock = threading.Lock()
+        self._available = threading.BoundedSemaphore(self.max_connections)
+        if self._pool is not None:
+            # Kept referenced: closing, or letting them be collected, would end the parent's sessions
+            self._inherited_pools.append(self._pool)
+            self._pool = None
+
+    def _driver(self):
+        try:
+            import psycopg2
+        except ImportError:
+            raise RuntimeError("CLASS_TRACKER_DATABASE_URL points at PostgreSQL - install psycopg2-binary to use it")
+        return psycopg2
+
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._driver()
+                from psycopg2.extensions import DECIMAL, new_type, register_type
+                from psycopg2.pool import ThreadedConnectionPool
+
+                # SUM and AVG come back as numeric; the pages do float arithmetic on them as with SQLite
+                register_type(new_type(DECIMAL.values, "DECIMAL_AS_FLOAT",
+                                       lambda value, cursor: None if value is None else float(value)))
+                self._pool = ThreadedConnectionPool(self.min_connections, self.max_connections, self.url)
+            return self._pool
+
+    def checkout(self):
+        """A connection from the pool, waiting up to wait_seconds for one to be handed back if all are in use"""
+        pool = self.pool()
+        if not self._available.acquire(timeout=self.wait_seconds):
+            raise self.OperationalError(
+                f"No database connection came free within {self.wait_seconds:g}s - all {self.max_connections} are in use"
+            )
+        try:
+            return pool.getconn()
+        except BaseException:
+            self._available.release()
+            raise
+
+    def checkin(self, conn):
+        """Hand a checked-out connection back to the pool"""
+        try:
+            self.pool().putconn(conn)
+        finally:
+            self._available.release()
+
+    @property
+    def IntegrityError(self):
+        return self._driver().IntegrityError
+
+    @property
+    def OperationalError(self):
+        return self._driver().OperationalError
+
+    def connect(self, db_path=None, read_only=False):
+        return PostgresConnection(self, read_only)
+
+    def id_tables(self, cursor):
+        """Tables with an id column - inserts into them return it for lastrowid"""
+        if self._id_tables is None:
+            cursor.execute("SELECT table_name FROM information_schema.columns WHERE table_schema = current_schema() AND column_name = 'id'")
+            self._id_tables = {row[0] for row in cursor.fetchall()}
+        return self._id_tables
+
+    def reset_schema_cache(self):
+        self._id_tables = None
+
+    def size_bytes(self, db_path=None):
+        conn = self.connect()
+        try:
+            return conn.execute("SELECT pg_database_size(current_database())").fetchone()[0]
+        finally:
+            conn.close()
+
+    def describe(self, db_path=None):
+        return "PostgreSQL " + re.sub(r"//[^@/]*@", "//", self.url)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+
+
+def storage_backend(url=DATABASE_URL):
+    """The backend the app database uses - SQLite unless a PostgreSQL URL is configured"""
+    if not url:
+        return SQLiteBackend()
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresBackend(url)
+    raise ValueError(f"Unsupported CLASS_TRACKER_DATABASE_URL {url!r} - expected postgresql://...")
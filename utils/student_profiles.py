@@ -0,0 +1,156 @@
+from dataclasses import dataclass, field
+from collections import Counter
+
+from utils.database import get_connection
+from utils.term_archive import ARCHIVED_TABLES, attach_archives
+
+# Ids per IN (...) list - well under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
+
+@dataclass(frozen=True, slots=True)
+class HomeworkRecord:
+    date: str
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class CommentRecord:
+    category: str
+    comment: str
+    evidence: str
+    created_at: str
+
+
+@dataclass(frozen=True, slots=True)
+class SpellingRecord:
+    week_date: str
+    score: int
+    max_score: int
+    percentage: float
+
+
+@dataclass(frozen=True, slots=True)
+class GrammarRecord:
+    error_type: str
+    example: str
+    created_at: str
+
+
+@dataclass(frozen=True, slots=True)
+class DictationRecord:
+    task_id: int
+    score: float
+    created_at: str
+
+
+@dataclass(frozen=True, slots=True)
+class EssayRecord:
+    id: int
+    title: str
+    essay_type: str
+    score: int
+    created_at: str
+
+
+@dataclass(slots=True)
+class StudentProfile:
+    id: int
+    name: str
+    class_id: int
+    class_name: str
+    teacher_name: str
+    homework: list = field(default_factory=list)
+    comments: list = field(default_factory=list)
+    spelling: list = field(default_factory=list)
+    grammar: list = field(default_factory=list)
+    dictation: list = field(default_factory=list)
+    essays: list = field(default_factory=list)
+
+    @property
+    def homework_counts(self):
+        return Counter(record.status for record in self.homework)
+
+    @property
+    def homework_on_time_rate(self):
+        return self.homework_counts['on_time'] / len(self.homework) if self.homework else None
+
+    @property
+    def spelling_average(self):
+        return sum(record.percentage for record in self.spelling) / len(self.spelling) if self.spelling else None
+
+    @property
+    def dictation_average(self):
+        return sum(record.score for record in self.dictation) / len(self.dictation) if self.dictation else None
+
+    def grammar_weak_spots(self, limit=3):
+        counts = Counter(record.error_type for record in self.grammar)
+        return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+# table -> (columns in record order, date column for term filtering, record type, profile attribute)
+PROFILE_TABLES = {
+    'homework': ("date, status", "date", HomeworkRecord, 'homework'),
+    'comments': ("category, comment, evidence, created_at", "created_at", CommentRecord, 'comments'),
+    'spelling_tests': ("week_date, score, max_score, percentage", "week_date", SpellingRecord, 'spelling'),
+    'grammar_errors': ("error_type, example, created_at", "created_at", GrammarRecord, 'grammar'),
+    'dictation_scores': ("task_id, score, created_at", "created_at", DictationRecord, 'dictation'),
+    'essay_marks': ("id, essay_title, essay_type, score, created_at", "created_at", EssayRecord, 'essays'),
+}
+
+def _load_batch(cursor, student_ids, start, end, profiles, archived):
+    placeholders = ", ".join("?" * len(student_ids))
+
+    cursor.execute(f"""
+        SELECT s.id, s.name, s.class_id, c.name, u.full_name
+        FROM students s
+        LEFT JOIN classes c ON s.class_id = c.id
+        LEFT JOIN users u ON s.teacher_id = u.id
+        WHERE s.id IN ({placeholders})
+    """, student_ids)
+    for student_id, name, class_id, class_name, teacher_name in cursor.fetchall():
+        profiles[student_id] = StudentProfile(student_id, name, class_id, class_name or "", teacher_name or "")
+
+    for table, (columns, date_column, record_type, attribute) in PROFILE_TABLES.items():
+        # With archives attached, their tables are read through views that take them in
+        source = f"{table}_all" if archived and table in ARCHIVED_TABLES else table
+        query = f"SELECT student_id, {columns} FROM {source} WHERE student_id IN ({placeholders})"
+        params = list(student_ids)
+        if start is not None:
+            query += f" AND {date_column} >= ?"
+            params.append(str(start))
+        if end is not None:
+            # Timestamps carry a time of day, so compare against the end of the last day
+            query += f" AND {date_column} <= ?"
+            params.append(f"{end} 23:59:59")
+        query += f" ORDER BY student_id, {date_column}"
+        cursor.execute(query, params)
+        for student_id, *values in cursor.fetchall():
+            profile = profiles.get(student_id)
+            if profile:
+                getattr(profile, attribute).append(record_type(*values))
+
+def load_student_profiles(student_ids, start=None, end=None, conn=None):
+    """Load full profiles for many students, one query per table per batch of ids
+
+    start/end optionally limit the records to a date range (inclusive); archived terms
+    in the range are read from their archive files.
+    Returns {student_id: StudentProfile}; unknown ids are left out.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    own_connection = conn is None
+    conn = conn or get_connection()
+    profiles = {}
+    try:
+        archived = attach_archives(conn, start, end)
+        cursor = conn.cursor()
+        for i in range(0, len(student_ids), BATCH_SIZE):
+            _load_batch(cursor, student_ids[i:i + BATCH_SIZE], start, end, profiles, archived)
+    finally:
+        if own_connection:
+            conn.close()
+    return profiles
+
+def load_student_profile(student_id, start=None, end=None, conn=None):
+    """Load one student's profile (None if the student doesn't exist)"""
+    return load_student_profiles([student_id], start, end, conn).get(student_id)
@@ -0,0 +1,384 @@
+import datetime
+import hashlib
+import random
+import sqlite3
+import time
+
+from utils.database import (
+    GRAMMAR_ERROR_EXAMPLES, SEARCH_INDEXES, create_journal_triggers, create_search_indexes, drop_journal_triggers,
+    drop_search_index, init_database,
+)
+from utils.dictation_errors import diff_dictation_words, error_rows
+from utils.feedback_texts import feedback_id
+
+# Baseline school used by the --scale multiplier (roughly one real primary school)
+BASE_TEACHERS = 10
+BASE_CLASSES = 30
+BASE_STUDENTS = 750
+
+FIRST_NAMES = [
+    "Emma", "Lucas", "Sophia", "Oliver", "Ava", "Noah", "Isabella", "Ethan", "Mia", "Benjamin",
+    "Chloe", "Leo", "Grace", "Ryan", "Lily", "Jayden", "Zoe", "Daniel", "Hannah", "Kevin",
+    "Yuki", "Wei", "Mei", "Hao", "Xin", "Jun", "Lin", "Tian", "Yan", "Bo",
+]
+
+LAST_NAMES = [
+    "Thompson", "Chen", "Rodriguez", "Kim", "Patel", "Johnson", "Brown", "Davis", "Wilson", "Garcia",
+    "Wang", "Li", "Zhang", "Liu", "Yang", "Huang", "Zhao", "Wu", "Zhou", "Xu",
+]
+
+CLASS_SUBJECTS = ["English", "Math", "Science", "UOI", "Literacy"]
+
+COMMENT_TEMPLATES = {
+    "English": [
+        ("Excellent reading comprehension and vocabulary usage", "Participated actively in class discussion"),
+        ("Improving writing structure", "Last essay showed better paragraph organization"),
+        ("Needs to slow down when reading aloud", "Skipped words during guided reading"),
+        ("Uses new vocabulary confidently", "Used 'enormous' and 'curious' correctly in writing"),
+    ],
+    "UOI": [
+        ("Shows great curiosity about science topics", "Asked thoughtful questions during experiment"),
+        ("Creative problem solving approach", "Found innovative solution to group project challenge"),
+        ("Makes strong connections to prior learning", "Linked the water cycle to weather unit"),
+    ],
+    "General Behaviour": [
+        ("Very helpful with classmates", "Assisted struggling peer with math problem"),
+        ("Excellent leadership skills", "Led group project effectively"),
+        ("Finding it hard to stay focused after lunch", "Needed three reminders during silent reading"),
+    ],
+}
+
+ESSAY_TOPICS = {
+    "opinion_argumentative": ["My Favorite Season", "Should Homework Be Banned?", "The Best Pet", "Why Reading Matters"],
+    "creative_narrative": ["Adventure in the Forest", "The Lost Key", "A Day on the Moon", "The Secret Door"],
+}
+
+ESSAY_SENTENCES = [
+    "In my opinion this is the most important thing to think about.",
+    "First of all, it makes people happy and healthy.",
+    "The wind was blowing softly through the tall green trees.",
+    "Suddenly I heard a strange noise coming from behind the door.",
+    "Another reason is that we can learn many new things every day.",
+    "My friends and I decided to explore the old house at the end of the street.",
+    "For example, last summer my family went to the beach together.",
+    "It was the most exciting day of my whole life.",
+    "Some people think differently, but I believe I am right.",
+    "In conclusion, I think everyone should try it at least once.",
+    "The sky turned orange and purple as the sun went down.",
+    "We were scared but we held hands and kept walking.",
+]
+
+DICTATION_TRANSCRIPTS = [
+    "The quick brown fox jumps over the lazy dog. This sentence contains many common English words.",
+    "Every morning I walk to school with my little brother. We always stop to look at the river.",
+    "The library is a quiet place where we can read books and learn about the world.",
+    "In spring the flowers bloom and the birds sing loudly in the trees near our classroom.",
+]
+
+ESSAY_FEEDBACK = [
+    ("Well-structured essay with clear ideas", "结构清晰的文章，观点明确"),
+    ("Good use of descriptive language, work on paragraphing", "描述性语言运用得很好，注意分段"),
+    ("Ideas are interesting but need more supporting detail", "想法有趣，但需要更多支持细节"),
+]
+
+DICTATION_FEEDBACK = [
+    (90, "Excellent listening accuracy!", "听写很准确！你听懂了几乎所有的单词。"),
+    (80, "Good listening! Check the words you missed.", "听力不错！大部分单词都听对了。"),
+    (70, "Fair listening accuracy. Listen carefully to every word.", "听写还可以。多练习听力，注意听清楚每个单词。"),
+    (60, "You heard some words correctly. Listen again.", "继续练习听力！专心听每个单词的发音。"),
+    (0, "Keep practicing your listening!", "多练习听写！仔细听，慢慢写。"),
+]
+
+
+def _school_days(start, end):
+    """Weekdays between start and end, skipping the summer and new-year holidays"""
+    day = start
+    while day <= end:
+        if day.weekday() < 5 and day.month not in (7, 8) and not (day.month == 1 and day.day < 8):
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def _timestamp(day, rng):
+    """A school-hours timestamp on the given day, in CURRENT_TIMESTAMP format"""
+    return f"{day.isoformat()} {rng.randint(8, 16):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+
+
+def _clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def _misspell(word, rng):
+    """A plausible misspelling - a doubled, dropped or swapped letter"""
+    if len(word) < 3:
+        return word + word[-1]
+    i = rng.randrange(1, len(word) - 1)
+    return rng.choice([
+        word[:i] + word[i] + word[i:],
+        word[:i] + word[i + 1:],
+        word[:i - 1] + word[i] + word[i - 1] + word[i + 1:],
+    ])
+
+
+def _dictation_attempt(transcript, ability, rng):
+    """What a student of the given ability writes down - longer words are missed more often"""
+    written = []
+    for word in transcript.split():
+        letters = word.strip(".,")
+        if rng.random() < (1 - ability) * min(1.0, len(letters) / 6):
+            roll = rng.random()
+            if roll < 0.3:
+                continue
+            written.append(_misspell(letters, rng) if roll < 0.8 else rng.choice(FIRST_NAMES).lower())
+        else:
+            written.append(word)
+        if rng.random() < (1 - ability) * 0.03:
+            written.append(rng.choice(["the", "a", "and"]))
+    return " ".join(written)
+
+
+def generate_school_data(db_path, teachers=BASE_TEACHERS, classes=BASE_CLASSES, students=BASE_STUDENTS,
+                         years=1, seed=42, end_date=None, progress=None):
+    """Fill a fresh database with a synthetic school and return {table: row_count}
+
+    The same seed and end_date always produce the same database. `progress`
+    is an optional callback receiving (table_name, rows_inserted, seconds).
+    """
+    rng = random.Random(seed)
+    end_date = end_date or datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=int(365 * years))
+    school_days = list(_school_days(start_date, end_date))
+    school_weeks = [day for day in school_days if day.weekday() == 0]
+
+    init_database(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    # Bulk-load settings for this connection only - the database is rebuilt from the seed on failure anyway.
+    # The journal mode is left alone: it is stored in the file, and init_database set it to WAL.
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.execute("PRAGMA cache_size = -200000")
+    # Generated history isn't a change anyone would undo, so it bypasses the change journal
+    drop_journal_triggers(cursor)
+    # Search indexes are built in one pass at the end instead of by a trigger per row
+    for table in SEARCH_INDEXES:
+        drop_search_index(cursor, table)
+
+    counts = {}
+
+    def bulk_insert(table, sql, rows):
+        started = time.perf_counter()
+        cursor.execute("BEGIN")
+        cursor.executemany(sql, rows)
+        inserted = cursor.rowcount
+        cursor.execute("COMMIT")
+        elapsed = time.perf_counter() - started
+        counts[table] = counts.get(table, 0) + inserted
+        if progress:
+            progress(table, inserted, elapsed)
+
+    # Teachers all share the password "password" so the benchmarks can log in as any of them
+    password_hash = hashlib.sha256("password".encode()).hexdigest()
+    bulk_insert(
+        "users",
+        "INSERT INTO users (username, password_hash, full_name, role) VALUES (?, ?, ?, 'teacher')",
+        ((f"teacher_{i:04d}", password_hash, f"Teacher {i:04d}") for i in range(1, teachers + 1)),
+    )
+    teacher_ids = [row[0] for row in cursor.execute(
+        "SELECT id FROM users WHERE username LIKE 'teacher\\_%' ESCAPE '\\' ORDER BY username"
+    )]
+
+    # Classes are dealt round-robin to teachers; names repeat across teachers like real year groups do
+    class_rows = []
+    for i in range(classes):
+        teacher_id = teacher_ids[i % len(teacher_ids)]
+        year_group = 3 + (i // len(teacher_ids)) % 4
+        section = "ABCDEFGH"[(i // (len(teacher_ids) * 4)) % 8]
+        subject = CLASS_SUBJECTS[i % len(CLASS_SUBJECTS)]
+        class_rows.append((i + 1, f"{year_group}{section} {subject}", teacher_id))
+    bulk_insert("classes", "INSERT OR IGNORE INTO classes (id, name, teacher_id) VALUES (?, ?, ?)", class_rows)
+    class_rows = cursor.execute("SELECT id, name, teacher_id FROM classes ORDER BY id").fetchall()
+
+    # Names are unique within a class - the pages key their tables and pickers on student name
+    student_rows = []
+    taken = set()
+    class_sizes = {}
+    for i in range(students):
+        class_id, class_name, teacher_id = class_rows[i % len(class_rows)]
+        name = base_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        suffix = 1
+        while (class_id, name) in taken:
+            if class_sizes.get(class_id, 0) < len(FIRST_NAMES) * len(LAST_NAMES):
+                name = base_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            else:
+                # Every first and last name pairing is taken in this class, so numbered names follow
+                suffix += 1
+                name = f"{base_name} {suffix}"
+        taken.add((class_id, name))
+        class_sizes[class_id] = class_sizes.get(class_id, 0) + 1
+        student_rows.append((i + 1, name, class_name, class_id, teacher_id, _timestamp(start_date, rng)))
+    bulk_insert(
+        "students",
+        "INSERT INTO students (id, name, class_name, class_id, teacher_id, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        student_rows,
+    )
+
+    # Each student gets a stable profile so their results are correlated across tables
+    profiles = {
+        student_id: {
+            "diligence": rng.betavariate(8, 2),
+            "ability": _clamp(rng.gauss(0.75, 0.12), 0.2, 1.0),
+            "error_rate": rng.uniform(0.2, 1.2),
+            "weak_spots": [rng.gammavariate(1.0, 1.0) for _ in GRAMMAR_ERROR_EXAMPLES],
+        }
+        for student_id, *_ in student_rows
+    }
+
+    def homework_rows():
+        for student_id, profile in profiles.items():
+            on_time = profile["diligence"]
+            for day in school_days:
+                roll = rng.random()
+                if roll < 0.04:
+                    status = "absent"
+                elif roll < 0.04 + on_time * 0.96:
+                    status = "on_time"
+                else:
+                    status = "late"
+                yield student_id, day.isoformat(), status
+
+    bulk_insert("homework", "INSERT INTO homework (student_id, date, status) VALUES (?, ?, ?)", homework_rows())
+
+    def spelling_rows():
+        for student_id, profile in profiles.items():
+            for week in school_weeks:
+                if rng.random() < 0.05:
+                    continue
+                score = int(_clamp(round(rng.gauss(profile["ability"] * 20, 2.5)), 0, 20))
+                yield student_id, score, 20, week.isoformat(), score / 20 * 100
+
+    bulk_insert(
+        "spelling_tests",
+        "INSERT INTO spelling_tests (student_id, score, max_score, week_date, percentage) VALUES (?, ?, ?, ?, ?)",
+        spelling_rows(),
+    )
+
+    error_types = list(GRAMMAR_ERROR_EXAMPLES)
+
+    def grammar_rows():
+        for student_id, profile in profiles.items():
+            for week in school_weeks:
+                for _ in range(int(rng.expovariate(1 / profile["error_rate"]))):
+                    error_type = rng.choices(error_types, weights=profile["weak_spots"])[0]
+                    day = week + datetime.timedelta(days=rng.randint(0, 4))
+                    yield student_id, error_type, GRAMMAR_ERROR_EXAMPLES[error_type], _timestamp(day, rng)
+
+    bulk_insert(
+        "grammar_errors",
+        "INSERT INTO grammar_errors (student_id, error_type, example, created_at) VALUES (?, ?, ?, ?)",
+        grammar_rows(),
+    )
+
+    categories = list(COMMENT_TEMPLATES)
+
+    def comment_rows():
+        for student_id in profiles:
+            for week in school_weeks[::2]:
+                if rng.random() < 0.6:
+                    category = rng.choice(categories)
+                    comment, evidence = rng.choice(COMMENT_TEMPLATES[category])
+                    yield student_id, category, comment, evidence, _timestamp(week, rng)
+
+    bulk_insert(
+        "comments",
+        "INSERT INTO comments (student_id, category, comment, evidence, created_at) VALUES (?, ?, ?, ?, ?)",
+        comment_rows(),
+    )
+
+    # Every feedback text is stored once and referenced by its content hash
+    feedback_texts = {
+        feedback_id(text): text
+        for pair in ESSAY_FEEDBACK + [feedback[1:] for feedback in DICTATION_FEEDBACK]
+        for text in pair
+    }
+    bulk_insert("feedback_texts", "INSERT INTO feedback_texts (id, text) VALUES (?, ?)", feedback_texts.items())
+
+    def essay_rows():
+        for student_id, profile in profiles.items():
+            for week in school_weeks[::4]:
+                essay_type = rng.choice(list(ESSAY_TOPICS))
+                title = rng.choice(ESSAY_TOPICS[essay_type])
+                essay_text = " ".join(rng.choices(ESSAY_SENTENCES, k=rng.randint(20, 45)))
+                criteria = {
+                    key: int(_clamp(round(rng.gauss(profile["ability"] * 25, 3)), 5, 25))
+                    for key in ("content_ideas", "organization", "language_use", "conventions")
+                }
+                feedback_en, feedback_zh = rng.choice(ESSAY_FEEDBACK)
+                yield (student_id, title, essay_type, essay_text, sum(criteria.values()),
+                       feedback_id(feedback_en), feedback_id(feedback_zh), criteria["content_ideas"], criteria["organization"],
+                       criteria["language_use"], criteria["conventions"], _timestamp(week, rng))
+
+    bulk_insert(
+        "essay_marks",
+        """INSERT INTO essay_marks (student_id, essay_title, essay_type, essay_text, score, feedback_en_id, feedback_zh_id,
+                                    content_ideas, organization, language_use, conventions, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        essay_rows(),
+    )
+
+    # One dictation task per school week, shared by every class
+    task_rows = [
+        (i + 1, f"Week {week.isoformat()} Dictation", DICTATION_TRANSCRIPTS[i % len(DICTATION_TRANSCRIPTS)],
+         _timestamp(week, rng))
+        for i, week in enumerate(school_weeks)
+    ]
+    bulk_insert(
+        "dictation_tasks",
+        "INSERT INTO dictation_tasks (id, name, transcript, created_at) VALUES (?, ?, ?, ?)",
+        task_rows,
+    )
+
+    dictation_error_rows = []
+
+    def dictation_rows():
+        score_id = 0
+        for student_id, profile in profiles.items():
+            for task_id, _, transcript, created_at in task_rows:
+                if rng.random() < 0.2:
+                    continue
+                score_id += 1
+                student_text = _dictation_attempt(transcript, profile["ability"], rng)
+                errors = diff_dictation_words(transcript, student_text)
+                score = _clamp(100 - 100 * len(errors) / len(transcript.split()), 0, 100)
+                _, feedback_en, feedback_zh = next(f for f in DICTATION_FEEDBACK if score >= f[0])
+                dictation_error_rows.extend(
+                    row + (created_at,) for row in error_rows(score_id, student_id, task_id, errors)
+                )
+                yield (score_id, student_id, task_id, student_text, score, feedback_id(feedback_en),
+                       feedback_id(feedback_zh), created_at)
+
+    bulk_insert(
+        "dictation_scores",
+        """INSERT INTO dictation_scores (id, student_id, task_id, student_text, score, feedback_en_id,
+                                         feedback_zh_id, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        dictation_rows(),
+    )
+    bulk_insert(
+        "dictation_errors",
+        """INSERT INTO dictation_errors (score_id, student_id, task_id, error_type, word, student_word, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        dictation_error_rows,
+    )
+
+    started = time.perf_counter()
+    create_search_indexes(cursor)
+    conn.commit()
+    if progress:
+        progress("search indexes", sum(counts[table] for table in SEARCH_INDEXES), time.perf_counter() - started)
+
+    create_journal_triggers(cursor)
+    conn.commit()
+    conn.close()
+    return counts
@@ -0,0 +1,197 @@
+import datetime
+import os
+import re
+import sqlite3
+
+from utils.database import create_journal_triggers, drop_journal_triggers, get_connection
+
+# Closed terms are moved out of the main database into one read-only file per term,
+# kept in an archives/ folder beside it and listed in term_archives
+
+# Tables whose rows are archived by term -> the date column that places a row in a term
+ARCHIVED_TABLES = {
+    'homework': 'date',
+    'spelling_tests': 'week_date',
+    'grammar_errors': 'created_at',
+}
+
+# The {table}_all view names, for queries that can read the tables directly instead
+_ALL_VIEWS = re.compile(rf"\b({'|'.join(ARCHIVED_TABLES)})_all\b")
+
+# Archive files are read-only, so each one's columns are looked up once: path -> {table: columns}
+_archive_columns = {}
+
+def term_of(day):
+    """(start_year, term) of the school term a date falls in - Aug-Dec T1, Jan-Mar T2, Apr-Jul T3"""
+    if day.month >= 8:
+        return day.year, 1
+    return day.year - 1, 2 if day.month <= 3 else 3
+
+def term_dates(start_year, term):
+    """First and last day of a term"""
+    if term == 1:
+        return datetime.date(start_year, 8, 1), datetime.date(start_year, 12, 31)
+    if term == 2:
+        return datetime.date(start_year + 1, 1, 1), datetime.date(start_year + 1, 3, 31)
+    return datetime.date(start_year + 1, 4, 1), datetime.date(start_year + 1, 7, 31)
+
+def term_label(start_year, term):
+    """Display label matching the essay analytics terms, e.g. 2025-26 T1"""
+    return f"{start_year}-{(start_year + 1) % 100:02d} T{term}"
+
+def _schema_name(start_year, term):
+    return f"term_{start_year}_{term}"
+
+def _database_dir(conn):
+    main_file = next(row[2] for row in conn.execute("PRAGMA database_list") if row[1] == 'main')
+    return os.path.dirname(main_file) or "."
+
+def list_archives(conn):
+    """Archived terms as (schema_name, label, start_date, end_date, file, row_count, archived_at), oldest first"""
+    return conn.execute("""
+        SELECT schema_name, label, start_date, end_date, file, row_count, archived_at
+        FROM term_archives ORDER BY start_date
+    """).fetchall()
+
+def archivable_terms(conn, today=None):
+    """Closed terms that still have rows in the main database, oldest first"""
+    current = term_of(today or datetime.date.today())
+    archived = {row[0] for row in list_archives(conn)}
+    terms = set()
+    for table, date_column in ARCHIVED_TABLES.items():
+        for (day,) in conn.execute(f"SELECT DISTINCT substr({date_column}, 1, 7) || '-01' FROM {table}"):
+            term = term_of(datetime.date.fromisoformat(day))
+            if term < current and _schema_name(*term) not in archived:
+                terms.add(term)
+    return sorted(terms)
+
+def archive_term(start_year, term, db_path=None, archive_dir=None, today=None):
+    """Move a closed term's rows into its own archive file; returns {table: rows moved}
+
+    The copy and the delete commit together, so a row is never in both places or neither.
+    Moving rows loses nothing, so it bypasses the change journal.
+    """
+    if (start_year, term) >= term_of(today or datetime.date.today()):
+        raise ValueError(f"{term_label(start_year, term)} hasn't finished yet")
+    schema_name = _schema_name(start_year, term)
+    first_day, last_day = term_dates(start_year, term)
+
+    conn = get_connection(db_path)
+    try:
+        cursor = conn.cursor()
+        if cursor.execute("SELECT 1 FROM term_archives WHERE schema_name = ?", (schema_name,)).fetchone():
+            raise ValueError(f"{term_label(start_year, term)} is already archived")
+        archive_dir = archive_dir or os.path.join(_database_dir(conn), "archives")
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{schema_name}.db")
+
+        drop_journal_triggers(cursor)
+        cursor.execute("ATTACH DATABASE ? AS archive", (path,))
+        try:
+            moved = {}
+            for table, date_column in ARCHIVED_TABLES.items():
+                cursor.execute(f"PRAGMA main.table_info({table})")
+                columns = cursor.fetchall()
+                definitions = ", ".join(f"{name} {type_}{' PRIMARY KEY' if pk else ''}" for _, name, type_, _, _, pk in columns)
+                names = ", ".join(column[1] for column in columns)
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} ({definitions})")
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_student ON {table} (student_id, {date_column})")
+
+                # Timestamps carry a time of day, so compare against the end of the last day
+                in_term = f"{date_column} >= ? AND {date_column} <= ?"
+                bounds = (str(first_day), f"{last_day} 23:59:59")
+                cursor.execute(f"INSERT INTO archive.{table} ({names}) SELECT {names} FROM main.{table} WHERE {in_term}", bounds)
+                moved[table] = cursor.rowcount
+                cursor.execute(f"DELETE FROM main.{table} WHERE {in_term}", bounds)
+
+            cursor.execute("""
+                INSERT INTO term_archives (schema_name, label, start_date, end_date, file, row_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (schema_name, term_label(start_year, term), str(first_day), str(last_day),
+                  os.path.relpath(path, _database_dir(conn)), sum(moved.values())))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("DETACH DATABASE archive")
+            create_journal_triggers(cursor)
+            conn.commit()
+    finally:
+        conn.close()
+
+    os.chmod(path, 0o444)
+    return moved
+
+def attach_archives(conn, start=None, end=None):
+    """Attach (read-only) the archives overlapping start..end and point the {table}_all temp views at them
+
+    {table}_all is the main table plus every attached term, so history queries read the
+    same way whether or not their range reaches into archived terms. Returns the labels
+    attached - when there are none the views are left alone and callers read the tables.
+    """
+    if not isinstance(conn, sqlite3.Connection):
+        # A database server has no archive files; its {table}_all views are just the tables
+        return []
+    archives = [
+        row for row in list_archives(conn)
+        if (start is None or row[3] >= str(start)) and (end is None or row[2] <= str(end))
+    ]
+    if not archives:
+        return []
+    limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    if len(archives) > limit:
+        raise ValueError(f"That range covers {len(archives)} archived terms - at most {limit} can be read at once")
+
+    wanted = {row[0]: row for row in archives}
+    databases = {row[1]: row[2] for row in conn.execute("PRAGMA database_list")}
+    for schema_name in databases:
+        if schema_name.startswith("term_") and schema_name not in wanted:
+            conn.execute(f"DETACH DATABASE {schema_name}")
+    database_dir = os.path.dirname(databases['main']) or "."
+    archive_columns = {}
+    for schema_name, row in wanted.items():
+        path = os.path.abspath(os.path.join(database_dir, row[4]))
+        if schema_name not in databases:
+            conn.execute(f"ATTACH DATABASE ? AS {schema_name}", (f"file:{path}?mode=ro",))
+        if path not in _archive_columns:
+            _archive_columns[path] = {
+                table: {column[1] for column in conn.execute(f"PRAGMA {schema_name}.table_info({table})")}
+                for table in ARCHIVED_TABLES
+            }
+        archive_columns[schema_name] = _archive_columns[path]
+
+    for table in ARCHIVED_TABLES:
+        columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+        selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+        for schema_name in wanted:
+            # Columns added to the table after a term was archived read as NULL there
+            archived = archive_columns[schema_name][table]
+            selects.append(
+                f"SELECT {', '.join(col if col in archived else f'NULL AS {col}' for col in columns)} FROM {schema_name}.{table}"
+            )
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}_all")
+        conn.execute(f"CREATE TEMP VIEW {table}_all AS {' UNION ALL '.join(selects)}")
+    return [row[1] for row in archives]
+
+def archived_term(day):
+    """Label of the archived term a date falls in, or None - archived terms are read-only"""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT label FROM term_archives WHERE start_date <= ? AND end_date >= ?", (str(day), str(day))
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+def execute_archive_query(query, params=None, start=None, end=None):
+    """Run a SELECT that reads {table}_all views, with the archives for start..end attached"""
+    conn = get_connection()
+    try:
+        if not attach_archives(conn, start, end):
+            # Nothing archived in range, so the views would only add up to the tables themselves
+            query = _ALL_VIEWS.sub(r"\1", query)
+        return conn.execute(query, params or ()).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,32 @@
+import zlib
+
+# Long prose columns that are stored zlib-compressed (as BLOBs) once a database has text compression enabled
+COMPRESSED_TEXT_COLUMNS = {
+    'essay_marks': ('essay_text',),
+    'dictation_scores': ('student_text',),
+    'feedback_texts': ('text',),
+}
+
+# Shorter values rarely shrink once the zlib header is added, so they stay plain text
+MIN_COMPRESS_BYTES = 64
+COMPRESSION_LEVEL = 6
+
+def compress_text(text):
+    """Compress a text value to a BLOB if that makes it smaller, otherwise return it unchanged"""
+    if not isinstance(text, str):
+        return text
+    encoded = text.encode('utf-8')
+    if len(encoded) < MIN_COMPRESS_BYTES:
+        return text
+    compressed = zlib.compress(encoded, COMPRESSION_LEVEL)
+    return compressed if len(compressed) < len(encoded) else text
+
+def decompress_text(value):
+    """Text for a stored value - compressed BLOBs are inflated, anything else is returned as is"""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+def register_text_functions(conn):
+    """Make decompress_text() available to SQL (views, triggers and ad-hoc queries) on a connection"""
+    conn.create_function('decompress_text', 1, decompress_text, deterministic=True)